@@ -0,0 +1,102 @@
+import gzip
+import json
+import math
+import os
+
+import flask
+import numpy as np
+
+from export import decode_token, encode_token
+
+# Number of records per page of the JSON API, unless the client asks for another limit
+API_PAGE_SIZE = int(os.getenv('STOPKB_API_PAGE_SIZE', 100))
+API_MAX_PAGE_SIZE = int(os.getenv('STOPKB_API_MAX_PAGE_SIZE', 1000))
+
+# Smaller responses are sent as they are, compressing them costs more than it saves
+GZIP_MIN_SIZE = 1024
+
+
+def list_arg(args, name, default=None):
+    # Multi-valued parameters are comma-separated, e.g. codon_stop=TGA,TAA; empty items are skipped
+    values = [value for value in args.get(name, '').split(',') if value]
+    return values if values else default
+
+
+def float_arg(args, name):
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    # nan or inf would match no row or every row without telling the client
+    if not math.isfinite(number):
+        flask.abort(400, f"{name} must be a finite number")
+    return number
+
+
+def range_arg(args, name):
+    # Bounds of a <name>_min / <name>_max range; rows with a missing value are kept unless a bound is given
+    start, end = float_arg(args, name + '_min'), float_arg(args, name + '_max')
+    if start is None and end is None:
+        return None, None
+    return -np.inf if start is None else start, np.inf if end is None else end
+
+
+def page_size(args):
+    try:
+        limit = int(args.get('limit', API_PAGE_SIZE))
+    except ValueError:
+        flask.abort(400, "limit must be an integer")
+    if not 1 <= limit <= API_MAX_PAGE_SIZE:
+        flask.abort(400, f"limit must be between 1 and {API_MAX_PAGE_SIZE}")
+    return limit
+
+
+def projection(args, columns, allowed):
+    # Only the requested fields are serialized, in the requested order
+    fields = list_arg(args, 'fields', columns)
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        flask.abort(400, f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def page_start(args, rows):
+    # The cursor is the last row returned, rows are in increasing order so the next page starts right after it
+    cursor = args.get('cursor')
+    if not cursor:
+        return 0
+    after = decode_token(cursor)
+    if not isinstance(after, int):
+        flask.abort(400, "Invalid cursor")
+    return int(np.searchsorted(rows, after, side='right'))
+
+
+def json_error(error):
+    # HTTP errors of the API routes, {"error": description} with the status of the error
+    response = flask.jsonify({'error': error.description})
+    response.status_code = error.code
+    return response
+
+
+def json_response(body):
+    response = flask.Response(body.encode(), mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if len(body) >= GZIP_MIN_SIZE and 'gzip' in flask.request.accept_encodings:
+        response.set_data(gzip.compress(response.get_data(), 6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def json_page(df, rows, columns, args):
+    # One page of df.iloc[rows]; floats keep their full precision and missing values become null
+    limit = page_size(args)
+    fields = projection(args, columns, df.columns)
+    start = page_start(args, rows)
+    page = rows[start:start + limit]
+    next_cursor = encode_token(int(page[-1])) if start + limit < len(rows) else None
+    page_df = df.iloc[page][fields]
+    records = page_df.astype(object).where(page_df.notna(), None).to_dict('records')
+    return json_response(json.dumps({'total': len(rows), 'next_cursor': next_cursor, 'data': records}, separators=(',', ':'), default=str))
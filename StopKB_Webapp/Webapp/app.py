@@ -1,29 +1,36 @@
+import base64
 import dash
+import itertools
+import math
 import os
-from dash import Dash, dcc, html, Input, Output, State, dash_table
+import re
+import time
+import zlib
+from dash import ClientsideFunction, Dash, DiskcacheManager, dcc, html, Input, Output, State, dash_table
 import dash_bootstrap_components as dbc
 import dash_cytoscape as cyto
 import dash_bio as dashbio
+import flask
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from werkzeug.exceptions import HTTPException
 from werkzeug.middleware.profiler import ProfilerMiddleware
 from pages import home, search, download, documentation, contact, not_found_404
+from variant_store import ANNOTATION_COLUMNS, FilterMasks, FilterSpec, FrameColumns, VariantStore, frame_significance_by_source, parse_region
+from cache import CACHE_TTL, aggregate_cache, cached, job_cache, get_result, get_rows, make_key, put_result, put_rows, result_cache
+from export import EXPORT_FORMATS, decode_token, encode_token
+from api import json_error, json_page, list_arg, range_arg
+from vcf import VcfAnnotator, decompressed, stream_vcf_gz
 
 #from dbmanager import DatabaseManager
-import neo4j
-from neo4j import GraphDatabase
-from neo4j.exceptions import ServiceUnavailable
 
-app = Dash(__name__, url_base_pathname='/stopkb/', external_stylesheets=[dbc.themes.BOOTSTRAP,'https://cdn.jsdelivr.net/gh/AnnMarieW/dash-bootstrap-templates/dbc.min.css'])
+app = Dash(__name__, url_base_pathname='/stopkb/', external_stylesheets=[dbc.themes.BOOTSTRAP,'https://cdn.jsdelivr.net/gh/AnnMarieW/dash-bootstrap-templates/dbc.min.css'], background_callback_manager=DiskcacheManager(job_cache))
 
 app.title = "StopKB"
 
 #db_manager = DatabaseManager()
-URI = "neo4j://localhost:7687"
-AUTH = ("neo4j", os.getenv('NEO4J_PASSWORD'))
-
-with GraphDatabase.driver(URI, auth=AUTH) as driver: 
-    driver.verify_connectivity()
 
 # Lire les fichiers et stocker les options au démarrage de l'application
 with open("../database/gene_names.txt", "r") as file:
@@ -42,11 +49,22 @@ options_dict = {
     "variation": (variation_options, "Enter a variation ID"),
 }
 
-StopKB_df = pd.read_csv("assets/StopKB.csv", sep="\t")
-StopKB_df.rename(columns={'Merged_Source': 'Source'}, inplace=True)
+store = VariantStore("assets/StopKB.csv")
+
+# Searches are answered by Neo4j, or by the local files with STOPKB_ENGINE=local
+if os.getenv('STOPKB_ENGINE', 'neo4j') == 'local':
+    from local_queries import LocalQueries
+    queries = LocalQueries(store)
+else:
+    import queries
+queries.warm_up()
 
 gene_domains = pd.read_csv("assets/flat_database/gene.csv", sep="\t")
 
+# The API looks diseases and phenotypes up by identifier, the searches by name
+disease_names = pd.read_csv("assets/flat_database/disease.csv", dtype=str).drop_duplicates('disorder_id').set_index('disorder_id')['name']
+phenotype_names = pd.read_csv("assets/flat_database/phenotype.csv", sep="\t", dtype=str).drop_duplicates('hpo_id').set_index('hpo_id')['hpo_name']
+
 def create_cyto_elements(graph):
     elements = []
 
@@ -139,15 +157,683 @@ def toggle_navbar_collapse(n, is_open):
     return is_open
 
 @app.callback(
-    [Output("search-dropdown", "options"), Output("search-dropdown", "placeholder"),Output("search-dropdown", "disabled")],
+    [Output("search-dropdown", "options"), Output("search-dropdown", "placeholder"),Output("search-dropdown", "disabled"),Output("batch-row", "style"),Output("batch-input", "placeholder")],
     [Input("category-dropdown", "value")],
 )
 def update_search_options(category):
         if category == "StopKB":
-            return [""], "", True
+            return [""], "", True, {"display": "none"}, dash.no_update
+        elif category == "batch":
+            # The list is typed or uploaded in the box below
+            return [""], "", True, {"margin-top": "2%"}, "One gene symbol or HGVSG per line"
+        elif category == "region":
+            return [""], "", True, {"margin-top": "2%"}, "One region per line, e.g. chr17:7,660,000-7,690,000"
         else:
             options, placeholder = options_dict.get(category, ([], ""))
-            return options, placeholder, False
+            return options, placeholder, False, {"display": "none"}, dash.no_update
+
+@app.callback(
+    Output("batch-input", "value"),
+    [Input("batch-upload", "contents")],
+    prevent_initial_call=True
+)
+def load_batch_file(contents):
+    # Uploaded files arrive as a data URL
+    return base64.b64decode(contents.split(",", 1)[1]).decode(errors="replace")
+
+
+# Columns of each search that are not shown in the variant table
+HIDDEN_TABLE_COLUMNS = {
+    "StopKB": ANNOTATION_COLUMNS,
+    "gene": ['symbol', 'prot_length', 'exon_counts', 'RefSeq_nuc', 'Ensembl_nuc', 'RefSeq_prot', 'Ensembl_prot'],
+    "disease": ['hpo_name', 'disorder_id', 'orpha_code', 'definition', 'prevalence_geo'],
+    "phenotype": ['disease', 'hpo_id', 'comment', 'definition'],
+    "batch": ANNOTATION_COLUMNS,
+    "region": ANNOTATION_COLUMNS,
+}
+
+# Searches answered by a set of rows of the variant store, saved with put_rows
+ROW_SET_CATEGORIES = ("batch", "region")
+
+def parse_identifiers(text):
+    # Gene symbols and HGVSG separated by new lines, spaces, commas or semicolons, each listed once in order
+    return list(dict.fromkeys(identifier for identifier in re.split(r"[\s,;]+", text or "") if identifier))
+
+def search_result(category, value):
+    # The result of a search is kept while it is cached, later searches of the same value (UI or API) reuse it
+    search_key = make_key('search', store.version, category, value)
+    result_key = result_cache.get(search_key)
+    df = get_result(result_key)
+    if df is None:
+        df = queries.search(category, value)
+        result_key = put_result(df)
+        result_cache.set(search_key, result_key, expire=CACHE_TTL)
+    return result_key, df
+
+# Masks of the last applied filters, for incremental filtering
+filter_masks = FilterMasks()
+
+def search_frame(table_query):
+    if table_query['category'] == "StopKB" or table_query['category'] in ROW_SET_CATEGORIES:
+        return store.df
+    df = get_result(table_query['data'])
+    if df is None:
+        # The result has left the cache (expired or evicted), the search is run again from the searched value
+        if table_query.get('value') is None:
+            raise dash.exceptions.PreventUpdate
+        result_key, df = search_result(table_query['category'], table_query['value'])
+        if result_key != table_query['data']:
+            # The database has changed since, the saved rows are not positions in this result anymore
+            table_query['data'] = result_key
+            table_query.pop('rows', None)
+            table_query.pop('filtered', None)
+    return df
+
+def filter_rows(table_query, df, previous_query=None):
+    # Positions of the rows kept by the filters last applied with the Apply Filter button
+    spec = FilterSpec.from_values(table_query.get('filters'))
+    columns, rows = store, None
+    if table_query['category'] in ROW_SET_CATEGORIES:
+        # The listed genes, variations or regions are kept as positions in the variant store, only their values are read
+        rows = get_rows(table_query['data'])
+        if rows is None:
+            raise dash.exceptions.PreventUpdate
+    elif table_query['category'] != "StopKB":
+        columns = FrameColumns(df)
+    if previous_query is None:
+        return spec.rows(columns, rows)
+    # Filters applied again on the same search: a tightened filter only removes rows from the previous result,
+    # otherwise the masks of the filters that did not change are reused
+    if all(previous_query.get(field) == table_query.get(field) for field in ('category', 'data', 'version')):
+        previous_spec = FilterSpec.from_values(previous_query.get('filters'))
+        previous_rows = get_rows(previous_query.get('filtered', previous_query.get('rows')))
+        if previous_rows is not None and spec.refines(previous_spec):
+            return spec.rows(columns, previous_rows, only=spec.changed(previous_spec))
+    return filter_masks.rows(spec, columns, (store.version, table_query['category'], table_query['data']), rows)
+
+def table_rows(table_query, df, rows):
+    if table_query['category'] in ("disease", "phenotype"):
+        # One line per variation, its diseases or phenotypes are listed in the other tabs
+        rows = rows[~df['HGVSG'].iloc[rows].duplicated().to_numpy()]
+    return rows
+
+def search_table(table_query):
+    # Rows and columns of the variant table, read back from the handle saved by filter_data while it is cached
+    df = search_frame(table_query)
+    rows = get_rows(table_query.get('rows'))
+    if rows is None:
+        rows = table_rows(table_query, df, filter_rows(table_query, df))
+    columns = [col for col in df.columns if col not in HIDDEN_TABLE_COLUMNS[table_query['category']]]
+    return df, rows, columns
+
+def table_page(df, rows, columns, page_current, page_size, sort_by):
+    # Only the sort keys are sorted, then the rows of the requested page are gathered.
+    # sort_by comes from the browser, the keys that are not visible columns of the table are ignored.
+    sort_by = list({col['column_id']: col for col in sort_by or [] if isinstance(col, dict) and col.get('column_id') in columns}.values())
+    if sort_by:
+        keys = df[[col['column_id'] for col in sort_by]].iloc[rows].reset_index(drop=True)
+        order = keys.sort_values(by=list(keys.columns), ascending=[col['direction'] == 'asc' for col in sort_by], kind='stable').index
+        rows = rows[order]
+    start = page_current * page_size
+    page_df = df.iloc[rows[start:start + page_size]][columns]
+    return page_df.to_dict("records"), max(1, math.ceil(len(rows) / page_size))
+
+def export_url(table_query, export_format="csv"):
+    return app.get_relative_path("/export/variants") + "?format=" + export_format + "&token=" + encode_token(table_query)
+
+def send_table(df, export_format):
+    # Downloads of the small frequency tables, built in one piece
+    if export_format == "csv":
+        return dcc.send_data_frame(df.to_csv, "data.csv")
+    filename, _, write = EXPORT_FORMATS[export_format]
+    return dcc.send_bytes(b"".join(write(df, np.arange(len(df)), list(df.columns))), filename)
+
+# Charts and tables of a set of rows of the variant store, all of them for the StopKB page
+def stopkb_landing(table_query, rows=None, title="List of nonsense variations in StopKB", missing=()):
+    #StopKB_df = driver.execute_query(f"MATCH (v:Variant) RETURN v.HGVSG as HGVSG, v.Merged_Source as Source, v.ClinicalSignificance as ClinicalSignificance, v.pos_stop_prot as pos_stop_prot, v.pos_relative_prot as pos_relative_prot, v.pos_var_cds as pos_var_cds, v.nuc_upstream as nuc_upstream, v.codon_stop as codon_stop, v.nuc_downstream as nuc_downstream, v.exon_localization as exon_localization, v.NMD_sensitivity as NMD_sensitivity, v.AF_ww as AF,v.AF_afr as AF_afr, v.AF_amr as AF_amr, v.AF_asj as AF_asj, v.AF_eas as AF_eas, v.AF_fin as AF_fin, v.AF_nfe as AF_nfe, v.AF_oth as AF_oth, v.Origin as Origin, v.ReviewStatus as ReviewStatus",database_="neo4j",result_transformer_=neo4j.Result.to_df)
+    StopKB_preview_df = store.frame(slice(0, 20), drop_annotations=True)
+    table_data, table_page_count = table_page(*search_table(table_query), 0, 20, [])
+    
+    
+    # nmd_fig_df = StopKB_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
+    # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
+
+    # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
+    #     title="NMD Sensitivity by Source",
+    #     labels={'Count':'Count', 'Source':'Source'},
+    #     color_discrete_sequence=px.colors.sequential.Plasma_r)
+    # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
+    
+    nmd_fig_df = store.value_counts('NMD_sensitivity', rows).reset_index()
+    nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
+    
+    pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
+
+    # Créer le graphique Pie Chart pour 'NMD_sensitivity'
+    fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity',
+        values='Count', 
+        title='Distribution of NMD sensitivity',
+        color_discrete_sequence=pie_colors)
+
+    # Mise à jour de la mise en page
+    fig_nmd.update_layout(legend_title='NMD Sensitivity',
+        font_family="system-ui",
+        title_x=0.5)
+    
+    
+    # Comptage par source à partir du masque binaire des sources
+    patho_fig_df = store.significance_by_source(rows)
+    
+    # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
+    colors_patho = {
+        'Benign': '#1CBE4F',
+        'Likely benign': '#16FF32',
+        'Uncertain significance': '#FBE426',
+        'Likely pathogenic': '#FEAF16',
+        'Pathogenic': '#F6222E'
+    }
+    # Création du graphique Plotly
+    fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
+                title='Clinical significance by Source',
+                barmode='stack',
+                color_discrete_map=colors_patho)
+
+    # Mise à jour de la mise en page
+    fig_patho.update_layout(xaxis_title='Source',
+                            yaxis_title='Number of Variations',
+                            legend_title='Clinical Significance',
+                            font_family="system-ui",
+                            title_x=0.5)
+    
+    
+    gene_counts = store.value_counts('symbol', rows)
+    top_genes_df = gene_counts.head(10).reset_index()
+    top_genes_df.columns = ['Gene', 'Count']
+    
+    genes_frequency_df = pd.DataFrame({'symbol': gene_counts.index,
+                               'Number of variations': gene_counts.values})
+
+    # Créer le graphique à barres
+    fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
+                title='Top genes',
+                labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
+    
+    fig_top_genes.update_layout(font_family="system-ui",
+                                title_x=0.5)
+    
+    all_disease_counts = store.diseases.value_counts(rows)
+    disease_counts = all_disease_counts.head(10)
+    
+    disease_frequency_df = pd.DataFrame({'disease_name': all_disease_counts.index,
+                               'Number of variations': all_disease_counts.values})
+
+    # Créer un DataFrame pour le graphique
+    top_diseases_df = disease_counts.reset_index()
+    top_diseases_df.columns = ['Disease', 'Count']
+
+    # Créer le graphique à barres
+    fig_top_diseases = px.bar(top_diseases_df, x='Disease', y='Count', color_discrete_sequence=['#FBE426'],
+                title='Top diseases',
+                labels={'Disease': 'Disease', 'Count': 'Number of variations'})
+    
+    fig_top_diseases.update_layout(font_family="system-ui",
+                                title_x=0.5,
+                                xaxis_tickangle=-15,
+                                xaxis_tickfont_size=12)
+    
+    all_phenotype_counts = store.phenotypes.value_counts(rows)
+    phenotype_counts = all_phenotype_counts.head(10)
+    
+    phenotype_frequency_df = pd.DataFrame({'phenotype_name': all_phenotype_counts.index,
+                               'Number of variations': all_phenotype_counts.values})
+
+    # Créer un DataFrame pour le graphique
+    top_phenotypes_df = phenotype_counts.reset_index()
+    top_phenotypes_df.columns = ['Phenotype', 'Count']
+
+    # Créer le graphique à barres
+    fig_top_phenotypes = px.bar(top_phenotypes_df, x='Phenotype', y='Count', color_discrete_sequence=['#FA0087'],
+                title='Top phenotypes',
+                labels={'Phenotype': 'Phenotype', 'Count': 'Number of variations'})
+    
+    fig_top_phenotypes.update_layout(font_family="system-ui",
+                                title_x=0.5,
+                                xaxis_tickangle=-15,
+                                xaxis_tickfont_size=12)
+    
+    
+    # fig_top_genes = px.bar(StopKB_df['symbol'].value_counts().iloc[:10], x=StopKB_df['symbol'].value_counts().iloc[:10].index, y=StopKB_df['Symbol'].value_counts().iloc[:10].values,              
+    #     title="Top 10 Genes",
+    #     labels={'x':'Gene Symbol', 'y':'Count'},
+    #     color_discrete_sequence=px.colors.sequential.Plasma_r)
+    
+    return html.Div([
+        dcc.Store(id='table-query', data=table_query),
+        #html.H2(f"{search_value}", style={"text-align": "center"}),
+        html.H2(title, style={
+        "text-align": "left", 
+        #"display": "inline-block", # Ceci permet au rectangle bleu de s'adapter à la taille du texte
+        "padding-bottom": "0px" # Ajustez cette valeur pour changer la distance entre le titre et la bordure
+        }),
+        *([html.P(f"Not found in StopKB: {', '.join(missing)}")] if missing else []),
+        html.Hr(),
+        dbc.Row([
+            dbc.Col([
+                dbc.Row(
+                    id="filter-row-source",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by Source:", style={"font-weight": "bold"}),
+                                dcc.Checklist(
+                                    id="source-checklist",
+                                    options=[
+                                        {'label': 'ClinVar', 'value': 'ClinVar'},
+                                        {'label': 'gnomAD', 'value': 'gnomAD'},
+                                        {'label': 'COSMIC', 'value': 'COSMIC'},
+                                    ],
+                                    value=['ClinVar', 'gnomAD', 'COSMIC'],
+                                    inline=True
+                                ),
+                            ],
+                            md=12
+                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-clinical-significance",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by ClinicalSignificance:", style={"font-weight": "bold"}),
+                                dcc.Checklist(
+                                    id="clinical-significance-checklist",
+                                    options=[
+                                        {"label": "Pathogenic", "value": "Pathogenic"},
+                                        {"label": "Likely pathogenic", "value": "Likely pathogenic"},
+                                        {"label": "Uncertain significance", "value": "Uncertain significance"},
+                                        {"label": "Likely benign", "value": "Likely benign"},
+                                        {"label": "Benign", "value": "Benign"}
+                                    ],
+                                    value=["Pathogenic","Likely pathogenic","Uncertain significance","Likely benign","Benign"],  # Par défaut, toutes les options sont sélectionnées
+                                    inline=False
+                                ),
+                            ],
+                            md=12
+                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-pos-stop-prot",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by absolute position of the stop codon in the protein:", style={"font-weight": "bold"}),
+                                dcc.Input(id='start-pos-stop-prot', type='number', debounce=True, placeholder='Start pos', min=0, value = 1, step=1),
+                                dcc.Input(id='end-pos-stop-prot', type='number', debounce=True, placeholder='End pos', min=0, step=1)
+                            ],
+                            md=12
+                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-pos-relative-prot",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by relative position of the stop codon in the protein:", style={"font-weight": "bold"}),
+                                dcc.Input(id='start-pos-relative-prot', type='number', debounce=True, placeholder='Start ratio', min=0, max=1, value=0, step=0.01),
+                                dcc.Input(id='end-pos-relative-prot', type='number', debounce=True, placeholder='End ratio', min=0, max=1,value=1, step=0.01)
+                            ],
+                            md=12
+                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-stop-codon",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by stop codon:", style={"font-weight": "bold"}),
+                                dcc.Checklist(
+                                    id="stop-codon-checklist",
+                                    options=[
+                                        {"label": "TGA", "value": "TGA"},
+                                        {"label": "TAG", "value": "TAG"},
+                                        {"label": "TAA", "value": "TAA"}
+                                    ],
+                                    value=["TGA", "TAG", "TAA"],
+                                    inline=False
+                                ),
+                            ],
+                            md=12
+                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-nmd-sensitivity",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by NMD sensitivity:", style={"font-weight": "bold"}),
+                                dcc.Checklist(
+                                    id="nmd-sensitivity-checklist",
+                                    options=[
+                                        {'label': 'Sensitive', 'value': 'sensitive'},
+                                        {'label': 'Insensitive', 'value': 'insensitive'}
+                                    ],
+                                    value=['sensitive', 'insensitive'],
+                                    inline=False
+                                ),
+                            ],
+                            md=12
+                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-af-worldwide",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by worldwide allele frequency:", style={"font-weight": "bold"}),
+                                dcc.Input(id='start-af-worldwide', type='number', debounce=True, placeholder='Min AF', min=0, max=1, step=1e-10),
+                                dcc.Input(id='end-af-worldwide', type='number', debounce=True, placeholder='Max AF', min=0, max=1, step=1e-10)
+                            ],
+                            md=12
+                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-overlapping-domain",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by overlapping domain:", style={"font-weight": "bold"}),
+                                dcc.Checklist(
+                                    id="overlapping-domain-checklist",
+                                    options=[
+                                        {'label': 'Overlapping', 'value': 'overlapping'},
+                                        {'label': 'Non-Overlapping', 'value': 'non-overlapping'}
+                                    ],
+                                    value=['overlapping', 'non-overlapping'],
+                                    inline=False
+                                ),
+                            ],
+                            md=12
+                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    dbc.Col(
+                        dbc.Button("Apply Filter", id="filter-button", color="primary"),
+                        width={"size": 6, "offset": 3},
+                    ),
+                    className="mb-3",
+                ),
+                # Filtrage à chaque modification des filtres, sans passer par le bouton
+                dbc.Row(
+                    dbc.Col(
+                        [
+                            dbc.Switch(id="live-filter", label="Live filtering", value=False),
+                            dcc.Store(id="live-filter-trigger"),
+                            dcc.Store(id="deferred-filter"),
+                        ],
+                        width={"size": 6, "offset": 3},
+                    ),
+                    className="mb-3",
+                ),
+                dbc.Row(
+                    id="filter-row-export-format",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Download format:", style={"font-weight": "bold"}),
+                                dcc.RadioItems(
+                                    id="export-format",
+                                    options=[
+                                        {'label': 'CSV', 'value': 'csv'},
+                                        {'label': 'Parquet', 'value': 'parquet'},
+                                        {'label': 'Arrow IPC', 'value': 'arrow'},
+                                    ],
+                                    value='csv',
+                                    inline=False
+                                ),
+                            ],
+                            md=12
+                        ),
+                    ],
+                    className="g-0",
+                ),
+            ], width=2),
+            dbc.Col([
+                dcc.Tabs([
+                    dcc.Tab(id='tab-variations',
+                        label=f"{store.nunique('HGVSG', rows)} variations",
+                        children=[
+                            dcc.Graph(
+                                id='patho-bar-chart',
+                                figure=fig_patho
+                            ),
+                            dcc.Graph(
+                                id='NMD-pie-chart',
+                                figure=fig_nmd
+                            ),
+                        ]),
+                    dcc.Tab(id='tab-genes',
+                        label=f"{store.nunique('symbol', rows)} genes", children=[
+                        dcc.Graph(
+                        id='top-genes-bar-chart',
+                        figure=fig_top_genes
+                        ),
+                        dash_table.DataTable(
+                                id='table-genes',
+                                data=genes_frequency_df.to_dict("records"),
+                                columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(genes_frequency_df[i]) else None} for i in genes_frequency_df.columns],
+                                style_cell={
+                                'whiteSpace': 'normal',
+                                'height': 'auto',
+                                'minWidth': 150,
+                                'font-family': 'system-ui',
+                                    },
+                                style_cell_conditional=[
+                                    {'if': {'column_id': c},
+                                    'textAlign': 'center'} for c in genes_frequency_df.columns],
+                                style_data_conditional=[
+                                    {
+                                        'if': {'row_index': 'odd'},
+                                        'backgroundColor': 'rgb(211, 211, 211)'
+                                    }
+                                ],
+                                style_header={
+                                    'whiteSpace': 'normal',
+                                    'height': 'auto',
+                                    'width': 'auto',
+                                    'backgroundColor': 'rgb(230, 230, 230)',
+                                    'fontWeight': 'bold',
+                                    'fontSize': '12px'
+                                },
+                                style_table={'overflowX': 'auto'},
+                                style_as_list_view=True,
+                                filter_action='none',
+                                filter_query='',
+                                sort_action='native',
+                                sort_mode='multi',
+                                page_action='native',
+                                page_current=0,
+                                page_size=20,
+                                fixed_rows={'headers': True},
+                                fixed_columns={'headers': True},
+                                export_format="none",
+                                export_headers="none",
+                            ),
+                        dcc.Graph(
+                        id='needle-plot',
+                        style={'display': 'none'}
+                        ),
+                        html.Button("Download", id="btn_csv_genes"),
+                        dcc.Download(id="download-dataframe-csv-genes"),
+                    ]),
+                    dcc.Tab(id='tab-diseases',
+                        label=f"{len(all_disease_counts)} diseases", children=[
+                        dcc.Graph(
+                        id='top-diseases-bar-chart',
+                        figure=fig_top_diseases
+                        ),
+                        dash_table.DataTable(
+                                id='table-diseases',
+                                data=disease_frequency_df.to_dict("records"),
+                                columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(disease_frequency_df[i]) else None} for i in disease_frequency_df.columns],
+                                style_cell={
+                                'whiteSpace': 'normal',
+                                'height': 'auto',
+                                'minWidth': 150,
+                                'font-family': 'system-ui',
+                                    },
+                                style_cell_conditional=[
+                                    {'if': {'column_id': c},
+                                    'textAlign': 'center'} for c in disease_frequency_df.columns],
+                                style_data_conditional=[
+                                    {
+                                        'if': {'row_index': 'odd'},
+                                        'backgroundColor': 'rgb(211, 211, 211)'
+                                    }
+                                ],
+                                style_header={
+                                    'whiteSpace': 'normal',
+                                    'height': 'auto',
+                                    'width': 'auto',
+                                    'backgroundColor': 'rgb(230, 230, 230)',
+                                    'fontWeight': 'bold',
+                                    'fontSize': '12px'
+                                },
+                                style_table={'overflowX': 'auto'},
+                                style_as_list_view=True,
+                                filter_action='none',
+                                filter_query='',
+                                sort_action='native',
+                                sort_mode='multi',
+                                page_action='native',
+                                page_current=0,
+                                page_size=20,
+                                fixed_rows={'headers': True},
+                                fixed_columns={'headers': True},
+                                export_format="none",
+                                export_headers="none",
+                            ),
+                        html.Button("Download", id="btn_csv_diseases"),
+                        dcc.Download(id="download-dataframe-csv-diseases")
+                    ]),
+                    dcc.Tab(id='tab-phenotypes',
+                        label=f"{len(all_phenotype_counts)} phenotypes", children=[
+                        dcc.Graph(
+                        id='top-phenotypes-bar-chart',
+                        figure=fig_top_phenotypes
+                        ),
+                        dash_table.DataTable(
+                                id='table-phenotypes',
+                                data=phenotype_frequency_df.to_dict("records"),
+                                columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(phenotype_frequency_df[i]) else None} for i in phenotype_frequency_df.columns],
+                                style_cell={
+                                'whiteSpace': 'normal',
+                                'height': 'auto',
+                                'minWidth': 150,
+                                'font-family': 'system-ui',
+                                    },
+                                style_cell_conditional=[
+                                    {'if': {'column_id': c},
+                                    'textAlign': 'center'} for c in phenotype_frequency_df.columns],
+                                style_data_conditional=[
+                                    {
+                                        'if': {'row_index': 'odd'},
+                                        'backgroundColor': 'rgb(211, 211, 211)'
+                                    }
+                                ],
+                                style_header={
+                                    'whiteSpace': 'normal',
+                                    'height': 'auto',
+                                    'width': 'auto',
+                                    'backgroundColor': 'rgb(230, 230, 230)',
+                                    'fontWeight': 'bold',
+                                    'fontSize': '12px'
+                                },
+                                style_table={'overflowX': 'auto'},
+                                style_as_list_view=True,
+                                filter_action='none',
+                                filter_query='',
+                                sort_action='native',
+                                sort_mode='multi',
+                                page_action='native',
+                                page_current=0,
+                                page_size=20,
+                                fixed_rows={'headers': True},
+                                fixed_columns={'headers': True},
+                                export_format="none",
+                                export_headers="none",
+                        ),
+                        html.Button("Download", id="btn_csv_phenotypes"),
+                        dcc.Download(id="download-dataframe-csv-phenotypes")
+                    ]),
+                    dcc.Tab(label='Table', children=[
+                        dash_table.DataTable(
+                            id='table-prefiltered',
+                            data=table_data,
+                            columns=[{"name": i, "id": i, 'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(StopKB_preview_df[i]) else None} for i in StopKB_preview_df.columns],
+                            style_cell={
+                            'whiteSpace': 'normal',
+                            'height': 'auto',
+                            'minWidth': 150,
+                            'font-family': 'system-ui',
+                                },
+                            style_cell_conditional=[
+                                {'if': {'column_id': c},
+                                'textAlign': 'center'} for c in StopKB_preview_df.columns],
+                            style_data_conditional=[
+                                {
+                                    'if': {'row_index': 'odd'},
+                                    'backgroundColor': 'rgb(211, 211, 211)'
+                                }
+                            ],
+                            style_header={
+                                'whiteSpace': 'normal',
+                                'height': 'auto',
+                                'width': 'auto',
+                                'backgroundColor': 'rgb(230, 230, 230)',
+                                'fontWeight': 'bold',
+                                'fontSize': '12px'
+                            },
+                            style_table={'overflowX': 'auto'},
+                            style_as_list_view=True,
+                            filter_action='none',
+                            filter_query='',
+                            sort_action='custom',
+                            sort_mode='multi',
+                            page_action='custom',
+                            page_count=table_page_count,
+                            page_current=0,
+                            page_size=20,
+                            fixed_rows={'headers': True},
+                            fixed_columns={'headers': True},
+                            export_format="none",
+                            export_headers="none",
+                        ),
+                        html.H6("This table is a preview. Please click the button below to download all the data.", style={"font-weight": "bold"}),
+                        html.A(html.Button("Download"), id="download-link", href=export_url(table_query), download="data.csv.gz"),
+                    ])
+                ])
+            ], width=10),
+        ]),
+    ])
+
+# The StopKB page only depends on the data file, it is built once and shared by every user
+StopKB_landing = cached(aggregate_cache, make_key('stopkb_landing', store.version), lambda: stopkb_landing({'category': "StopKB"}))
 
 
 @app.callback(
@@ -155,18 +841,56 @@ def update_search_options(category):
     [Output("loading-output", "children"),
      Output("stored-df","data")],
     [Input("search-button", "n_clicks")],
-    [State("category-dropdown", "value"), State("search-dropdown", "value")],
+    [State("category-dropdown", "value"), State("search-dropdown", "value"), State("batch-input", "value")],
 )
-def execute_search(n_clicks, category, search_value):
-    if n_clicks > 0 and (search_value is not None or category == "StopKB"):
+def execute_search(n_clicks, category, search_value, batch_value):
+    # Phenotype searches can return large results, they run as background jobs (see execute_background_search)
+    if n_clicks > 0 and category != "phenotype" and (search_value is not None or category == "StopKB" or category in ROW_SET_CATEGORIES):
         # Choose the query based on the category
         if category == "StopKB":
-            #StopKB_df = driver.execute_query(f"MATCH (v:Variant) RETURN v.HGVSG as HGVSG, v.Merged_Source as Source, v.ClinicalSignificance as ClinicalSignificance, v.pos_stop_prot as pos_stop_prot, v.pos_relative_prot as pos_relative_prot, v.pos_var_cds as pos_var_cds, v.nuc_upstream as nuc_upstream, v.codon_stop as codon_stop, v.nuc_downstream as nuc_downstream, v.exon_localization as exon_localization, v.NMD_sensitivity as NMD_sensitivity, v.AF_ww as AF,v.AF_afr as AF_afr, v.AF_amr as AF_amr, v.AF_asj as AF_asj, v.AF_eas as AF_eas, v.AF_fin as AF_fin, v.AF_nfe as AF_nfe, v.AF_oth as AF_oth, v.Origin as Origin, v.ReviewStatus as ReviewStatus",database_="neo4j",result_transformer_=neo4j.Result.to_df)
-            StopKB_preview_df = StopKB_df.iloc[:1000]
+            return StopKB_landing, dash.no_update
+
+        elif category == "batch":
+            identifiers = parse_identifiers(batch_value)
+            if not identifiers:
+                raise dash.exceptions.PreventUpdate
+            # All the genes and variations of the list are looked up at once in the variant store
+            rows, missing = store.batch_rows(identifiers)
+            rows_key = put_rows(rows)
+            title = f"Nonsense variations of {len(identifiers) - len(missing)} listed genes and variations"
+            return stopkb_landing({'category': "batch", 'data': rows_key}, rows, title, missing), rows_key
+
+        elif category == "region":
+            # One region per line, answered by the interval index of the variant store
+            lines = [line.strip() for line in (batch_value or "").splitlines() if line.strip()]
+            regions = [parse_region(line) for line in lines]
+            if not any(regions):
+                raise dash.exceptions.PreventUpdate
+            rows = store.region_rows([region for region in regions if region])
+            rows_key = put_rows(rows)
+            title = f"Nonsense variations in {sum(1 for region in regions if region)} genomic regions"
+            invalid = [line for line, region in zip(lines, regions) if region is None]
+            return stopkb_landing({'category': "region", 'data': rows_key}, rows, title, invalid), rows_key
+            
+        elif category == "gene":
+            result_key, gene_df = search_result("gene", search_value)
+            table_query = {'category': "gene", 'data': result_key, 'value': search_value}
+            table_data, table_page_count = table_page(*search_table(table_query), 0, 20, [])
+            prot_length = gene_df['prot_length'].iloc[0]
+            exon_counts = gene_df['exon_counts'].iloc[0]
+            RefSeq_nuc = gene_df['RefSeq_nuc'].iloc[0]
+            Ensembl_nuc = gene_df['Ensembl_nuc'].iloc[0]
+            RefSeq_prot = gene_df['RefSeq_prot'].iloc[0]
+            Ensembl_prot = gene_df['Ensembl_prot'].iloc[0]
+            gene_needle_df = pd.merge(gene_df.drop_duplicates(subset=['symbol']), gene_domains, how='left', on='symbol')
+            gene_df = gene_df.drop(['prot_length', 'exon_counts', 'RefSeq_nuc', 'Ensembl_nuc', 'RefSeq_prot', 'Ensembl_prot'], axis=1)
+            #gene_datatable = create_datatable(gene_df)
+            # gene_graph = driver.execute_query(f"MATCH (p:Phenotype)-[r:RECOGNIZABLE_BY]-(d:Disease)-[c:CAUSED_BY]-(g:Gene)-[l:LOCATED_ON]-(v:Variant) WHERE g.Symbol = '{search_value}' RETURN p, r, d, g, l, v",database_="neo4j",result_transformer_=neo4j.Result.graph)
+            # gene_cyto = create_cyto_elements(gene_graph)
             
+            # nmd_fig_df = gene_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
+            # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False) 
             
-            # nmd_fig_df = StopKB_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
-            # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
 
             # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
             #     title="NMD Sensitivity by Source",
@@ -174,7 +898,32 @@ def execute_search(n_clicks, category, search_value):
             #     color_discrete_sequence=px.colors.sequential.Plasma_r)
             # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
             
-            nmd_fig_df = StopKB_df['NMD_sensitivity'].value_counts().reset_index()
+            # filtered_data = gene_df.dropna(subset=['ClinicalSignificance', 'Source'])
+
+            # # Create a DataFrame for the count of each ClinicalSignificance by Source
+            # clinical_significance_counts = filtered_data.groupby(['Source', 'ClinicalSignificance']).size().unstack(fill_value=0)
+            # clinical_significance_counts_reset = clinical_significance_counts.reset_index()
+            # clinical_significance_counts_melted = clinical_significance_counts_reset.melt(id_vars='Source', 
+            #                                                                   var_name='ClinicalSignificance', 
+            #                                                                   value_name='Count')
+
+            # # Creating a stacked bar chart using Plotly
+            # fig_patho = px.bar(clinical_significance_counts_melted, 
+            #     x="ClinicalSignificance", 
+            #     y="Count", 
+            #     color="Source",
+            #     barmode='stack',
+            #     labels={'ClinicalSignificance': 'Signification Clinique', 'Source': 'Source des Données', 'Count': 'Nombre de Variantes'})
+
+            # fig_patho.update_layout(title='Répartition des Variantes selon la Classification Clinique et la Source avec Plotly',
+            #     xaxis_title='Signification Clinique',
+            #     yaxis_title='Nombre de Variantes')
+            
+            # #top_disease_df =
+            
+            gene_rows = store.gene_slice(search_value)
+            
+            nmd_fig_df = store.value_counts('NMD_sensitivity', gene_rows).reset_index()
             nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
             
             pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
@@ -191,22 +940,8 @@ def execute_search(n_clicks, category, search_value):
                 title_x=0.5)
             
             
-            patho_fig_expanded_sources_df = StopKB_df['Source'].str.get_dummies(sep=';')
-
-            # Fusion des sources étendues avec le dataframe original
-            patho_fig_with_sources_df = pd.concat([StopKB_df, patho_fig_expanded_sources_df], axis=1)
-
-            # Transformation du dataframe en format long pour Plotly
-            patho_fig_melted_df = patho_fig_with_sources_df.melt(id_vars='ClinicalSignificance', 
-                                            value_vars=patho_fig_expanded_sources_df.columns, 
-                                            var_name='Source', value_name='Count')
-
-            # Filtrage des lignes avec un comptage zéro
-            patho_fig_melted_df = patho_fig_melted_df[patho_fig_melted_df['Count'] > 0]
-
-            # Regroupement par Source et ClinicalSignificance et somme des comptages
-            patho_fig_df = patho_fig_melted_df.groupby(['Source', 'ClinicalSignificance']).sum().reset_index()
-            patho_fig_df = patho_fig_df.sort_values(by=['Count'], ascending=False)
+            # Comptage par source à partir du masque binaire des sources
+            patho_fig_df = store.significance_by_source(gene_rows)
             
             # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
             colors_patho = {
@@ -230,25 +965,8 @@ def execute_search(n_clicks, category, search_value):
                                     title_x=0.5)
             
             
-            top_genes_df = StopKB_df['symbol'].value_counts().head(10).reset_index()
-            top_genes_df.columns = ['Gene', 'Count']
-            
-            genes_frequency_df = pd.DataFrame({'symbol': StopKB_df['symbol'].value_counts().index,
-                                       'Number of variations': StopKB_df['symbol'].value_counts().values})
-
-            # Créer le graphique à barres
-            fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
-                        title='Top genes',
-                        labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
-            
-            fig_top_genes.update_layout(font_family="system-ui",
-                                        title_x=0.5)
-            
-            exploded_diseases = StopKB_df['disease_name'].str.split('; ').explode()
-            disease_counts = exploded_diseases.value_counts().head(10)
-            
-            disease_frequency_df = pd.DataFrame({'disease_name': exploded_diseases.value_counts().index,
-                                       'Number of variations': exploded_diseases.value_counts().values})
+            all_disease_counts = store.diseases.value_counts(gene_rows)
+            disease_counts = all_disease_counts.head(10)
 
             # Créer un DataFrame pour le graphique
             top_diseases_df = disease_counts.reset_index()
@@ -264,35 +982,90 @@ def execute_search(n_clicks, category, search_value):
                                         xaxis_tickangle=-15,
                                         xaxis_tickfont_size=12)
             
-            exploded_phenotypes = StopKB_df['phenotype_name'].str.split('; ').explode()
-            phenotype_counts = exploded_phenotypes.value_counts().head(10)
+            disease_frequency_df = pd.DataFrame({'disease_name': all_disease_counts.index,
+                                       'Number of variations': all_disease_counts.values})
             
-            phenotype_frequency_df = pd.DataFrame({'phenotype_name': exploded_phenotypes.value_counts().index,
-                                       'Number of variations': exploded_phenotypes.value_counts().values})
+            all_phenotype_counts = store.phenotypes.value_counts(gene_rows)
+            phenotype_counts = all_phenotype_counts.head(10)
 
             # Créer un DataFrame pour le graphique
-            top_phenotypes_df = phenotype_counts.reset_index()
-            top_phenotypes_df.columns = ['Phenotype', 'Count']
+            # top_phenotypes_df = phenotype_counts.reset_index()
+            # top_phenotypes_df.columns = ['Phenotype', 'Count']
 
-            # Créer le graphique à barres
-            fig_top_phenotypes = px.bar(top_phenotypes_df, x='Phenotype', y='Count', color_discrete_sequence=['#FA0087'],
-                        title='Top phenotypes',
-                        labels={'Phenotype': 'Phenotype', 'Count': 'Number of variations'})
+            # # Créer le graphique à barres
+            # fig_top_phenotypes = px.bar(top_phenotypes_df, x='Phenotype', y='Count', color_discrete_sequence=['#FA0087'],
+            #             title='Top phenotypes',
+            #             labels={'Phenotype': 'Phenotype', 'Count': 'Number of variations'})
             
-            fig_top_phenotypes.update_layout(font_family="system-ui",
-                                        title_x=0.5,
-                                        xaxis_tickangle=-15,
-                                        xaxis_tickfont_size=12)
+            # fig_top_phenotypes.update_layout(font_family="system-ui",
+            #                             title_x=0.5,
+            #                             xaxis_tickangle=-15,
+            #                             xaxis_tickfont_size=12)
             
+            phenotype_frequency_df = pd.DataFrame({'phenotype_name': all_phenotype_counts.index,
+                                       'Number of variations': all_phenotype_counts.values})
             
-            # fig_top_genes = px.bar(StopKB_df['symbol'].value_counts().iloc[:10], x=StopKB_df['symbol'].value_counts().iloc[:10].index, y=StopKB_df['Symbol'].value_counts().iloc[:10].values,              
-            #     title="Top 10 Genes",
-            #     labels={'x':'Gene Symbol', 'y':'Count'},
-            #     color_discrete_sequence=px.colors.sequential.Plasma_r)
+            domain_data = []
+            # Itération sur chaque colonne de domaine dans gene_df
+            for col in gene_needle_df.filter(like='domain_'):
+                for domain_str in gene_needle_df[col].dropna():
+                    # Séparation de la chaîne en prenant en compte le dernier ';' comme séparateur
+                    *name_parts, start, end = domain_str.rsplit(';', 2)
+                    name = ';'.join(name_parts)  # Reconstruction du nom si nécessaire
+                    if len(name) > 20:
+                        name = name[:20] + '...'
+                    coord = f"{start}-{end}"
+                    domain_data.append({'name': name, 'coord': coord})
+                    
+            mutation_data = {
+                'x': gene_df.astype({'pos_stop_prot':'string'})['pos_stop_prot'].tolist(),
+                'y': ["1"] * len(gene_df),  
+                'mutationGroups': gene_df['ClinicalSignificance'].tolist(),
+                'domains': domain_data, 
+            }
+            
+            colors_map = {
+                'Benign': '#1CBE4F',
+                'Likely benign': '#16FF32',
+                'Uncertain significance': '#FBE426',
+                'Likely pathogenic': '#FEAF16',
+                'Pathogenic': '#F6222E'
+            }
+                        
+            unique_categories = list(dict.fromkeys(mutation_data['mutationGroups']))
+
+            unique_colors = [colors_map.get(category, "default_color") for category in unique_categories]
+
             
             return html.Div([
+                dcc.Store(id='table-query', data=table_query),
                 #html.H2(f"{search_value}", style={"text-align": "center"}),
-                html.H2(f"List of nonsense variations in StopKB", style={
+                dbc.Card(
+                        [
+                            dbc.CardHeader(f"{search_value}", style={"text-align": "center","font-size": "larger", "font-weight": "bold"}),
+                            dbc.CardBody(
+                                [
+                                    dbc.Row(
+                                        [
+                                            dbc.Col(html.P(f"Protein length: {prot_length} AA"), md=2),
+                                            dbc.Col(html.P(f"Exon count: {exon_counts}"), md=2),
+                                            dbc.Col(html.P(f"RefSeq transcript ID: {RefSeq_nuc}"), md=2),
+                                            dbc.Col(html.P(f"Ensembl transcript ID: {Ensembl_nuc}"), md=2),
+                                            dbc.Col(html.P(f"RefSeq protein ID: {RefSeq_prot}"), md=2),
+                                            dbc.Col(html.P(f"Ensembl protein ID: {Ensembl_prot}"), md=2),
+                                        ],
+                                        align="start",
+                                    ),
+                                ],
+                                style={"height": "100%", "overflow": "auto", "background-color": "rgba(54, 155, 232, 0.3)"},
+                            ),
+                            dbc.CardFooter(
+                                dbc.Button("More infos on GeneCards", href=f"https://www.genecards.org/cgi-bin/carddisp.pl?gene={search_value}", target="_blank", color="primary", className="btn-sm ml-auto", style={"float": "right"}),
+                            ),
+                        ],
+                        style={"margin-bottom": "2%", "overflow": "auto"},
+                    ),
+                html.H2(f"List of nonsense variations associated to {search_value}", style={
                 "text-align": "left", 
                 #"display": "inline-block", # Ceci permet au rectangle bleu de s'adapter à la taille du texte
                 "padding-bottom": "0px" # Ajustez cette valeur pour changer la distance entre le titre et la bordure
@@ -338,7 +1111,7 @@ def execute_search(n_clicks, category, search_value):
                                                 {"label": "Benign", "value": "Benign"}
                                             ],
                                             value=["Pathogenic","Likely pathogenic","Uncertain significance","Likely benign","Benign"],  # Par défaut, toutes les options sont sélectionnées
-                                            inline=False
+                                            inline=True
                                         ),
                                     ],
                                     md=12
@@ -352,8 +1125,8 @@ def execute_search(n_clicks, category, search_value):
                                 dbc.Col(
                                     [
                                         html.Label("Filter by absolute position of the stop codon in the protein:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-pos-stop-prot', type='number', placeholder='Start pos', min=0, value = 1, step=1),
-                                        dcc.Input(id='end-pos-stop-prot', type='number', placeholder='End pos', min=0, step=1)
+                                        dcc.Input(id='start-pos-stop-prot', type='number', debounce=True, placeholder='Start pos', min=0, value = 1, step=1),
+                                        dcc.Input(id='end-pos-stop-prot', type='number', debounce=True, placeholder='End pos', min=0, step=1)
                                     ],
                                     md=12
                                 ),
@@ -366,8 +1139,8 @@ def execute_search(n_clicks, category, search_value):
                                 dbc.Col(
                                     [
                                         html.Label("Filter by relative position of the stop codon in the protein:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-pos-relative-prot', type='number', placeholder='Start ratio', min=0, max=1, value=0, step=0.01),
-                                        dcc.Input(id='end-pos-relative-prot', type='number', placeholder='End ratio', min=0, max=1,value=1, step=0.01)
+                                        dcc.Input(id='start-pos-relative-prot', type='number', debounce=True, placeholder='Start ratio', min=0, max=1,value=0, step=0.01),
+                                        dcc.Input(id='end-pos-relative-prot', type='number', debounce=True, placeholder='End ratio', min=0, max=1, step=0.01)
                                     ],
                                     md=12
                                 ),
@@ -388,7 +1161,7 @@ def execute_search(n_clicks, category, search_value):
                                                 {"label": "TAA", "value": "TAA"}
                                             ],
                                             value=["TGA", "TAG", "TAA"],
-                                            inline=False
+                                            inline=True
                                         ),
                                     ],
                                     md=12
@@ -409,7 +1182,7 @@ def execute_search(n_clicks, category, search_value):
                                                 {'label': 'Insensitive', 'value': 'insensitive'}
                                             ],
                                             value=['sensitive', 'insensitive'],
-                                            inline=False
+                                            inline=True
                                         ),
                                     ],
                                     md=12
@@ -423,8 +1196,8 @@ def execute_search(n_clicks, category, search_value):
                                 dbc.Col(
                                     [
                                         html.Label("Filter by worldwide allele frequency:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-af-worldwide', type='number', placeholder='Min AF', min=0, max=1, step=1e-10),
-                                        dcc.Input(id='end-af-worldwide', type='number', placeholder='Max AF', min=0, max=1, step=1e-10)
+                                        dcc.Input(id='start-af-worldwide', type='number', debounce=True, placeholder='Min AF', min=0, max=1, step=1e-10),
+                                        dcc.Input(id='end-af-worldwide', type='number', debounce=True, placeholder='Max AF', min=0, max=1, step=1e-10)
                                     ],
                                     md=12
                                 ),
@@ -444,7 +1217,7 @@ def execute_search(n_clicks, category, search_value):
                                                 {'label': 'Non-Overlapping', 'value': 'non-overlapping'}
                                             ],
                                             value=['overlapping', 'non-overlapping'],
-                                            inline=False
+                                            inline=True
                                         ),
                                     ],
                                     md=12
@@ -459,11 +1232,45 @@ def execute_search(n_clicks, category, search_value):
                             ),
                             className="mb-3",
                         ),
+                        # Filtrage à chaque modification des filtres, sans passer par le bouton
+                        dbc.Row(
+                            dbc.Col(
+                                [
+                                    dbc.Switch(id="live-filter", label="Live filtering", value=False),
+                                    dcc.Store(id="live-filter-trigger"),
+                                    dcc.Store(id="deferred-filter"),
+                                ],
+                                width={"size": 6, "offset": 3},
+                            ),
+                            className="mb-3",
+                        ),
+                        dbc.Row(
+                            id="filter-row-export-format",
+                            children=[
+                                dbc.Col(
+                                    [
+                                        html.Label("Download format:", style={"font-weight": "bold"}),
+                                        dcc.RadioItems(
+                                            id="export-format",
+                                            options=[
+                                                {'label': 'CSV', 'value': 'csv'},
+                                                {'label': 'Parquet', 'value': 'parquet'},
+                                                {'label': 'Arrow IPC', 'value': 'arrow'},
+                                            ],
+                                            value='csv',
+                                            inline=False
+                                        ),
+                                    ],
+                                    md=12
+                                ),
+                            ],
+                            className="g-0",
+                        ),
                     ], width=2),
                     dbc.Col([
                         dcc.Tabs([
                             dcc.Tab(id='tab-variations',
-                                label=f"{StopKB_df['HGVSG'].nunique()} variations",
+                                label=f"{store.nunique('HGVSG', gene_rows)} variations",
                                 children=[
                                     dcc.Graph(
                                         id='patho-bar-chart',
@@ -474,67 +1281,39 @@ def execute_search(n_clicks, category, search_value):
                                         figure=fig_nmd
                                     ),
                                 ]),
-                            dcc.Tab(id='tab-genes',
-                                label=f"{StopKB_df['symbol'].nunique()} genes", children=[
-                                dcc.Graph(
-                                id='top-genes-bar-chart',
-                                figure=fig_top_genes
-                                ),
-                                dash_table.DataTable(
-                                        id='table-genes',
-                                        data=genes_frequency_df.to_dict("records"),
-                                        columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(genes_frequency_df[i]) else None} for i in genes_frequency_df.columns],
-                                        style_cell={
-                                        'whiteSpace': 'normal',
-                                        'height': 'auto',
-                                        'minWidth': 150,
-                                        'font-family': 'system-ui',
+                            dcc.Tab(id='tab-genes', label='Protein mapping', children=[
+                                dbc.Row(
+                                    dbc.Col(
+                                        dashbio.NeedlePlot(
+                                            id='needle-plot',
+                                            mutationData=mutation_data,
+                                            needleStyle={
+                                                'headSize': 10,
+                                                'headColor': unique_colors
                                             },
-                                        style_cell_conditional=[
-                                            {'if': {'column_id': c},
-                                            'textAlign': 'center'} for c in genes_frequency_df.columns],
-                                        style_data_conditional=[
-                                            {
-                                                'if': {'row_index': 'odd'},
-                                                'backgroundColor': 'rgb(211, 211, 211)'
-                                            }
-                                        ],
-                                        style_header={
-                                            'whiteSpace': 'normal',
-                                            'height': 'auto',
-                                            'width': 'auto',
-                                            'backgroundColor': 'rgb(230, 230, 230)',
-                                            'fontWeight': 'bold',
-                                            'fontSize': '12px'
-                                        },
-                                        style_table={'overflowX': 'auto'},
-                                        style_as_list_view=True,
-                                        filter_action='none',
-                                        filter_query='',
-                                        sort_action='native',
-                                        sort_mode='multi',
-                                        page_action='native',
-                                        page_current=0,
-                                        page_size=20,
-                                        fixed_rows={'headers': True},
-                                        fixed_columns={'headers': True},
-                                        export_format="none",
-                                        export_headers="none",
+                                            height=500,
+                                        ),
+                                        #width=12,
+                                        #style={'width': '100%', 'height': '100%'}
                                     ),
-                                dcc.Graph(
-                                id='needle-plot',
-                                style={'display': 'none'}
                                 ),
-                                html.Button("Download CSV", id="btn_csv_genes"),
-                                dcc.Download(id="download-dataframe-csv-genes"),
-                            ]),
-                            dcc.Tab(id='tab-diseases',
-                                label=f"{exploded_diseases.nunique()} diseases", children=[
                                 dcc.Graph(
-                                id='top-diseases-bar-chart',
-                                figure=fig_top_diseases
+                                    id='top-genes-bar-chart',
+                                    style={'display': 'none'}
                                 ),
                                 dash_table.DataTable(
+                                        id='table-genes',
+                                        style_table={'display': 'none'}
+                                    ),
+                            ]),
+                            dcc.Tab(id='tab-diseases',
+                                label=f"{len(all_disease_counts)} diseases",
+                                children=[
+                                    dcc.Graph(
+                                        id='top-diseases-bar-chart',
+                                        figure=fig_top_diseases
+                                        ),
+                                    dash_table.DataTable(
                                         id='table-diseases',
                                         data=disease_frequency_df.to_dict("records"),
                                         columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(disease_frequency_df[i]) else None} for i in disease_frequency_df.columns],
@@ -575,16 +1354,17 @@ def execute_search(n_clicks, category, search_value):
                                         export_format="none",
                                         export_headers="none",
                                     ),
-                                html.Button("Download CSV", id="btn_csv_diseases"),
-                                dcc.Download(id="download-dataframe-csv-diseases")
-                            ]),
+                                    html.Button("Download", id="btn_csv_diseases"),
+                                    dcc.Download(id="download-dataframe-csv-diseases"),
+                                ]),
                             dcc.Tab(id='tab-phenotypes',
-                                label=f"{exploded_phenotypes.nunique()} phenotypes", children=[
-                                dcc.Graph(
-                                id='top-phenotypes-bar-chart',
-                                figure=fig_top_phenotypes
-                                ),
-                                dash_table.DataTable(
+                                label=f"{len(all_phenotype_counts)} phenotypes",
+                                children=[
+                                    dcc.Graph(
+                                        id='top-phenotypes-bar-chart',
+                                        style={'display': 'none'}
+                                    ),
+                                    dash_table.DataTable(
                                         id='table-phenotypes',
                                         data=phenotype_frequency_df.to_dict("records"),
                                         columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(phenotype_frequency_df[i]) else None} for i in phenotype_frequency_df.columns],
@@ -624,15 +1404,15 @@ def execute_search(n_clicks, category, search_value):
                                         fixed_columns={'headers': True},
                                         export_format="none",
                                         export_headers="none",
-                                ),
-                                html.Button("Download CSV", id="btn_csv_phenotypes"),
-                                dcc.Download(id="download-dataframe-csv-phenotypes")
-                            ]),
+                                    ),
+                                    html.Button("Download", id="btn_csv_phenotypes"),
+                                    dcc.Download(id="download-dataframe-csv-phenotypes")
+                                ]),
                             dcc.Tab(label='Table', children=[
                                 dash_table.DataTable(
                                     id='table-prefiltered',
-                                    data=StopKB_preview_df.drop(columns=['Cytogenetic','RefSeq_nuc','Ensembl_nuc','RefSeq_prot','Ensembl_prot','uniprot_id','prot_length','exon_counts','disorder_id','name','orpha_code','definition','prevalence_geo','hpo_id','hpo_name','comment','definition_x','disease_name','phenotype_name']).to_dict("records"),
-                                    columns=[{"name": i, "id": i, 'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(StopKB_preview_df[i]) else None} for i in StopKB_preview_df.drop(columns=['Cytogenetic','RefSeq_nuc','Ensembl_nuc','RefSeq_prot','Ensembl_prot','uniprot_id','prot_length','exon_counts','disorder_id','name','orpha_code','definition','prevalence_geo','hpo_id','hpo_name','comment','definition_x','disease_name','phenotype_name']).columns],
+                                    data=table_data,
+                                    columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(gene_df.drop(columns=['symbol'])[i]) else None} for i in gene_df.drop(columns=['symbol']).columns],
                                     style_cell={
                                     'whiteSpace': 'normal',
                                     'height': 'auto',
@@ -641,7 +1421,7 @@ def execute_search(n_clicks, category, search_value):
                                         },
                                     style_cell_conditional=[
                                         {'if': {'column_id': c},
-                                        'textAlign': 'center'} for c in StopKB_preview_df.drop(columns=['Cytogenetic','RefSeq_nuc','Ensembl_nuc','RefSeq_prot','Ensembl_prot','uniprot_id','prot_length','exon_counts','disorder_id','name','orpha_code','definition','prevalence_geo','hpo_id','hpo_name','comment','definition_x','disease_name','phenotype_name']).columns],
+                                        'textAlign': 'center'} for c in gene_df.drop(columns=['symbol']).columns],
                                     style_data_conditional=[
                                         {
                                             'if': {'row_index': 'odd'},
@@ -660,9 +1440,10 @@ def execute_search(n_clicks, category, search_value):
                                     style_as_list_view=True,
                                     filter_action='none',
                                     filter_query='',
-                                    sort_action='native',
+                                    sort_action='custom',
                                     sort_mode='multi',
-                                    page_action='native',
+                                    page_action='custom',
+                                    page_count=table_page_count,
                                     page_current=0,
                                     page_size=20,
                                     fixed_rows={'headers': True},
@@ -670,33 +1451,30 @@ def execute_search(n_clicks, category, search_value):
                                     export_format="none",
                                     export_headers="none",
                                 ),
-                                html.H6("This table is a preview. Please click the button below to download all the data.", style={"font-weight": "bold"}),
-                                html.Button("Download CSV", id="btn_csv"),
-                                dcc.Download(id="download-dataframe-csv"),
+                                html.A(html.Button("Download"), id="download-link", href=export_url(table_query), download="data.csv.gz"),
                             ])
                         ])
                     ], width=10),
                 ]),
-            ]),dash.no_update
-            
-            
-        elif category == "gene":
-            gene_df = driver.execute_query(f"MATCH (v:Variant)-[LOCATED_ON]-(g:Gene) WHERE g.Symbol = '{search_value}' RETURN g.Symbol as symbol, g.RefSeq_nuc as RefSeq_nuc, g.Ensembl_nuc as Ensembl_nuc, g.RefSeq_prot as RefSeq_prot, g.Ensembl_prot as Ensembl_prot, g.prot_length as prot_length, g.exon_counts as exon_counts, v.HGVSG as HGVSG, v.Merged_Source as Source, v.ClinicalSignificance as ClinicalSignificance, v.pos_stop_prot as pos_stop_prot, v.pos_relative_prot as pos_relative_prot, v.pos_var_cds as pos_var_cds, v.nuc_upstream as nuc_upstream, v.codon_stop as codon_stop, v.nuc_downstream as nuc_downstream, v.exon_localization as exon_localization, v.NMD_sensitivity as NMD_sensitivity, v.AF_ww as AF,v.AF_afr as AF_afr, v.AF_amr as AF_amr, v.AF_asj as AF_asj, v.AF_eas as AF_eas, v.AF_fin as AF_fin, v.AF_mid as AF_mid, v.AF_nfe as AF_nfe, v.AF_sas as AF_sas, v.AF_remaining as AF_remaining, v.overlapping_domain as overlapping_domain, v.Origin as Origin, v.ReviewStatus as ReviewStatus",database_="neo4j",result_transformer_=neo4j.Result.to_df)
-            prot_length = gene_df['prot_length'].iloc[0]
-            exon_counts = gene_df['exon_counts'].iloc[0]
-            RefSeq_nuc = gene_df['RefSeq_nuc'].iloc[0]
-            Ensembl_nuc = gene_df['Ensembl_nuc'].iloc[0]
-            RefSeq_prot = gene_df['RefSeq_prot'].iloc[0]
-            Ensembl_prot = gene_df['Ensembl_prot'].iloc[0]
-            gene_needle_df = pd.merge(gene_df.drop_duplicates(subset=['symbol']), gene_domains, how='left', on='symbol')
-            gene_df = gene_df.drop(['prot_length', 'exon_counts', 'RefSeq_nuc', 'Ensembl_nuc', 'RefSeq_prot', 'Ensembl_prot'], axis=1)
-            #gene_datatable = create_datatable(gene_df)
-            # gene_graph = driver.execute_query(f"MATCH (p:Phenotype)-[r:RECOGNIZABLE_BY]-(d:Disease)-[c:CAUSED_BY]-(g:Gene)-[l:LOCATED_ON]-(v:Variant) WHERE g.Symbol = '{search_value}' RETURN p, r, d, g, l, v",database_="neo4j",result_transformer_=neo4j.Result.graph)
-            # gene_cyto = create_cyto_elements(gene_graph)
+                ]),result_key
+        
             
-            # nmd_fig_df = gene_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
-            # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False) 
+        elif category == "disease":
+            result_key, disease_df = search_result("disease", search_value)
+            table_query = {'category': "disease", 'data': result_key, 'value': search_value}
+            table_data, table_page_count = table_page(*search_table(table_query), 0, 20, [])
+            disorder_id = disease_df['disorder_id'].iloc[0]
+            orpha_code = disease_df['orpha_code'].iloc[0]
+            definition = disease_df['definition'].iloc[0]
+            prevalence_geo = disease_df['prevalence_geo'].iloc[0]
+            prevalence_geo_br = prevalence_geo.replace(';', '\n')
+            disease_df = disease_df.drop(['disorder_id','orpha_code','definition','prevalence_geo'], axis=1)
+            #disease_datatable = create_datatable(disease_df)
+            # disease_graph = driver.execute_query(f"MATCH (p:Phenotype)-[r:RECOGNIZABLE_BY]-(d:Disease)-[c:CAUSED_BY]-(g:Gene)-[l:LOCATED_ON]-(v:Variant) WHERE d.name = '{search_value}' RETURN p, r, d, g, l, v",database_="neo4j",result_transformer_=neo4j.Result.graph)
+            # disease_cyto = create_cyto_elements(disease_graph)
             
+            # nmd_fig_df = disease_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
+            # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
 
             # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
             #     title="NMD Sensitivity by Source",
@@ -704,30 +1482,8 @@ def execute_search(n_clicks, category, search_value):
             #     color_discrete_sequence=px.colors.sequential.Plasma_r)
             # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
             
-            # filtered_data = gene_df.dropna(subset=['ClinicalSignificance', 'Source'])
-
-            # # Create a DataFrame for the count of each ClinicalSignificance by Source
-            # clinical_significance_counts = filtered_data.groupby(['Source', 'ClinicalSignificance']).size().unstack(fill_value=0)
-            # clinical_significance_counts_reset = clinical_significance_counts.reset_index()
-            # clinical_significance_counts_melted = clinical_significance_counts_reset.melt(id_vars='Source', 
-            #                                                                   var_name='ClinicalSignificance', 
-            #                                                                   value_name='Count')
-
-            # # Creating a stacked bar chart using Plotly
-            # fig_patho = px.bar(clinical_significance_counts_melted, 
-            #     x="ClinicalSignificance", 
-            #     y="Count", 
-            #     color="Source",
-            #     barmode='stack',
-            #     labels={'ClinicalSignificance': 'Signification Clinique', 'Source': 'Source des Données', 'Count': 'Nombre de Variantes'})
-
-            # fig_patho.update_layout(title='Répartition des Variantes selon la Classification Clinique et la Source avec Plotly',
-            #     xaxis_title='Signification Clinique',
-            #     yaxis_title='Nombre de Variantes')
-            
-            # #top_disease_df =
-            
-            nmd_fig_df = StopKB_df[StopKB_df['symbol'] == search_value]['NMD_sensitivity'].value_counts().reset_index()
+            #nmd_fig_df = StopKB_df[StopKB_df['disease_name'].str.contains(search_value, na=False)]['NMD_sensitivity'].value_counts().reset_index()
+            nmd_fig_df = disease_df.drop_duplicates(subset=['HGVSG'])['NMD_sensitivity'].value_counts().reset_index()
             nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
             
             pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
@@ -744,22 +1500,8 @@ def execute_search(n_clicks, category, search_value):
                 title_x=0.5)
             
             
-            patho_fig_expanded_sources_df = StopKB_df[StopKB_df['symbol'] == search_value]['Source'].str.get_dummies(sep=';')
-
-            # Fusion des sources étendues avec le dataframe original
-            patho_fig_with_sources_df = pd.concat([StopKB_df[StopKB_df['symbol'] == search_value], patho_fig_expanded_sources_df], axis=1)
-
-            # Transformation du dataframe en format long pour Plotly
-            patho_fig_melted_df = patho_fig_with_sources_df.melt(id_vars='ClinicalSignificance', 
-                                            value_vars=patho_fig_expanded_sources_df.columns, 
-                                            var_name='Source', value_name='Count')
-
-            # Filtrage des lignes avec un comptage zéro
-            patho_fig_melted_df = patho_fig_melted_df[patho_fig_melted_df['Count'] > 0]
-
-            # Regroupement par Source et ClinicalSignificance et somme des comptages
-            patho_fig_df = patho_fig_melted_df.groupby(['Source', 'ClinicalSignificance']).sum().reset_index()
-            patho_fig_df = patho_fig_df.sort_values(by=['Count'], ascending=False)
+            # Comptage par source à partir du masque binaire des sources
+            patho_fig_df = frame_significance_by_source(disease_df.drop_duplicates(subset=['HGVSG']))
             
             # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
             colors_patho = {
@@ -783,28 +1525,25 @@ def execute_search(n_clicks, category, search_value):
                                     title_x=0.5)
             
             
-            exploded_diseases = StopKB_df[StopKB_df['symbol'] == search_value]['disease_name'].str.split('; ').explode()
-            disease_counts = exploded_diseases.value_counts().head(10)
-
-            # Créer un DataFrame pour le graphique
-            top_diseases_df = disease_counts.reset_index()
-            top_diseases_df.columns = ['Disease', 'Count']
+            top_genes_df = disease_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().head(10).reset_index()
+            top_genes_df.columns = ['Gene', 'Count']
+            
+            genes_frequency_df = pd.DataFrame({'symbol': disease_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().index,
+                                       'Number of variations': disease_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().values})
 
             # Créer le graphique à barres
-            fig_top_diseases = px.bar(top_diseases_df, x='Disease', y='Count', color_discrete_sequence=['#FBE426'],
-                        title='Top diseases',
-                        labels={'Disease': 'Disease', 'Count': 'Number of variations'})
+            fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
+                        title='Top genes',
+                        labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
             
-            fig_top_diseases.update_layout(font_family="system-ui",
-                                        title_x=0.5,
-                                        xaxis_tickangle=-15,
-                                        xaxis_tickfont_size=12)
+            fig_top_genes.update_layout(font_family="system-ui",
+                                        title_x=0.5)
             
-            disease_frequency_df = pd.DataFrame({'disease_name': exploded_diseases.value_counts().index,
-                                       'Number of variations': exploded_diseases.value_counts().values})
+            #exploded_phenotypes = StopKB_df[StopKB_df['disease_name'].str.contains(search_value)]['phenotype_name'].str.split(';').explode()
+            phenotype_counts = disease_df['hpo_name'].value_counts().head(10)
             
-            exploded_phenotypes = StopKB_df[StopKB_df['symbol'] == search_value]['phenotype_name'].str.split('; ').explode()
-            phenotype_counts = exploded_phenotypes.value_counts().head(10)
+            phenotype_frequency_df = pd.DataFrame({'phenotype_name': disease_df['hpo_name'].value_counts().index,
+                                       'Number of variations': disease_df['hpo_name'].value_counts().values})
 
             # Créer un DataFrame pour le graphique
             # top_phenotypes_df = phenotype_counts.reset_index()
@@ -820,42 +1559,8 @@ def execute_search(n_clicks, category, search_value):
             #                             xaxis_tickangle=-15,
             #                             xaxis_tickfont_size=12)
             
-            phenotype_frequency_df = pd.DataFrame({'phenotype_name': exploded_phenotypes.value_counts().index,
-                                       'Number of variations': exploded_phenotypes.value_counts().values})
-            
-            domain_data = []
-            # Itération sur chaque colonne de domaine dans gene_df
-            for col in gene_needle_df.filter(like='domain_'):
-                for domain_str in gene_needle_df[col].dropna():
-                    # Séparation de la chaîne en prenant en compte le dernier ';' comme séparateur
-                    *name_parts, start, end = domain_str.rsplit(';', 2)
-                    name = ';'.join(name_parts)  # Reconstruction du nom si nécessaire
-                    if len(name) > 20:
-                        name = name[:20] + '...'
-                    coord = f"{start}-{end}"
-                    domain_data.append({'name': name, 'coord': coord})
-                    
-            mutation_data = {
-                'x': gene_df.astype({'pos_stop_prot':'string'})['pos_stop_prot'].tolist(),
-                'y': ["1"] * len(gene_df),  
-                'mutationGroups': gene_df['ClinicalSignificance'].tolist(),
-                'domains': domain_data, 
-            }
-            
-            colors_map = {
-                'Benign': '#1CBE4F',
-                'Likely benign': '#16FF32',
-                'Uncertain significance': '#FBE426',
-                'Likely pathogenic': '#FEAF16',
-                'Pathogenic': '#F6222E'
-            }
-                        
-            unique_categories = list(dict.fromkeys(mutation_data['mutationGroups']))
-
-            unique_colors = [colors_map.get(category, "default_color") for category in unique_categories]
-
-            
             return html.Div([
+                dcc.Store(id='table-query', data=table_query),
                 #html.H2(f"{search_value}", style={"text-align": "center"}),
                 dbc.Card(
                         [
@@ -864,12 +1569,11 @@ def execute_search(n_clicks, category, search_value):
                                 [
                                     dbc.Row(
                                         [
-                                            dbc.Col(html.P(f"Protein length: {prot_length} AA"), md=2),
-                                            dbc.Col(html.P(f"Exon count: {exon_counts}"), md=2),
-                                            dbc.Col(html.P(f"RefSeq transcript ID: {RefSeq_nuc}"), md=2),
-                                            dbc.Col(html.P(f"Ensembl transcript ID: {Ensembl_nuc}"), md=2),
-                                            dbc.Col(html.P(f"RefSeq protein ID: {RefSeq_prot}"), md=2),
-                                            dbc.Col(html.P(f"Ensembl protein ID: {Ensembl_prot}"), md=2),
+                                            dbc.Col(html.P(f"Disorder ID: {disorder_id}"), md=2),
+                                            dbc.Col(html.P(f"Orpha code: {orpha_code}"), md=2),
+                                            dbc.Col(html.P(f"Description: {definition}"), md=6),
+                                            #dbc.Col(html.P(f"Prevalence: {prevalence_geo_br}"), md=2),
+                                            dbc.Col(dcc.Markdown(f"Prevalence: {prevalence_geo_br}"), md=2),
                                         ],
                                         align="start",
                                     ),
@@ -877,7 +1581,7 @@ def execute_search(n_clicks, category, search_value):
                                 style={"height": "100%", "overflow": "auto", "background-color": "rgba(54, 155, 232, 0.3)"},
                             ),
                             dbc.CardFooter(
-                                dbc.Button("More infos on GeneCards", href=f"https://www.genecards.org/cgi-bin/carddisp.pl?gene={search_value}", target="_blank", color="primary", className="btn-sm ml-auto", style={"float": "right"}),
+                                dbc.Button("More infos on Orphanet", href=f"https://www.orpha.net/consor/cgi-bin/Disease_Search.php?lng=EN&data_id={disorder_id}", target="_blank", color="primary", className="btn-sm ml-auto", style={"float": "right"}),
                             ),
                         ],
                         style={"margin-bottom": "2%", "overflow": "auto"},
@@ -942,8 +1646,8 @@ def execute_search(n_clicks, category, search_value):
                                 dbc.Col(
                                     [
                                         html.Label("Filter by absolute position of the stop codon in the protein:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-pos-stop-prot', type='number', placeholder='Start pos', min=0, value = 1, step=1),
-                                        dcc.Input(id='end-pos-stop-prot', type='number', placeholder='End pos', min=0, step=1)
+                                        dcc.Input(id='start-pos-stop-prot', type='number', debounce=True, placeholder='Start pos', min=0, value = 1, step=1),
+                                        dcc.Input(id='end-pos-stop-prot', type='number', debounce=True, placeholder='End pos', min=0, step=1)
                                     ],
                                     md=12
                                 ),
@@ -956,8 +1660,8 @@ def execute_search(n_clicks, category, search_value):
                                 dbc.Col(
                                     [
                                         html.Label("Filter by relative position of the stop codon in the protein:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-pos-relative-prot', type='number', placeholder='Start ratio', min=0, max=1,value=0, step=0.01),
-                                        dcc.Input(id='end-pos-relative-prot', type='number', placeholder='End ratio', min=0, max=1, step=0.01)
+                                        dcc.Input(id='start-pos-relative-prot', type='number', debounce=True, placeholder='Start ratio', min=0, max=1,value=0, step=0.01),
+                                        dcc.Input(id='end-pos-relative-prot', type='number', debounce=True, placeholder='End ratio', min=0, max=1,value=1, step=0.01)
                                     ],
                                     md=12
                                 ),
@@ -1013,8 +1717,8 @@ def execute_search(n_clicks, category, search_value):
                                 dbc.Col(
                                     [
                                         html.Label("Filter by worldwide allele frequency:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-af-worldwide', type='number', placeholder='Min AF', min=0, max=1, step=1e-10),
-                                        dcc.Input(id='end-af-worldwide', type='number', placeholder='Max AF', min=0, max=1, step=1e-10)
+                                        dcc.Input(id='start-af-worldwide', type='number', debounce=True, placeholder='Min AF', min=0, max=1, step=1e-10),
+                                        dcc.Input(id='end-af-worldwide', type='number', debounce=True, placeholder='Max AF', min=0, max=1, step=1e-10)
                                     ],
                                     md=12
                                 ),
@@ -1049,57 +1753,65 @@ def execute_search(n_clicks, category, search_value):
                             ),
                             className="mb-3",
                         ),
+                        # Filtrage à chaque modification des filtres, sans passer par le bouton
+                        dbc.Row(
+                            dbc.Col(
+                                [
+                                    dbc.Switch(id="live-filter", label="Live filtering", value=False),
+                                    dcc.Store(id="live-filter-trigger"),
+                                    dcc.Store(id="deferred-filter"),
+                                ],
+                                width={"size": 6, "offset": 3},
+                            ),
+                            className="mb-3",
+                        ),
+                        dbc.Row(
+                            id="filter-row-export-format",
+                            children=[
+                                dbc.Col(
+                                    [
+                                        html.Label("Download format:", style={"font-weight": "bold"}),
+                                        dcc.RadioItems(
+                                            id="export-format",
+                                            options=[
+                                                {'label': 'CSV', 'value': 'csv'},
+                                                {'label': 'Parquet', 'value': 'parquet'},
+                                                {'label': 'Arrow IPC', 'value': 'arrow'},
+                                            ],
+                                            value='csv',
+                                            inline=False
+                                        ),
+                                    ],
+                                    md=12
+                                ),
+                            ],
+                            className="g-0",
+                        ),
                     ], width=2),
                     dbc.Col([
                         dcc.Tabs([
                             dcc.Tab(id='tab-variations',
-                                label=f"{StopKB_df[StopKB_df['symbol'] == search_value]['HGVSG'].nunique()} variations",
+                                label=f"{disease_df.drop_duplicates(subset=['HGVSG'])['HGVSG'].nunique()} variations",
                                 children=[
                                     dcc.Graph(
-                                        id='patho-bar-chart',
-                                        figure=fig_patho
-                                    ),
-                                    dcc.Graph(
-                                        id='NMD-pie-chart',
-                                        figure=fig_nmd
-                                    ),
-                                ]),
-                            dcc.Tab(id='tab-genes', label='Protein mapping', children=[
-                                dbc.Row(
-                                    dbc.Col(
-                                        dashbio.NeedlePlot(
-                                            id='needle-plot',
-                                            mutationData=mutation_data,
-                                            needleStyle={
-                                                'headSize': 10,
-                                                'headColor': unique_colors
-                                            },
-                                            height=500,
-                                        ),
-                                        #width=12,
-                                        #style={'width': '100%', 'height': '100%'}
-                                    ),
-                                ),
+                                    id='patho-bar-chart',
+                                figure=fig_patho
+                            ),
                                 dcc.Graph(
-                                    id='top-genes-bar-chart',
-                                    style={'display': 'none'}
+                                id='NMD-pie-chart',
+                                figure=fig_nmd
+                            ),
+                            ]),
+                            dcc.Tab(id='tab-genes',
+                                label=f"{disease_df.drop_duplicates(subset=['HGVSG'])['symbol'].nunique()} genes", children=[
+                                dcc.Graph(
+                                id='top-genes-bar-chart',
+                                figure=fig_top_genes
                                 ),
                                 dash_table.DataTable(
                                         id='table-genes',
-                                        style_table={'display': 'none'}
-                                    ),
-                            ]),
-                            dcc.Tab(id='tab-diseases',
-                                label=f"{exploded_diseases.nunique()} diseases",
-                                children=[
-                                    dcc.Graph(
-                                        id='top-diseases-bar-chart',
-                                        figure=fig_top_diseases
-                                        ),
-                                    dash_table.DataTable(
-                                        id='table-diseases',
-                                        data=disease_frequency_df.to_dict("records"),
-                                        columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(disease_frequency_df[i]) else None} for i in disease_frequency_df.columns],
+                                        data=genes_frequency_df.to_dict("records"),
+                                        columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(genes_frequency_df[i]) else None} for i in genes_frequency_df.columns],
                                         style_cell={
                                         'whiteSpace': 'normal',
                                         'height': 'auto',
@@ -1108,7 +1820,7 @@ def execute_search(n_clicks, category, search_value):
                                             },
                                         style_cell_conditional=[
                                             {'if': {'column_id': c},
-                                            'textAlign': 'center'} for c in disease_frequency_df.columns],
+                                            'textAlign': 'center'} for c in genes_frequency_df.columns],
                                         style_data_conditional=[
                                             {
                                                 'if': {'row_index': 'odd'},
@@ -1137,15 +1849,28 @@ def execute_search(n_clicks, category, search_value):
                                         export_format="none",
                                         export_headers="none",
                                     ),
-                                    html.Button("Download CSV", id="btn_csv_diseases"),
-                                    dcc.Download(id="download-dataframe-csv-diseases"),
-                                ]),
+                                html.Button("Download", id="btn_csv_genes"),
+                                dcc.Download(id="download-dataframe-csv-genes"),
+                                dcc.Graph(
+                                id='needle-plot',
+                                style={'display': 'none'}
+                                ),
+                                html.Div(id='tab-diseases', style={'display': 'none'}),
+                                dcc.Graph(
+                                id='top-diseases-bar-chart',
+                                style={'display': 'none'}
+                                ),
+                                dash_table.DataTable(
+                                        id='table-diseases',
+                                        style_table={'display': 'none'}
+                                    ),
+                            ]),
                             dcc.Tab(id='tab-phenotypes',
-                                label=f"{exploded_phenotypes.nunique()} phenotypes",
+                                label=f"{disease_df['hpo_name'].nunique()} phenotypes",
                                 children=[
                                     dcc.Graph(
                                         id='top-phenotypes-bar-chart',
-                                        style={'display': 'none'}
+                                        style={'display': 'none'}   
                                     ),
                                     dash_table.DataTable(
                                         id='table-phenotypes',
@@ -1188,14 +1913,14 @@ def execute_search(n_clicks, category, search_value):
                                         export_format="none",
                                         export_headers="none",
                                     ),
-                                    html.Button("Download CSV", id="btn_csv_phenotypes"),
+                                    html.Button("Download", id="btn_csv_phenotypes"),
                                     dcc.Download(id="download-dataframe-csv-phenotypes")
-                                ]),
+                            ]),
                             dcc.Tab(label='Table', children=[
                                 dash_table.DataTable(
                                     id='table-prefiltered',
-                                    data=gene_df.drop(columns=['symbol']).to_dict("records"),
-                                    columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(gene_df.drop(columns=['symbol'])[i]) else None} for i in gene_df.drop(columns=['symbol']).columns],
+                                    data=table_data,
+                                    columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(disease_df.drop(columns=['hpo_name'])[i]) else None} for i in disease_df.drop(columns=['hpo_name']).drop_duplicates(subset=['HGVSG']).columns],
                                     style_cell={
                                     'whiteSpace': 'normal',
                                     'height': 'auto',
@@ -1204,7 +1929,7 @@ def execute_search(n_clicks, category, search_value):
                                         },
                                     style_cell_conditional=[
                                         {'if': {'column_id': c},
-                                        'textAlign': 'center'} for c in gene_df.drop(columns=['symbol']).columns],
+                                        'textAlign': 'center'} for c in disease_df.drop(columns=['hpo_name']).drop_duplicates(subset=['HGVSG']).columns],
                                     style_data_conditional=[
                                         {
                                             'if': {'row_index': 'odd'},
@@ -1223,9 +1948,10 @@ def execute_search(n_clicks, category, search_value):
                                     style_as_list_view=True,
                                     filter_action='none',
                                     filter_query='',
-                                    sort_action='native',
+                                    sort_action='custom',
                                     sort_mode='multi',
-                                    page_action='native',
+                                    page_action='custom',
+                                    page_count=table_page_count,
                                     page_current=0,
                                     page_size=20,
                                     fixed_rows={'headers': True},
@@ -1233,1028 +1959,657 @@ def execute_search(n_clicks, category, search_value):
                                     export_format="none",
                                     export_headers="none",
                                 ),
-                                html.Button("Download CSV", id="btn_csv"),
-                                dcc.Download(id="download-dataframe-csv"),
+                                html.A(html.Button("Download"), id="download-link", href=export_url(table_query), download="data.csv.gz"),
                             ])
                         ])
                     ], width=10),
                 ]),
-                ]),gene_df.to_json(date_format='iso', orient='split')
+                ]),result_key
         
-            
-        elif category == "disease":
-            disease_df = driver.execute_query(f"MATCH (v:Variant)-[LOCATED_ON]-(g:Gene)-[CAUSED_BY]-(d:Disease) WHERE d.disorder_name = '{search_value}' OPTIONAL MATCH (d)-[RECOGNIZABLE_BY]-(p:Phenotype)  RETURN d.disorder_id as disorder_id, d.orpha_code as orpha_code, d.definition as definition, d.prevalence_geo as prevalence_geo, g.Symbol as symbol, v.HGVSG as HGVSG, v.Merged_Source as Source, v.ClinicalSignificance as ClinicalSignificance, v.pos_stop_prot as pos_stop_prot, v.pos_relative_prot as pos_relative_prot, v.pos_var_cds as pos_var_cds, v.nuc_upstream as nuc_upstream, v.codon_stop as codon_stop, v.nuc_downstream as nuc_downstream, v.exon_localization as exon_localization, v.NMD_sensitivity as NMD_sensitivity, v.AF_ww as AF,v.AF_afr as AF_afr, v.AF_amr as AF_amr, v.AF_asj as AF_asj, v.AF_eas as AF_eas, v.AF_fin as AF_fin, v.AF_mid as AF_mid, v.AF_nfe as AF_nfe, v.AF_sas as AF_sas, v.AF_remaining as AF_remaining, v.overlapping_domain as overlapping_domain, v.Origin as Origin, v.ReviewStatus as ReviewStatus, p.hpo_name as hpo_name",database_="neo4j",result_transformer_=neo4j.Result.to_df)
-            disorder_id = disease_df['disorder_id'].iloc[0]
-            orpha_code = disease_df['orpha_code'].iloc[0]
-            definition = disease_df['definition'].iloc[0]
-            prevalence_geo = disease_df['prevalence_geo'].iloc[0]
-            prevalence_geo_br = prevalence_geo.replace(';', '\n')
-            disease_df = disease_df.drop(['disorder_id','orpha_code','definition','prevalence_geo'], axis=1)
-            #disease_datatable = create_datatable(disease_df)
-            # disease_graph = driver.execute_query(f"MATCH (p:Phenotype)-[r:RECOGNIZABLE_BY]-(d:Disease)-[c:CAUSED_BY]-(g:Gene)-[l:LOCATED_ON]-(v:Variant) WHERE d.name = '{search_value}' RETURN p, r, d, g, l, v",database_="neo4j",result_transformer_=neo4j.Result.graph)
-            # disease_cyto = create_cyto_elements(disease_graph)
-            
-            # nmd_fig_df = disease_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
-            # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
-
-            # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
-            #     title="NMD Sensitivity by Source",
-            #     labels={'Count':'Count', 'Source':'Source'},
-            #     color_discrete_sequence=px.colors.sequential.Plasma_r)
-            # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
-            
-            #nmd_fig_df = StopKB_df[StopKB_df['disease_name'].str.contains(search_value, na=False)]['NMD_sensitivity'].value_counts().reset_index()
-            nmd_fig_df = disease_df.drop_duplicates(subset=['HGVSG'])['NMD_sensitivity'].value_counts().reset_index()
-            nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
-            
-            pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
-
-            # Créer le graphique Pie Chart pour 'NMD_sensitivity'
-            fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity',
-                values='Count', 
-                title='Distribution of NMD sensitivity',
-                color_discrete_sequence=pie_colors)
-
-            # Mise à jour de la mise en page
-            fig_nmd.update_layout(legend_title='NMD Sensitivity',
-                font_family="system-ui",
-                title_x=0.5)
-            
-            
-            patho_fig_expanded_sources_df = disease_df.drop_duplicates(subset=['HGVSG'])['Source'].str.get_dummies(sep=';')
+        
+        # elif category == "variation":
+        #     query = f"MATCH (v:Variant)-[LOCATED_ON]-(g:Gene) WHERE v.HGVSG = '{search_value}' RETURN g.Symbol, v.HGVSG as HGVSG"
 
-            # Fusion des sources étendues avec le dataframe original
-            patho_fig_with_sources_df = pd.concat([disease_df.drop_duplicates(subset=['HGVSG']), patho_fig_expanded_sources_df], axis=1)
+    #     results = db_manager.run_query(query)
 
-            # Transformation du dataframe en format long pour Plotly
-            patho_fig_melted_df = patho_fig_with_sources_df.melt(id_vars='ClinicalSignificance', 
-                                            value_vars=patho_fig_expanded_sources_df.columns, 
-                                            var_name='Source', value_name='Count')
+    #     df = pd.DataFrame([dict(record) for record in results])
 
-            # Filtrage des lignes avec un comptage zéro
-            patho_fig_melted_df = patho_fig_melted_df[patho_fig_melted_df['Count'] > 0]
+    #     return dash_table.DataTable(
+    #         data=df.to_dict("records"),
+    #         columns=[{"name": i, "id": i} for i in df.columns],
+    #         style_cell_conditional=[
+    #     {'if': {'column_id': c},
+    #      'textAlign': 'left'} for c in df.columns],
+    # style_data_conditional=[
+    #     {
+    #         'if': {'row_index': 'odd'},
+    #         'backgroundColor': 'rgb(248, 248, 248)'
+    #     }
+    # ],
+    # style_header={
+    #     'backgroundColor': 'rgb(230, 230, 230)',
+    #     'fontWeight': 'bold'
+    # },
+    # filter_action='none',
+    # sort_action="native",
+    # export_format="csv",
+    #     )
+    else:
+        raise dash.exceptions.PreventUpdate
+    
+def phenotype_search(set_progress, search_value):
+    # The progress bar shows the steps done and the label of the running one
+    set_progress((0, 4, "Searching"))
+    result_key, phenotype_df = search_result("phenotype", search_value)
+    set_progress((1, 4, "Building the variant table"))
+    table_query = {'category': "phenotype", 'data': result_key, 'value': search_value}
+    table_data, table_page_count = table_page(*search_table(table_query), 0, 20, [])
+    set_progress((2, 4, "Drawing the charts"))
+    hpo_id = phenotype_df['hpo_id'].iloc[0]
+    comment = phenotype_df['comment'].iloc[0]
+    definition = phenotype_df['definition'].iloc[0]
+    phenotype_df = phenotype_df.drop(['hpo_id','comment','definition'], axis=1)
+    #phenotype_disease_df = phenotype_df[['disease', 'symbol']].drop_duplicates(subset=['disease', 'symbol'])
+    #phenotype_variation_df = phenotype_df[['symbol','HGVSG', 'Source', 'ClinicalSignificance', 'pos_stop_prot', 'pos_relative_prot', 'pos_var_cds', 'nuc_upstream', 'codon_stop', 'nuc_downstream', 'exon_localization', 'NMD_sensitivity', 'AF', 'AF_afr', 'AF_amr', 'AF_asj', 'AF_eas', 'AF_fin', 'AF_nfe', 'AF_oth', 'Origin', 'ReviewStatus']].drop_duplicates(subset=['HGVSG'])
+    #phenotype_datatable = create_datatable(phenotype_df)
+    # phenotype_graph = driver.execute_query(f"MATCH (p:Phenotype)-[r:RECOGNIZABLE_BY]-(d:Disease)-[c:CAUSED_BY]-(g:Gene)-[l:LOCATED_ON]-(v:Variant) WHERE p.HPO_label = '{search_value}' RETURN p, r, d, g, l, v",database_="neo4j",result_transformer_=neo4j.Result.graph)
+    # phenotype_cyto = create_cyto_elements(phenotype_graph)
+    
+    # nmd_fig_df = phenotype_variation_df.groupby(['ClinicalSignificance', 'NMD_sensitivity']).size().reset_index(name='counts')
+    # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
+
+    # fig_nmd = px.bar(nmd_fig_df, x="ClinicalSignificance", y="counts", color="NMD_sensitivity",              
+    #     title="NMD Sensitivity by Clinical significance",
+    #     labels={'Count':'Count', 'ClinicalSignificance':'ClinicalSignificance'},
+    #     color_discrete_sequence=px.colors.sequential.Plasma_r)
+    # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
+    nmd_fig_df = phenotype_df.drop_duplicates(subset=['HGVSG'])['NMD_sensitivity'].value_counts().reset_index()
+    nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
+    
+    pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
+
+    # Créer le graphique Pie Chart pour 'NMD_sensitivity'
+    fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity',
+        values='Count', 
+        title='Distribution of NMD sensitivity',
+        color_discrete_sequence=pie_colors)
+
+    # Mise à jour de la mise en page
+    fig_nmd.update_layout(legend_title='NMD Sensitivity',
+        font_family="system-ui",
+        title_x=0.5)
+    
+    
+    # Comptage par source à partir du masque binaire des sources
+    patho_fig_df = frame_significance_by_source(phenotype_df.drop_duplicates(subset=['HGVSG']))
+    
+    # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
+    colors_patho = {
+        'Benign': '#1CBE4F',
+        'Likely benign': '#16FF32',
+        'Uncertain significance': '#FBE426',
+        'Likely pathogenic': '#FEAF16',
+        'Pathogenic': '#F6222E'
+    }
+    # Création du graphique Plotly
+    fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
+                title='Clinical significance by Source',
+                barmode='stack',
+                color_discrete_map=colors_patho)
+
+    # Mise à jour de la mise en page
+    fig_patho.update_layout(xaxis_title='Source',
+                            yaxis_title='Number of Variations',
+                            legend_title='Clinical Significance',
+                            font_family="system-ui",
+                            title_x=0.5)
+    
+    
+    set_progress((3, 4, "Counting the genes and diseases"))
+    top_genes_df = phenotype_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().head(10).reset_index()
+    top_genes_df.columns = ['Gene', 'Count']
+    
+    genes_frequency_df = pd.DataFrame({'symbol': phenotype_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().index,
+                               'Number of variations': phenotype_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().values})
 
-            # Regroupement par Source et ClinicalSignificance et somme des comptages
-            patho_fig_df = patho_fig_melted_df.groupby(['Source', 'ClinicalSignificance']).sum().reset_index()
-            patho_fig_df = patho_fig_df.sort_values(by=['Count'], ascending=False)
-            
-            # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
-            colors_patho = {
-                'Benign': '#1CBE4F',
-                'Likely benign': '#16FF32',
-                'Uncertain significance': '#FBE426',
-                'Likely pathogenic': '#FEAF16',
-                'Pathogenic': '#F6222E'
-            }
-            # Création du graphique Plotly
-            fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
-                        title='Clinical significance by Source',
-                        barmode='stack',
-                        color_discrete_map=colors_patho)
+    # Créer le graphique à barres
+    fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
+                title='Top genes',
+                labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
+    
+    fig_top_genes.update_layout(font_family="system-ui",
+                                title_x=0.5)
+    
+    
+    disease_counts = phenotype_df['disease'].value_counts().head(10)
 
-            # Mise à jour de la mise en page
-            fig_patho.update_layout(xaxis_title='Source',
-                                    yaxis_title='Number of Variations',
-                                    legend_title='Clinical Significance',
-                                    font_family="system-ui",
-                                    title_x=0.5)
-            
-            
-            top_genes_df = disease_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().head(10).reset_index()
-            top_genes_df.columns = ['Gene', 'Count']
-            
-            genes_frequency_df = pd.DataFrame({'symbol': disease_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().index,
-                                       'Number of variations': disease_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().values})
+    top_diseases_df = disease_counts.reset_index()
+    top_diseases_df.columns = ['Disease', 'Count']
+    
+    disease_frequency_df = pd.DataFrame({'disease_name': phenotype_df['disease'].value_counts().index,
+                               'Number of variations': phenotype_df['disease'].value_counts().values})
 
-            # Créer le graphique à barres
-            fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
-                        title='Top genes',
-                        labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
-            
-            fig_top_genes.update_layout(font_family="system-ui",
-                                        title_x=0.5)
-            
-            #exploded_phenotypes = StopKB_df[StopKB_df['disease_name'].str.contains(search_value)]['phenotype_name'].str.split(';').explode()
-            phenotype_counts = disease_df['hpo_name'].value_counts().head(10)
-            
-            phenotype_frequency_df = pd.DataFrame({'phenotype_name': disease_df['hpo_name'].value_counts().index,
-                                       'Number of variations': disease_df['hpo_name'].value_counts().values})
+    # Créer le graphique à barres
+    fig_top_diseases = px.bar(top_diseases_df, x='Disease', y='Count', color_discrete_sequence=['#FBE426'],
+                title='Top diseases',
+                labels={'Disease': 'Disease', 'Count': 'Number of variations'})
+    
+    fig_top_diseases.update_layout(font_family="system-ui",
+                                title_x=0.5,
+                                xaxis_tickangle=-15,
+                                xaxis_tickfont_size=12)
 
-            # Créer un DataFrame pour le graphique
-            # top_phenotypes_df = phenotype_counts.reset_index()
-            # top_phenotypes_df.columns = ['Phenotype', 'Count']
 
-            # # Créer le graphique à barres
-            # fig_top_phenotypes = px.bar(top_phenotypes_df, x='Phenotype', y='Count', color_discrete_sequence=['#FA0087'],
-            #             title='Top phenotypes',
-            #             labels={'Phenotype': 'Phenotype', 'Count': 'Number of variations'})
-            
-            # fig_top_phenotypes.update_layout(font_family="system-ui",
-            #                             title_x=0.5,
-            #                             xaxis_tickangle=-15,
-            #                             xaxis_tickfont_size=12)
-            
-            return html.Div([
-                #html.H2(f"{search_value}", style={"text-align": "center"}),
-                dbc.Card(
+    return html.Div([
+        dcc.Store(id='table-query', data=table_query),
+        #html.H2(f"{search_value}", style={"text-align": "center"}),
+        dbc.Card(
+                [
+                    dbc.CardHeader(f"{search_value}", style={"text-align": "center","font-size": "larger", "font-weight": "bold"}),
+                    dbc.CardBody(
                         [
-                            dbc.CardHeader(f"{search_value}", style={"text-align": "center","font-size": "larger", "font-weight": "bold"}),
-                            dbc.CardBody(
+                            dbc.Row(
                                 [
-                                    dbc.Row(
-                                        [
-                                            dbc.Col(html.P(f"Disorder ID: {disorder_id}"), md=2),
-                                            dbc.Col(html.P(f"Orpha code: {orpha_code}"), md=2),
-                                            dbc.Col(html.P(f"Description: {definition}"), md=6),
-                                            #dbc.Col(html.P(f"Prevalence: {prevalence_geo_br}"), md=2),
-                                            dbc.Col(dcc.Markdown(f"Prevalence: {prevalence_geo_br}"), md=2),
-                                        ],
-                                        align="start",
-                                    ),
+                                    dbc.Col(html.P(f"HPO ID: {hpo_id}"), md=4),
+                                    dbc.Col(html.P(f"Definition: {definition}"), md=4),
+                                    dbc.Col(html.P(f"Comment: {comment}"), md=4),
                                 ],
-                                style={"height": "100%", "overflow": "auto", "background-color": "rgba(54, 155, 232, 0.3)"},
-                            ),
-                            dbc.CardFooter(
-                                dbc.Button("More infos on Orphanet", href=f"https://www.orpha.net/consor/cgi-bin/Disease_Search.php?lng=EN&data_id={disorder_id}", target="_blank", color="primary", className="btn-sm ml-auto", style={"float": "right"}),
+                                align="start",
                             ),
                         ],
-                        style={"margin-bottom": "2%", "overflow": "auto"},
+                        style={"height": "100%", "overflow": "auto", "background-color": "rgba(54, 155, 232, 0.3)"},
                     ),
-                html.H2(f"List of nonsense variations associated to {search_value}", style={
-                "text-align": "left", 
-                #"display": "inline-block", # Ceci permet au rectangle bleu de s'adapter à la taille du texte
-                "padding-bottom": "0px" # Ajustez cette valeur pour changer la distance entre le titre et la bordure
-                }),
-                html.Hr(),
-                dbc.Row([
-                    dbc.Col([
-                        dbc.Row(
-                            id="filter-row-source",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by Source:", style={"font-weight": "bold"}),
-                                        dcc.Checklist(
-                                            id="source-checklist",
-                                            options=[
-                                                {'label': 'ClinVar', 'value': 'ClinVar'},
-                                                {'label': 'gnomAD', 'value': 'gnomAD'},
-                                                {'label': 'COSMIC', 'value': 'COSMIC'},
-                                            ],
-                                            value=['ClinVar', 'gnomAD', 'COSMIC'],
-                                            inline=True
-                                        ),
+                    dbc.CardFooter(
+                        dbc.Button("More infos on HPO", href=f"https://hpo.jax.org/app/browse/term/{hpo_id}", target="_blank", color="primary", className="btn-sm ml-auto", style={"float": "right"}),
+                    ),
+                ],
+                style={"margin-bottom": "2%", "overflow": "auto"},
+            ),
+        html.H2(f"List of nonsense variations associated to {search_value}", style={
+        "text-align": "left", 
+        #"display": "inline-block", # Ceci permet au rectangle bleu de s'adapter à la taille du texte
+        "padding-bottom": "0px" # Ajustez cette valeur pour changer la distance entre le titre et la bordure
+        }),
+        html.Hr(),
+        dbc.Row([
+            dbc.Col([
+                dbc.Row(
+                    id="filter-row-source",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by Source:", style={"font-weight": "bold"}),
+                                dcc.Checklist(
+                                    id="source-checklist",
+                                    options=[
+                                        {'label': 'ClinVar', 'value': 'ClinVar'},
+                                        {'label': 'gnomAD', 'value': 'gnomAD'},
+                                        {'label': 'COSMIC', 'value': 'COSMIC'},
                                     ],
-                                    md=12
+                                    value=['ClinVar', 'gnomAD', 'COSMIC'],
+                                    inline=True
                                 ),
                             ],
-                            className="g-0",
+                            md=12
                         ),
-                        dbc.Row(
-                            id="filter-row-clinical-significance",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by ClinicalSignificance:", style={"font-weight": "bold"}),
-                                        dcc.Checklist(
-                                            id="clinical-significance-checklist",
-                                            options=[
-                                                {"label": "Pathogenic", "value": "Pathogenic"},
-                                                {"label": "Likely pathogenic", "value": "Likely pathogenic"},
-                                                {"label": "Uncertain significance", "value": "Uncertain significance"},
-                                                {"label": "Likely benign", "value": "Likely benign"},
-                                                {"label": "Benign", "value": "Benign"}
-                                            ],
-                                            value=["Pathogenic","Likely pathogenic","Uncertain significance","Likely benign","Benign"],  # Par défaut, toutes les options sont sélectionnées
-                                            inline=True
-                                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-clinical-significance",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by ClinicalSignificance:", style={"font-weight": "bold"}),
+                                dcc.Checklist(
+                                    id="clinical-significance-checklist",
+                                    options=[
+                                        {"label": "Pathogenic", "value": "Pathogenic"},
+                                        {"label": "Likely pathogenic", "value": "Likely pathogenic"},
+                                        {"label": "Uncertain significance", "value": "Uncertain significance"},
+                                        {"label": "Likely benign", "value": "Likely benign"},
+                                        {"label": "Benign", "value": "Benign"}
                                     ],
-                                    md=12
+                                    value=["Pathogenic","Likely pathogenic","Uncertain significance","Likely benign","Benign"],  # Par défaut, toutes les options sont sélectionnées
+                                    inline=True
                                 ),
                             ],
-                            className="g-0",
+                            md=12
                         ),
-                        dbc.Row(
-                            id="filter-row-pos-stop-prot",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by absolute position of the stop codon in the protein:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-pos-stop-prot', type='number', placeholder='Start pos', min=0, value = 1, step=1),
-                                        dcc.Input(id='end-pos-stop-prot', type='number', placeholder='End pos', min=0, step=1)
-                                    ],
-                                    md=12
-                                ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-pos-stop-prot",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by absolute position of the stop codon in the protein:", style={"font-weight": "bold"}),
+                                dcc.Input(id='start-pos-stop-prot', type='number', debounce=True, placeholder='Start pos', min=0, value = 1, step=1),
+                                dcc.Input(id='end-pos-stop-prot', type='number', debounce=True, placeholder='End pos', min=0, step=1)
                             ],
-                            className="g-0",
+                            md=12
                         ),
-                        dbc.Row(
-                            id="filter-row-pos-relative-prot",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by relative position of the stop codon in the protein:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-pos-relative-prot', type='number', placeholder='Start ratio', min=0, max=1,value=0, step=0.01),
-                                        dcc.Input(id='end-pos-relative-prot', type='number', placeholder='End ratio', min=0, max=1,value=1, step=0.01)
-                                    ],
-                                    md=12
-                                ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-pos-relative-prot",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by relative position of the stop codon in the protein:", style={"font-weight": "bold"}),
+                                dcc.Input(id='start-pos-relative-prot', type='number', debounce=True, placeholder='Start ratio', min=0, max=1,value=0, step=0.01),
+                                dcc.Input(id='end-pos-relative-prot', type='number', debounce=True, placeholder='End ratio', min=0, max=1,value=1, step=0.01)
                             ],
-                            className="g-0",
+                            md=12
                         ),
-                        dbc.Row(
-                            id="filter-row-stop-codon",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by stop codon:", style={"font-weight": "bold"}),
-                                        dcc.Checklist(
-                                            id="stop-codon-checklist",
-                                            options=[
-                                                {"label": "TGA", "value": "TGA"},
-                                                {"label": "TAG", "value": "TAG"},
-                                                {"label": "TAA", "value": "TAA"}
-                                            ],
-                                            value=["TGA", "TAG", "TAA"],
-                                            inline=True
-                                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-stop-codon",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by stop codon:", style={"font-weight": "bold"}),
+                                dcc.Checklist(
+                                    id="stop-codon-checklist",
+                                    options=[
+                                        {"label": "TGA", "value": "TGA"},
+                                        {"label": "TAG", "value": "TAG"},
+                                        {"label": "TAA", "value": "TAA"}
                                     ],
-                                    md=12
+                                    value=["TGA", "TAG", "TAA"],
+                                    inline=True
                                 ),
                             ],
-                            className="g-0",
+                            md=12
                         ),
-                        dbc.Row(
-                            id="filter-row-nmd-sensitivity",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by NMD sensitivity:", style={"font-weight": "bold"}),
-                                        dcc.Checklist(
-                                            id="nmd-sensitivity-checklist",
-                                            options=[
-                                                {'label': 'Sensitive', 'value': 'sensitive'},
-                                                {'label': 'Insensitive', 'value': 'insensitive'}
-                                            ],
-                                            value=['sensitive', 'insensitive'],
-                                            inline=True
-                                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-nmd-sensitivity",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by NMD sensitivity:", style={"font-weight": "bold"}),
+                                dcc.Checklist(
+                                    id="nmd-sensitivity-checklist",
+                                    options=[
+                                        {'label': 'Sensitive', 'value': 'sensitive'},
+                                        {'label': 'Insensitive', 'value': 'insensitive'}
                                     ],
-                                    md=12
+                                    value=['sensitive', 'insensitive'],
+                                    inline=True
                                 ),
                             ],
-                            className="g-0",
+                            md=12
                         ),
-                        dbc.Row(
-                            id="filter-row-af-worldwide",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by worldwide allele frequency:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-af-worldwide', type='number', placeholder='Min AF', min=0, max=1, step=1e-10),
-                                        dcc.Input(id='end-af-worldwide', type='number', placeholder='Max AF', min=0, max=1, step=1e-10)
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-af-worldwide",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by worldwide allele frequency:", style={"font-weight": "bold"}),
+                                dcc.Input(id='start-af-worldwide', type='number', debounce=True, placeholder='Min AF', min=0, max=1, step=1e-10),
+                                dcc.Input(id='end-af-worldwide', type='number', debounce=True, placeholder='Max AF', min=0, max=1, step=1e-10)
+                            ],
+                            md=12
+                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    id="filter-row-overlapping-domain",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Filter by overlapping domain:", style={"font-weight": "bold"}),
+                                dcc.Checklist(
+                                    id="overlapping-domain-checklist",
+                                    options=[
+                                        {'label': 'Overlapping', 'value': 'overlapping'},
+                                        {'label': 'Non-Overlapping', 'value': 'non-overlapping'}
                                     ],
-                                    md=12
+                                    value=['overlapping', 'non-overlapping'],
+                                    inline=True
                                 ),
                             ],
-                            className="g-0",
+                            md=12
                         ),
-                        dbc.Row(
-                            id="filter-row-overlapping-domain",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by overlapping domain:", style={"font-weight": "bold"}),
-                                        dcc.Checklist(
-                                            id="overlapping-domain-checklist",
-                                            options=[
-                                                {'label': 'Overlapping', 'value': 'overlapping'},
-                                                {'label': 'Non-Overlapping', 'value': 'non-overlapping'}
-                                            ],
-                                            value=['overlapping', 'non-overlapping'],
-                                            inline=True
-                                        ),
+                    ],
+                    className="g-0",
+                ),
+                dbc.Row(
+                    dbc.Col(
+                        dbc.Button("Apply Filter", id="filter-button", color="primary"),
+                        width={"size": 6, "offset": 3},
+                    ),
+                    className="mb-3",
+                ),
+                # Filtrage à chaque modification des filtres, sans passer par le bouton
+                dbc.Row(
+                    dbc.Col(
+                        [
+                            dbc.Switch(id="live-filter", label="Live filtering", value=False),
+                            dcc.Store(id="live-filter-trigger"),
+                            dcc.Store(id="deferred-filter"),
+                        ],
+                        width={"size": 6, "offset": 3},
+                    ),
+                    className="mb-3",
+                ),
+                dbc.Row(
+                    id="filter-row-export-format",
+                    children=[
+                        dbc.Col(
+                            [
+                                html.Label("Download format:", style={"font-weight": "bold"}),
+                                dcc.RadioItems(
+                                    id="export-format",
+                                    options=[
+                                        {'label': 'CSV', 'value': 'csv'},
+                                        {'label': 'Parquet', 'value': 'parquet'},
+                                        {'label': 'Arrow IPC', 'value': 'arrow'},
                                     ],
-                                    md=12
+                                    value='csv',
+                                    inline=False
                                 ),
                             ],
-                            className="g-0",
-                        ),
-                        dbc.Row(
-                            dbc.Col(
-                                dbc.Button("Apply Filter", id="filter-button", color="primary"),
-                                width={"size": 6, "offset": 3},
-                            ),
-                            className="mb-3",
+                            md=12
                         ),
-                    ], width=2),
-                    dbc.Col([
-                        dcc.Tabs([
-                            dcc.Tab(id='tab-variations',
-                                label=f"{disease_df.drop_duplicates(subset=['HGVSG'])['HGVSG'].nunique()} variations",
-                                children=[
-                                    dcc.Graph(
-                                    id='patho-bar-chart',
-                                figure=fig_patho
-                            ),
-                                dcc.Graph(
-                                id='NMD-pie-chart',
-                                figure=fig_nmd
-                            ),
-                            ]),
-                            dcc.Tab(id='tab-genes',
-                                label=f"{disease_df.drop_duplicates(subset=['HGVSG'])['symbol'].nunique()} genes", children=[
-                                dcc.Graph(
+                    ],
+                    className="g-0",
+                ),
+            ], width=2),
+            dbc.Col([
+                dcc.Tabs([
+                    dcc.Tab(id='tab-variations',
+                        label=f"{phenotype_df.drop_duplicates(subset=['HGVSG'])['HGVSG'].nunique()} variations",
+                        children=[
+                        dcc.Graph(
+                            id='patho-bar-chart',
+                            figure=fig_patho
+                    ),
+                        dcc.Graph(
+                            id='NMD-pie-chart',
+                            figure=fig_nmd
+                    ),
+                    ]),
+                    dcc.Tab(id='tab-genes',
+                        label=f"{phenotype_df.drop_duplicates(subset=['HGVSG'])['symbol'].nunique()} genes",
+                        children=[
+                            dcc.Graph(
                                 id='top-genes-bar-chart',
                                 figure=fig_top_genes
-                                ),
-                                dash_table.DataTable(
-                                        id='table-genes',
-                                        data=genes_frequency_df.to_dict("records"),
-                                        columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(genes_frequency_df[i]) else None} for i in genes_frequency_df.columns],
-                                        style_cell={
-                                        'whiteSpace': 'normal',
-                                        'height': 'auto',
-                                        'minWidth': 150,
-                                        'font-family': 'system-ui',
-                                            },
-                                        style_cell_conditional=[
-                                            {'if': {'column_id': c},
-                                            'textAlign': 'center'} for c in genes_frequency_df.columns],
-                                        style_data_conditional=[
-                                            {
-                                                'if': {'row_index': 'odd'},
-                                                'backgroundColor': 'rgb(211, 211, 211)'
-                                            }
-                                        ],
-                                        style_header={
-                                            'whiteSpace': 'normal',
-                                            'height': 'auto',
-                                            'width': 'auto',
-                                            'backgroundColor': 'rgb(230, 230, 230)',
-                                            'fontWeight': 'bold',
-                                            'fontSize': '12px'
-                                        },
-                                        style_table={'overflowX': 'auto'},
-                                        style_as_list_view=True,
-                                        filter_action='none',
-                                        filter_query='',
-                                        sort_action='native',
-                                        sort_mode='multi',
-                                        page_action='native',
-                                        page_current=0,
-                                        page_size=20,
-                                        fixed_rows={'headers': True},
-                                        fixed_columns={'headers': True},
-                                        export_format="none",
-                                        export_headers="none",
-                                    ),
-                                html.Button("Download CSV", id="btn_csv_genes"),
-                                dcc.Download(id="download-dataframe-csv-genes"),
-                                dcc.Graph(
+                            ),
+                            dcc.Graph(
                                 id='needle-plot',
                                 style={'display': 'none'}
-                                ),
-                                html.Div(id='tab-diseases', style={'display': 'none'}),
-                                dcc.Graph(
-                                id='top-diseases-bar-chart',
-                                style={'display': 'none'}
-                                ),
-                                dash_table.DataTable(
-                                        id='table-diseases',
-                                        style_table={'display': 'none'}
-                                    ),
-                            ]),
-                            dcc.Tab(id='tab-phenotypes',
-                                label=f"{disease_df['hpo_name'].nunique()} phenotypes",
-                                children=[
-                                    dcc.Graph(
-                                        id='top-phenotypes-bar-chart',
-                                        style={'display': 'none'}   
-                                    ),
-                                    dash_table.DataTable(
-                                        id='table-phenotypes',
-                                        data=phenotype_frequency_df.to_dict("records"),
-                                        columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(phenotype_frequency_df[i]) else None} for i in phenotype_frequency_df.columns],
-                                        style_cell={
-                                        'whiteSpace': 'normal',
-                                        'height': 'auto',
-                                        'minWidth': 150,
-                                        'font-family': 'system-ui',
-                                            },
-                                        style_cell_conditional=[
-                                            {'if': {'column_id': c},
-                                            'textAlign': 'center'} for c in phenotype_frequency_df.columns],
-                                        style_data_conditional=[
-                                            {
-                                                'if': {'row_index': 'odd'},
-                                                'backgroundColor': 'rgb(211, 211, 211)'
-                                            }
-                                        ],
-                                        style_header={
-                                            'whiteSpace': 'normal',
-                                            'height': 'auto',
-                                            'width': 'auto',
-                                            'backgroundColor': 'rgb(230, 230, 230)',
-                                            'fontWeight': 'bold',
-                                            'fontSize': '12px'
-                                        },
-                                        style_table={'overflowX': 'auto'},
-                                        style_as_list_view=True,
-                                        filter_action='none',
-                                        filter_query='',
-                                        sort_action='native',
-                                        sort_mode='multi',
-                                        page_action='native',
-                                        page_current=0,
-                                        page_size=20,
-                                        fixed_rows={'headers': True},
-                                        fixed_columns={'headers': True},
-                                        export_format="none",
-                                        export_headers="none",
-                                    ),
-                                    html.Button("Download CSV", id="btn_csv_phenotypes"),
-                                    dcc.Download(id="download-dataframe-csv-phenotypes")
-                            ]),
-                            dcc.Tab(label='Table', children=[
-                                dash_table.DataTable(
-                                    id='table-prefiltered',
-                                    data=disease_df.drop(columns=['hpo_name']).drop_duplicates(subset=['HGVSG']).to_dict("records"),
-                                    columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(disease_df.drop(columns=['hpo_name'])[i]) else None} for i in disease_df.drop(columns=['hpo_name']).drop_duplicates(subset=['HGVSG']).columns],
-                                    style_cell={
+                            ),
+                            dash_table.DataTable(
+                                id='table-genes',
+                                data=genes_frequency_df.to_dict("records"),
+                                columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(genes_frequency_df[i]) else None} for i in genes_frequency_df.columns],
+                                style_cell={
+                                'whiteSpace': 'normal',
+                                'height': 'auto',
+                                'minWidth': 150,
+                                'font-family': 'system-ui',
+                                    },
+                                style_cell_conditional=[
+                                    {'if': {'column_id': c},
+                                    'textAlign': 'center'} for c in genes_frequency_df.columns],
+                                style_data_conditional=[
+                                    {
+                                        'if': {'row_index': 'odd'},
+                                        'backgroundColor': 'rgb(211, 211, 211)'
+                                    }
+                                ],
+                                style_header={
                                     'whiteSpace': 'normal',
                                     'height': 'auto',
-                                    'minWidth': 150,
-                                    'font-family': 'system-ui',
-                                        },
-                                    style_cell_conditional=[
-                                        {'if': {'column_id': c},
-                                        'textAlign': 'center'} for c in disease_df.drop(columns=['hpo_name']).drop_duplicates(subset=['HGVSG']).columns],
-                                    style_data_conditional=[
-                                        {
-                                            'if': {'row_index': 'odd'},
-                                            'backgroundColor': 'rgb(211, 211, 211)'
-                                        }
-                                    ],
-                                    style_header={
-                                        'whiteSpace': 'normal',
-                                        'height': 'auto',
-                                        'width': 'auto',
-                                        'backgroundColor': 'rgb(230, 230, 230)',
-                                        'fontWeight': 'bold',
-                                        'fontSize': '12px'
-                                    },
-                                    style_table={'overflowX': 'auto'},
-                                    style_as_list_view=True,
-                                    filter_action='none',
-                                    filter_query='',
-                                    sort_action='native',
-                                    sort_mode='multi',
-                                    page_action='native',
-                                    page_current=0,
-                                    page_size=20,
-                                    fixed_rows={'headers': True},
-                                    fixed_columns={'headers': True},
-                                    export_format="none",
-                                    export_headers="none",
-                                ),
-                                html.Button("Download CSV", id="btn_csv"),
-                                dcc.Download(id="download-dataframe-csv"),
-                            ])
-                        ])
-                    ], width=10),
-                ]),
-                ]),disease_df.to_json(date_format='iso', orient='split')
-        
-        
-        elif category == "phenotype":
-            phenotype_df = driver.execute_query(f"MATCH (v:Variant)-[LOCATED_ON]-(g:Gene)-[CAUSED_BY]-(d:Disease)-[RECOGNIZABLE_BY]-(p:Phenotype) WHERE p.hpo_name = '{search_value}' RETURN p.hpo_id as hpo_id, p.comment as comment, p.definition as definition, d.disorder_name as disease, g.Symbol as symbol, v.HGVSG as HGVSG, v.Merged_Source as Source, v.ClinicalSignificance as ClinicalSignificance, v.pos_stop_prot as pos_stop_prot, v.pos_relative_prot as pos_relative_prot, v.pos_var_cds as pos_var_cds, v.nuc_upstream as nuc_upstream, v.codon_stop as codon_stop, v.nuc_downstream as nuc_downstream, v.exon_localization as exon_localization, v.NMD_sensitivity as NMD_sensitivity, v.AF_ww as AF,v.AF_afr as AF_afr, v.AF_amr as AF_amr, v.AF_asj as AF_asj, v.AF_eas as AF_eas, v.AF_fin as AF_fin, v.AF_mid as AF_mid, v.AF_nfe as AF_nfe, v.AF_sas as AF_sas, v.AF_remaining as AF_remaining, v.overlapping_domain as overlapping_domain, v.Origin as Origin, v.ReviewStatus as ReviewStatus",database_="neo4j",result_transformer_=neo4j.Result.to_df)
-            hpo_id = phenotype_df['hpo_id'].iloc[0]
-            comment = phenotype_df['comment'].iloc[0]
-            definition = phenotype_df['definition'].iloc[0]
-            phenotype_df = phenotype_df.drop(['hpo_id','comment','definition'], axis=1)
-            #phenotype_disease_df = phenotype_df[['disease', 'symbol']].drop_duplicates(subset=['disease', 'symbol'])
-            #phenotype_variation_df = phenotype_df[['symbol','HGVSG', 'Source', 'ClinicalSignificance', 'pos_stop_prot', 'pos_relative_prot', 'pos_var_cds', 'nuc_upstream', 'codon_stop', 'nuc_downstream', 'exon_localization', 'NMD_sensitivity', 'AF', 'AF_afr', 'AF_amr', 'AF_asj', 'AF_eas', 'AF_fin', 'AF_nfe', 'AF_oth', 'Origin', 'ReviewStatus']].drop_duplicates(subset=['HGVSG'])
-            #phenotype_datatable = create_datatable(phenotype_df)
-            # phenotype_graph = driver.execute_query(f"MATCH (p:Phenotype)-[r:RECOGNIZABLE_BY]-(d:Disease)-[c:CAUSED_BY]-(g:Gene)-[l:LOCATED_ON]-(v:Variant) WHERE p.HPO_label = '{search_value}' RETURN p, r, d, g, l, v",database_="neo4j",result_transformer_=neo4j.Result.graph)
-            # phenotype_cyto = create_cyto_elements(phenotype_graph)
-            
-            # nmd_fig_df = phenotype_variation_df.groupby(['ClinicalSignificance', 'NMD_sensitivity']).size().reset_index(name='counts')
-            # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
-
-            # fig_nmd = px.bar(nmd_fig_df, x="ClinicalSignificance", y="counts", color="NMD_sensitivity",              
-            #     title="NMD Sensitivity by Clinical significance",
-            #     labels={'Count':'Count', 'ClinicalSignificance':'ClinicalSignificance'},
-            #     color_discrete_sequence=px.colors.sequential.Plasma_r)
-            # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
-            nmd_fig_df = phenotype_df.drop_duplicates(subset=['HGVSG'])['NMD_sensitivity'].value_counts().reset_index()
-            nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
-            
-            pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
-
-            # Créer le graphique Pie Chart pour 'NMD_sensitivity'
-            fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity',
-                values='Count', 
-                title='Distribution of NMD sensitivity',
-                color_discrete_sequence=pie_colors)
-
-            # Mise à jour de la mise en page
-            fig_nmd.update_layout(legend_title='NMD Sensitivity',
-                font_family="system-ui",
-                title_x=0.5)
-            
-            
-            patho_fig_expanded_sources_df = phenotype_df.drop_duplicates(subset=['HGVSG'])['Source'].str.get_dummies(sep=';')
-
-            # Fusion des sources étendues avec le dataframe original
-            patho_fig_with_sources_df = pd.concat([phenotype_df.drop_duplicates(subset=['HGVSG']), patho_fig_expanded_sources_df], axis=1)
-
-            # Transformation du dataframe en format long pour Plotly
-            patho_fig_melted_df = patho_fig_with_sources_df.melt(id_vars='ClinicalSignificance', 
-                                            value_vars=patho_fig_expanded_sources_df.columns, 
-                                            var_name='Source', value_name='Count')
-
-            # Filtrage des lignes avec un comptage zéro
-            patho_fig_melted_df = patho_fig_melted_df[patho_fig_melted_df['Count'] > 0]
-
-            # Regroupement par Source et ClinicalSignificance et somme des comptages
-            patho_fig_df = patho_fig_melted_df.groupby(['Source', 'ClinicalSignificance']).sum().reset_index()
-            patho_fig_df = patho_fig_df.sort_values(by=['Count'], ascending=False)
-            
-            # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
-            colors_patho = {
-                'Benign': '#1CBE4F',
-                'Likely benign': '#16FF32',
-                'Uncertain significance': '#FBE426',
-                'Likely pathogenic': '#FEAF16',
-                'Pathogenic': '#F6222E'
-            }
-            # Création du graphique Plotly
-            fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
-                        title='Clinical significance by Source',
-                        barmode='stack',
-                        color_discrete_map=colors_patho)
-
-            # Mise à jour de la mise en page
-            fig_patho.update_layout(xaxis_title='Source',
-                                    yaxis_title='Number of Variations',
-                                    legend_title='Clinical Significance',
-                                    font_family="system-ui",
-                                    title_x=0.5)
-            
-            
-            top_genes_df = phenotype_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().head(10).reset_index()
-            top_genes_df.columns = ['Gene', 'Count']
-            
-            genes_frequency_df = pd.DataFrame({'symbol': phenotype_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().index,
-                                       'Number of variations': phenotype_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().values})
-
-            # Créer le graphique à barres
-            fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
-                        title='Top genes',
-                        labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
-            
-            fig_top_genes.update_layout(font_family="system-ui",
-                                        title_x=0.5)
-            
-            
-            disease_counts = phenotype_df['disease'].value_counts().head(10)
-
-            top_diseases_df = disease_counts.reset_index()
-            top_diseases_df.columns = ['Disease', 'Count']
-            
-            disease_frequency_df = pd.DataFrame({'disease_name': phenotype_df['disease'].value_counts().index,
-                                       'Number of variations': phenotype_df['disease'].value_counts().values})
-
-            # Créer le graphique à barres
-            fig_top_diseases = px.bar(top_diseases_df, x='Disease', y='Count', color_discrete_sequence=['#FBE426'],
-                        title='Top diseases',
-                        labels={'Disease': 'Disease', 'Count': 'Number of variations'})
-            
-            fig_top_diseases.update_layout(font_family="system-ui",
-                                        title_x=0.5,
-                                        xaxis_tickangle=-15,
-                                        xaxis_tickfont_size=12)
-
-
-            return html.Div([
-                #html.H2(f"{search_value}", style={"text-align": "center"}),
-                dbc.Card(
-                        [
-                            dbc.CardHeader(f"{search_value}", style={"text-align": "center","font-size": "larger", "font-weight": "bold"}),
-                            dbc.CardBody(
-                                [
-                                    dbc.Row(
-                                        [
-                                            dbc.Col(html.P(f"HPO ID: {hpo_id}"), md=4),
-                                            dbc.Col(html.P(f"Definition: {definition}"), md=4),
-                                            dbc.Col(html.P(f"Comment: {comment}"), md=4),
-                                        ],
-                                        align="start",
-                                    ),
-                                ],
-                                style={"height": "100%", "overflow": "auto", "background-color": "rgba(54, 155, 232, 0.3)"},
+                                    'width': 'auto',
+                                    'backgroundColor': 'rgb(230, 230, 230)',
+                                    'fontWeight': 'bold',
+                                    'fontSize': '12px'
+                                },
+                                style_table={'overflowX': 'auto'},
+                                style_as_list_view=True,
+                                filter_action='none',
+                                filter_query='',
+                                sort_action='native',
+                                sort_mode='multi',
+                                page_action='native',
+                                page_current=0,
+                                page_size=20,
+                                fixed_rows={'headers': True},
+                                fixed_columns={'headers': True},
+                                export_format="none",
+                                export_headers="none",
                             ),
-                            dbc.CardFooter(
-                                dbc.Button("More infos on HPO", href=f"https://hpo.jax.org/app/browse/term/{hpo_id}", target="_blank", color="primary", className="btn-sm ml-auto", style={"float": "right"}),
-                            ),
-                        ],
-                        style={"margin-bottom": "2%", "overflow": "auto"},
-                    ),
-                html.H2(f"List of nonsense variations associated to {search_value}", style={
-                "text-align": "left", 
-                #"display": "inline-block", # Ceci permet au rectangle bleu de s'adapter à la taille du texte
-                "padding-bottom": "0px" # Ajustez cette valeur pour changer la distance entre le titre et la bordure
-                }),
-                html.Hr(),
-                dbc.Row([
-                    dbc.Col([
-                        dbc.Row(
-                            id="filter-row-source",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by Source:", style={"font-weight": "bold"}),
-                                        dcc.Checklist(
-                                            id="source-checklist",
-                                            options=[
-                                                {'label': 'ClinVar', 'value': 'ClinVar'},
-                                                {'label': 'gnomAD', 'value': 'gnomAD'},
-                                                {'label': 'COSMIC', 'value': 'COSMIC'},
-                                            ],
-                                            value=['ClinVar', 'gnomAD', 'COSMIC'],
-                                            inline=True
-                                        ),
-                                    ],
-                                    md=12
-                                ),
-                            ],
-                            className="g-0",
-                        ),
-                        dbc.Row(
-                            id="filter-row-clinical-significance",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by ClinicalSignificance:", style={"font-weight": "bold"}),
-                                        dcc.Checklist(
-                                            id="clinical-significance-checklist",
-                                            options=[
-                                                {"label": "Pathogenic", "value": "Pathogenic"},
-                                                {"label": "Likely pathogenic", "value": "Likely pathogenic"},
-                                                {"label": "Uncertain significance", "value": "Uncertain significance"},
-                                                {"label": "Likely benign", "value": "Likely benign"},
-                                                {"label": "Benign", "value": "Benign"}
-                                            ],
-                                            value=["Pathogenic","Likely pathogenic","Uncertain significance","Likely benign","Benign"],  # Par défaut, toutes les options sont sélectionnées
-                                            inline=True
-                                        ),
-                                    ],
-                                    md=12
-                                ),
-                            ],
-                            className="g-0",
-                        ),
-                        dbc.Row(
-                            id="filter-row-pos-stop-prot",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by absolute position of the stop codon in the protein:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-pos-stop-prot', type='number', placeholder='Start pos', min=0, value = 1, step=1),
-                                        dcc.Input(id='end-pos-stop-prot', type='number', placeholder='End pos', min=0, step=1)
-                                    ],
-                                    md=12
-                                ),
-                            ],
-                            className="g-0",
+                            html.Button("Download", id="btn_csv_genes"),
+                            dcc.Download(id="download-dataframe-csv-genes"),
+                    ]),
+                    dcc.Tab(id='tab-diseases',
+                        label=f"{phenotype_df['disease'].nunique()} diseases", children=[
+                        dcc.Graph(
+                        id='top-diseases-bar-chart',
+                        figure=fig_top_diseases
                         ),
-                        dbc.Row(
-                            id="filter-row-pos-relative-prot",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by relative position of the stop codon in the protein:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-pos-relative-prot', type='number', placeholder='Start ratio', min=0, max=1,value=0, step=0.01),
-                                        dcc.Input(id='end-pos-relative-prot', type='number', placeholder='End ratio', min=0, max=1,value=1, step=0.01)
-                                    ],
-                                    md=12
-                                ),
-                            ],
-                            className="g-0",
-                        ),
-                        dbc.Row(
-                            id="filter-row-stop-codon",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by stop codon:", style={"font-weight": "bold"}),
-                                        dcc.Checklist(
-                                            id="stop-codon-checklist",
-                                            options=[
-                                                {"label": "TGA", "value": "TGA"},
-                                                {"label": "TAG", "value": "TAG"},
-                                                {"label": "TAA", "value": "TAA"}
-                                            ],
-                                            value=["TGA", "TAG", "TAA"],
-                                            inline=True
-                                        ),
-                                    ],
-                                    md=12
-                                ),
-                            ],
-                            className="g-0",
-                        ),
-                        dbc.Row(
-                            id="filter-row-nmd-sensitivity",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by NMD sensitivity:", style={"font-weight": "bold"}),
-                                        dcc.Checklist(
-                                            id="nmd-sensitivity-checklist",
-                                            options=[
-                                                {'label': 'Sensitive', 'value': 'sensitive'},
-                                                {'label': 'Insensitive', 'value': 'insensitive'}
-                                            ],
-                                            value=['sensitive', 'insensitive'],
-                                            inline=True
-                                        ),
-                                    ],
-                                    md=12
-                                ),
-                            ],
-                            className="g-0",
-                        ),
-                        dbc.Row(
-                            id="filter-row-af-worldwide",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by worldwide allele frequency:", style={"font-weight": "bold"}),
-                                        dcc.Input(id='start-af-worldwide', type='number', placeholder='Min AF', min=0, max=1, step=1e-10),
-                                        dcc.Input(id='end-af-worldwide', type='number', placeholder='Max AF', min=0, max=1, step=1e-10)
-                                    ],
-                                    md=12
-                                ),
-                            ],
-                            className="g-0",
-                        ),
-                        dbc.Row(
-                            id="filter-row-overlapping-domain",
-                            children=[
-                                dbc.Col(
-                                    [
-                                        html.Label("Filter by overlapping domain:", style={"font-weight": "bold"}),
-                                        dcc.Checklist(
-                                            id="overlapping-domain-checklist",
-                                            options=[
-                                                {'label': 'Overlapping', 'value': 'overlapping'},
-                                                {'label': 'Non-Overlapping', 'value': 'non-overlapping'}
-                                            ],
-                                            value=['overlapping', 'non-overlapping'],
-                                            inline=True
-                                        ),
-                                    ],
-                                    md=12
-                                ),
-                            ],
-                            className="g-0",
-                        ),
-                        dbc.Row(
-                            dbc.Col(
-                                dbc.Button("Apply Filter", id="filter-button", color="primary"),
-                                width={"size": 6, "offset": 3},
+                        dash_table.DataTable(
+                                id='table-diseases',
+                                data=disease_frequency_df.to_dict("records"),
+                                columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(disease_frequency_df[i]) else None} for i in disease_frequency_df.columns],
+                                style_cell={
+                                'whiteSpace': 'normal',
+                                'height': 'auto',
+                                'minWidth': 150,
+                                'font-family': 'system-ui',
+                                    },
+                                style_cell_conditional=[
+                                    {'if': {'column_id': c},
+                                    'textAlign': 'center'} for c in disease_frequency_df.columns],
+                                style_data_conditional=[
+                                    {
+                                        'if': {'row_index': 'odd'},
+                                        'backgroundColor': 'rgb(211, 211, 211)'
+                                    }
+                                ],
+                                style_header={
+                                    'whiteSpace': 'normal',
+                                    'height': 'auto',
+                                    'width': 'auto',
+                                    'backgroundColor': 'rgb(230, 230, 230)',
+                                    'fontWeight': 'bold',
+                                    'fontSize': '12px'
+                                },
+                                style_table={'overflowX': 'auto'},
+                                style_as_list_view=True,
+                                filter_action='none',
+                                filter_query='',
+                                sort_action='native',
+                                sort_mode='multi',
+                                page_action='native',
+                                page_current=0,
+                                page_size=20,
+                                fixed_rows={'headers': True},
+                                fixed_columns={'headers': True},
+                                export_format="none",
+                                export_headers="none",
                             ),
-                            className="mb-3",
+                        html.Button("Download", id="btn_csv_diseases"),
+                        dcc.Download(id="download-dataframe-csv-diseases"),
+                        html.Div(id='tab-phenotypes', style={'display': 'none'}),
+                        dcc.Graph(
+                        id='top-phenotypes-bar-chart',
+                        style={'display': 'none'}
                         ),
-                    ], width=2),
-                    dbc.Col([
-                        dcc.Tabs([
-                            dcc.Tab(id='tab-variations',
-                                label=f"{phenotype_df.drop_duplicates(subset=['HGVSG'])['HGVSG'].nunique()} variations",
-                                children=[
-                                dcc.Graph(
-                                    id='patho-bar-chart',
-                                    figure=fig_patho
-                            ),
-                                dcc.Graph(
-                                    id='NMD-pie-chart',
-                                    figure=fig_nmd
+                        dash_table.DataTable(
+                                id='table-phenotypes',
+                                style_table={'display': 'none'}
                             ),
-                            ]),
-                            dcc.Tab(id='tab-genes',
-                                label=f"{phenotype_df.drop_duplicates(subset=['HGVSG'])['symbol'].nunique()} genes",
-                                children=[
-                                    dcc.Graph(
-                                        id='top-genes-bar-chart',
-                                        figure=fig_top_genes
-                                    ),
-                                    dcc.Graph(
-                                        id='needle-plot',
-                                        style={'display': 'none'}
-                                    ),
-                                    dash_table.DataTable(
-                                        id='table-genes',
-                                        data=genes_frequency_df.to_dict("records"),
-                                        columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(genes_frequency_df[i]) else None} for i in genes_frequency_df.columns],
-                                        style_cell={
-                                        'whiteSpace': 'normal',
-                                        'height': 'auto',
-                                        'minWidth': 150,
-                                        'font-family': 'system-ui',
-                                            },
-                                        style_cell_conditional=[
-                                            {'if': {'column_id': c},
-                                            'textAlign': 'center'} for c in genes_frequency_df.columns],
-                                        style_data_conditional=[
-                                            {
-                                                'if': {'row_index': 'odd'},
-                                                'backgroundColor': 'rgb(211, 211, 211)'
-                                            }
-                                        ],
-                                        style_header={
-                                            'whiteSpace': 'normal',
-                                            'height': 'auto',
-                                            'width': 'auto',
-                                            'backgroundColor': 'rgb(230, 230, 230)',
-                                            'fontWeight': 'bold',
-                                            'fontSize': '12px'
-                                        },
-                                        style_table={'overflowX': 'auto'},
-                                        style_as_list_view=True,
-                                        filter_action='none',
-                                        filter_query='',
-                                        sort_action='native',
-                                        sort_mode='multi',
-                                        page_action='native',
-                                        page_current=0,
-                                        page_size=20,
-                                        fixed_rows={'headers': True},
-                                        fixed_columns={'headers': True},
-                                        export_format="none",
-                                        export_headers="none",
-                                    ),
-                                    html.Button("Download CSV", id="btn_csv_genes"),
-                                    dcc.Download(id="download-dataframe-csv-genes"),
-                            ]),
-                            dcc.Tab(id='tab-diseases',
-                                label=f"{phenotype_df['disease'].nunique()} diseases", children=[
-                                dcc.Graph(
-                                id='top-diseases-bar-chart',
-                                figure=fig_top_diseases
-                                ),
-                                dash_table.DataTable(
-                                        id='table-diseases',
-                                        data=disease_frequency_df.to_dict("records"),
-                                        columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(disease_frequency_df[i]) else None} for i in disease_frequency_df.columns],
-                                        style_cell={
-                                        'whiteSpace': 'normal',
-                                        'height': 'auto',
-                                        'minWidth': 150,
-                                        'font-family': 'system-ui',
-                                            },
-                                        style_cell_conditional=[
-                                            {'if': {'column_id': c},
-                                            'textAlign': 'center'} for c in disease_frequency_df.columns],
-                                        style_data_conditional=[
-                                            {
-                                                'if': {'row_index': 'odd'},
-                                                'backgroundColor': 'rgb(211, 211, 211)'
-                                            }
-                                        ],
-                                        style_header={
-                                            'whiteSpace': 'normal',
-                                            'height': 'auto',
-                                            'width': 'auto',
-                                            'backgroundColor': 'rgb(230, 230, 230)',
-                                            'fontWeight': 'bold',
-                                            'fontSize': '12px'
-                                        },
-                                        style_table={'overflowX': 'auto'},
-                                        style_as_list_view=True,
-                                        filter_action='none',
-                                        filter_query='',
-                                        sort_action='native',
-                                        sort_mode='multi',
-                                        page_action='native',
-                                        page_current=0,
-                                        page_size=20,
-                                        fixed_rows={'headers': True},
-                                        fixed_columns={'headers': True},
-                                        export_format="none",
-                                        export_headers="none",
-                                    ),
-                                html.Button("Download CSV", id="btn_csv_diseases"),
-                                dcc.Download(id="download-dataframe-csv-diseases"),
-                                html.Div(id='tab-phenotypes', style={'display': 'none'}),
-                                dcc.Graph(
-                                id='top-phenotypes-bar-chart',
-                                style={'display': 'none'}
-                                ),
-                                dash_table.DataTable(
-                                        id='table-phenotypes',
-                                        style_table={'display': 'none'}
-                                    ),
-                            ]),
-                            dcc.Tab(label='Table', children=[
-                                dash_table.DataTable(
-                                    id='table-prefiltered',
-                                    data=phenotype_df.drop(columns=['disease']).drop_duplicates(subset=['HGVSG']).to_dict("records"),
-                                    columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(phenotype_df.drop(columns=['disease'])[i]) else None} for i in phenotype_df.drop(columns=['disease']).drop_duplicates(subset=['HGVSG']).columns],
-                                    style_cell={
-                                    'whiteSpace': 'normal',
-                                    'height': 'auto',
-                                    'minWidth': 150,
-                                    'font-family': 'system-ui',
-                                        },
-                                    style_cell_conditional=[
-                                        {'if': {'column_id': c},
-                                        'textAlign': 'center'} for c in phenotype_df.drop(columns=['disease']).drop_duplicates(subset=['HGVSG']).columns],
-                                    style_data_conditional=[
-                                        {
-                                            'if': {'row_index': 'odd'},
-                                            'backgroundColor': 'rgb(211, 211, 211)'
-                                        }
-                                    ],
-                                    style_header={
-                                        'whiteSpace': 'normal',
-                                        'height': 'auto',
-                                        'width': 'auto',
-                                        'backgroundColor': 'rgb(230, 230, 230)',
-                                        'fontWeight': 'bold',
-                                        'fontSize': '12px'
-                                    },
-                                    style_table={'overflowX': 'auto'},
-                                    style_as_list_view=True,
-                                    filter_action='none',
-                                    filter_query='',
-                                    sort_action='native',
-                                    sort_mode='multi',
-                                    page_action='native',
-                                    page_current=0,
-                                    page_size=20,
-                                    fixed_rows={'headers': True},
-                                    fixed_columns={'headers': True},
-                                    export_format="none",
-                                    export_headers="none",
-                                ),
-                                html.Button("Download CSV", id="btn_csv"),
-                                dcc.Download(id="download-dataframe-csv"),
-                            ])
-                        ])
-                    ], width=10),
-                ]),
-                ]),phenotype_df.to_json(date_format='iso', orient='split')
-        
-        
-        
-        # elif category == "variation":
-        #     query = f"MATCH (v:Variant)-[LOCATED_ON]-(g:Gene) WHERE v.HGVSG = '{search_value}' RETURN g.Symbol, v.HGVSG as HGVSG"
+                    ]),
+                    dcc.Tab(label='Table', children=[
+                        dash_table.DataTable(
+                            id='table-prefiltered',
+                            data=table_data,
+                            columns=[{"name": i, "id": i,'hideable':True, 'type': 'numeric' if pd.api.types.is_numeric_dtype(phenotype_df.drop(columns=['disease'])[i]) else None} for i in phenotype_df.drop(columns=['disease']).drop_duplicates(subset=['HGVSG']).columns],
+                            style_cell={
+                            'whiteSpace': 'normal',
+                            'height': 'auto',
+                            'minWidth': 150,
+                            'font-family': 'system-ui',
+                                },
+                            style_cell_conditional=[
+                                {'if': {'column_id': c},
+                                'textAlign': 'center'} for c in phenotype_df.drop(columns=['disease']).drop_duplicates(subset=['HGVSG']).columns],
+                            style_data_conditional=[
+                                {
+                                    'if': {'row_index': 'odd'},
+                                    'backgroundColor': 'rgb(211, 211, 211)'
+                                }
+                            ],
+                            style_header={
+                                'whiteSpace': 'normal',
+                                'height': 'auto',
+                                'width': 'auto',
+                                'backgroundColor': 'rgb(230, 230, 230)',
+                                'fontWeight': 'bold',
+                                'fontSize': '12px'
+                            },
+                            style_table={'overflowX': 'auto'},
+                            style_as_list_view=True,
+                            filter_action='none',
+                            filter_query='',
+                            sort_action='custom',
+                            sort_mode='multi',
+                            page_action='custom',
+                            page_count=table_page_count,
+                            page_current=0,
+                            page_size=20,
+                            fixed_rows={'headers': True},
+                            fixed_columns={'headers': True},
+                            export_format="none",
+                            export_headers="none",
+                        ),
+                        html.A(html.Button("Download"), id="download-link", href=export_url(table_query), download="data.csv.gz"),
+                    ])
+                ])
+            ], width=10),
+        ]),
+        ]),result_key
 
-    #     results = db_manager.run_query(query)
+@app.callback(
+    Output("phenotype-search", "data"),
+    [Input("search-button", "n_clicks")],
+    [State("category-dropdown", "value"), State("search-dropdown", "value")],
+    prevent_initial_call=True
+)
+def start_phenotype_search(n_clicks, category, search_value):
+    # Only the phenotype searches start a background job, the click count makes a repeated search a new value
+    if n_clicks > 0 and search_value is not None and category == "phenotype":
+        return {'search': n_clicks, 'value': search_value}
+    raise dash.exceptions.PreventUpdate
 
-    #     df = pd.DataFrame([dict(record) for record in results])
+@app.callback(
+    [Output("loading-output", "children", allow_duplicate=True),
+     Output("stored-df","data", allow_duplicate=True)],
+    [Input("phenotype-search", "data")],
+    background=True,
+    running=[(Output("search-button", "disabled"), True, False),
+             (Output("search-job", "style"), {"margin-top": "2%"}, {"display": "none"})],
+    progress=[Output("search-progress", "value"), Output("search-progress", "max"), Output("search-progress", "label")],
+    cancel=[Input("cancel-button", "n_clicks")],
+    prevent_initial_call=True
+)
+def execute_background_search(set_progress, phenotype_search_data):
+    # Runs in a separate process, the server workers stay available for the other requests
+    return phenotype_search(set_progress, phenotype_search_data['value'])
+
+
+# Controls of the filter panel, in the order of the FilterSpec arguments
+FILTER_CONTROLS = [("source-checklist", "value"),
+                   ("clinical-significance-checklist", "value"),
+                   ("start-pos-stop-prot", "value"),
+                   ("end-pos-stop-prot", "value"),
+                   ("start-pos-relative-prot", "value"),
+                   ("end-pos-relative-prot", "value"),
+                   ("stop-codon-checklist", "value"),
+                   ("nmd-sensitivity-checklist", "value"),
+                   ("start-af-worldwide", "value"),
+                   ("end-af-worldwide", "value"),
+                   ("overlapping-domain-checklist", "value")]
+
+# Outputs of a filtering, the table query first and the page of the variant table last
+FILTER_OUTPUTS = [("table-query", "data"),
+                  ("patho-bar-chart", "figure"),
+                  ("NMD-pie-chart", "figure"),
+                  ("top-genes-bar-chart", "figure"),
+                  ("top-diseases-bar-chart", "figure"),
+                  ("top-phenotypes-bar-chart", "figure"),
+                  ("needle-plot", "mutationData"),
+                  ("needle-plot", "needleStyle"),
+                  ("tab-variations", "label"),
+                  ("tab-genes", "label"),
+                  ("tab-diseases", "label"),
+                  ("tab-phenotypes", "label"),
+                  ("table-genes", "data"),
+                  ("table-diseases", "data"),
+                  ("table-phenotypes", "data"),
+                  ("table-prefiltered", "page_current")]
+
+# Live filtering sends the table first, the charts follow in a second request when filtering the table
+# has taken more than half of this budget (milliseconds)
+LIVE_FILTER_BUDGET_MS = float(os.getenv('STOPKB_LIVE_FILTER_BUDGET_MS', 300))
+
+# Checklists of the filter panel, with the column they filter
+FACET_CHECKLISTS = [("source-checklist", "Source"),
+                    ("clinical-significance-checklist", "ClinicalSignificance"),
+                    ("stop-codon-checklist", "codon_stop"),
+                    ("nmd-sensitivity-checklist", "NMD_sensitivity"),
+                    ("overlapping-domain-checklist", "overlapping_domain")]
+
+def facet_counts(table_query):
+    # Number of variations per option of every checklist, given the other filters of the table query
+    spec = FilterSpec.from_values(table_query.get('filters'))
+    if table_query['category'] in ROW_SET_CATEGORIES:
+        rows = get_rows(table_query['data'])
+        if rows is None:
+            raise dash.exceptions.PreventUpdate
+        return spec.facet_counts(store, rows)
+    if table_query['category'] == "StopKB":
+        return spec.facet_counts(store)
+    # One row per variation in the disease and phenotype results, as in the variant table
+    df = search_frame(table_query)
+    return spec.facet_counts(FrameColumns(df), table_rows(table_query, df, np.arange(len(df))))
 
-    #     return dash_table.DataTable(
-    #         data=df.to_dict("records"),
-    #         columns=[{"name": i, "id": i} for i in df.columns],
-    #         style_cell_conditional=[
-    #     {'if': {'column_id': c},
-    #      'textAlign': 'left'} for c in df.columns],
-    # style_data_conditional=[
-    #     {
-    #         'if': {'row_index': 'odd'},
-    #         'backgroundColor': 'rgb(248, 248, 248)'
-    #     }
-    # ],
-    # style_header={
-    #     'backgroundColor': 'rgb(230, 230, 230)',
-    #     'fontWeight': 'bold'
-    # },
-    # filter_action='none',
-    # sort_action="native",
-    # export_format="csv",
-    #     )
-    else:
+@app.callback(
+    [Output(checklist, "options") for checklist, _ in FACET_CHECKLISTS],
+    [Input(*control) for control in FILTER_CONTROLS],
+    [State("table-query", "data")] + [State(checklist, "options") for checklist, _ in FACET_CHECKLISTS]
+)
+def update_filter_counts(source_values, clinical_significance_values, start_pos_stop_prot_value, end_pos_stop_prot_value, start_pos_relative_value, end_pos_relative_value, stop_codon_values, nmd_sensitivity_values, start_af_worldwide_value, end_af_worldwide_value, overlapping_domain_values, table_query, *checklist_options):
+    # Each option shows how many variations it would keep with the other filters as they are set,
+    # only the labels are sent back, the tables and charts wait for the Apply Filter button.
+    # The range inputs are debounced: their value, and the counts, change on Enter or when they lose focus.
+    if not table_query:
         raise dash.exceptions.PreventUpdate
-    
+    filters = FilterSpec(source_values, clinical_significance_values, start_pos_stop_prot_value, end_pos_stop_prot_value, start_pos_relative_value, end_pos_relative_value, stop_codon_values, nmd_sensitivity_values, start_af_worldwide_value, end_af_worldwide_value, overlapping_domain_values).values
+    query = {'category': table_query['category'], 'data': table_query.get('data'), 'filters': filters}
+    key = make_key('facet_counts', store.version, query['category'], query['data'], *FilterSpec.key_values(filters))
+    counts = cached(aggregate_cache, key, lambda: facet_counts(query))
+    return [[{**option, 'label': f"{re.sub(r' [(][0-9,]+[)]$', '', option['label'])} ({counts[column].get(option['value'], 0):,})"} for option in options]
+            for (_, column), options in zip(FACET_CHECKLISTS, checklist_options)]
+
+
 @app.callback(
-    [Output("table-prefiltered", "data"),
-     Output("patho-bar-chart", "figure"),
-     Output("NMD-pie-chart", "figure"),
-     Output("top-genes-bar-chart", "figure"),
-     Output("top-diseases-bar-chart", "figure"),
-     Output("top-phenotypes-bar-chart", "figure"),
-     Output("needle-plot", "mutationData"),
-     Output("needle-plot", "needleStyle"),
-     Output("tab-variations", "label"),
-     Output("tab-genes", "label"),
-     Output("tab-diseases", "label"),
-     Output("tab-phenotypes", "label"),
-     Output("table-genes", "data"),
-     Output("table-diseases", "data"),
-     Output("table-phenotypes", "data"),],
+    [Output(*output) for output in FILTER_OUTPUTS],
     [Input("filter-button", "n_clicks"),
      Input("stored-df", "data")],
     [State("source-checklist", "value"),
@@ -2269,742 +2624,729 @@ def execute_search(n_clicks, category, search_value):
      State("end-af-worldwide", "value"),
      State("overlapping-domain-checklist", "value"),
      State("category-dropdown", "value"), 
-     State("search-dropdown", "value")]
+     State("search-dropdown", "value"),
+     State("table-query", "data")]
 )
-def filter_data(n_clicks, data, source_values, clinical_significance_values, start_pos_stop_prot_value, end_pos_stop_prot_value, start_pos_relative_value, end_pos_relative_value, stop_codon_values, nmd_sensitivity_values, start_af_worldwide_value, end_af_worldwide_value, overlapping_domain_values, category, search_value):
+def filter_data(n_clicks, data, source_values, clinical_significance_values, start_pos_stop_prot_value, end_pos_stop_prot_value, start_pos_relative_value, end_pos_relative_value, stop_codon_values, nmd_sensitivity_values, start_af_worldwide_value, end_af_worldwide_value, overlapping_domain_values, category, search_value, previous_query=None):
     if n_clicks > 0:
-        # Choose the query based on the category
-        if category == "StopKB":
-            #StopKB_df = pd.read_json(data, orient='split')
-            # Apply filtering based on Source
-            filtered_df = StopKB_df[StopKB_df["Source"].apply(lambda x: any(source in x.split(';') for source in source_values))]
-            
-            # Apply filtering based on ClinicalSignificance
-            filtered_df = filtered_df[filtered_df["ClinicalSignificance"].isin(clinical_significance_values)]
-
-            # Apply filtering based on absolute position of the stop codon in the protein
-            if start_pos_stop_prot_value is not None and end_pos_stop_prot_value is not None:
-                filtered_df = filtered_df[filtered_df["pos_stop_prot"].between(start_pos_stop_prot_value, end_pos_stop_prot_value)]
-            
-            # Apply filtering based on relative position of the stop codon in the protein
-            if start_pos_relative_value is not None and end_pos_relative_value is not None:
-                filtered_df = filtered_df[filtered_df["pos_relative_prot"].between(start_pos_relative_value, end_pos_relative_value)]
-
-            # Apply filtering based on stop codon
-            filtered_df = filtered_df[filtered_df["codon_stop"].isin(stop_codon_values)]
-            
-            # Apply filtering based on NMD sensitivity
-            filtered_df = filtered_df[filtered_df["NMD_sensitivity"].isin(nmd_sensitivity_values)]
-            
-            # Apply filtering based on worldwide allele frequency
-            if start_af_worldwide_value is not None and end_af_worldwide_value is not None:
-                filtered_df = filtered_df[filtered_df["AF"].between(start_af_worldwide_value, end_af_worldwide_value)]
-            
-            # Apply filtering based on overlapping_domain   
-            if 'overlapping' in overlapping_domain_values and 'non-overlapping' in overlapping_domain_values:
-                # No filtering if the two options are selected
-                pass
-            elif 'overlapping' in overlapping_domain_values:
-                filtered_df = filtered_df[filtered_df['overlapping_domain'].notna()]
-            elif 'non-overlapping' in overlapping_domain_values:
-                filtered_df = filtered_df[filtered_df['overlapping_domain'].isna()]
-            
-            filtered_preview_df = filtered_df.iloc[:1000]
-
-            # nmd_fig_df = filtered_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
-            # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
-
-            # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
-            #     title="NMD Sensitivity by Source",
-            #     labels={'Count':'Count', 'Source':'Source'},
-            #     color_discrete_sequence=px.colors.sequential.Plasma_r)
-            # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
-            
-            nmd_fig_df = filtered_df['NMD_sensitivity'].value_counts().reset_index()
-            nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
-            
-            pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
-
-            # Créer le graphique Pie Chart pour 'NMD_sensitivity'
-            fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity', values='Count', 
-                 title='Distribution of NMD sensitivity',
-                 color_discrete_sequence=pie_colors)
-
-            # Mise à jour de la mise en page
-            fig_nmd.update_layout(legend_title='NMD Sensitivity')
-            
-            patho_fig_expanded_sources_df = filtered_df['Source'].str.get_dummies(sep=';')
-
-            # Fusion des sources étendues avec le dataframe original
-            patho_fig_with_sources_df = pd.concat([StopKB_df, patho_fig_expanded_sources_df], axis=1)
-
-            # Transformation du dataframe en format long pour Plotly
-            patho_fig_melted_df = patho_fig_with_sources_df.melt(id_vars='ClinicalSignificance', 
-                                            value_vars=patho_fig_expanded_sources_df.columns, 
-                                            var_name='Source', value_name='Count')
-
-            # Filtrage des lignes avec un comptage zéro
-            patho_fig_melted_df = patho_fig_melted_df[patho_fig_melted_df['Count'] > 0]
-
-            # Regroupement par Source et ClinicalSignificance et somme des comptages
-            patho_fig_df = patho_fig_melted_df.groupby(['Source', 'ClinicalSignificance']).sum().reset_index()
-            patho_fig_df = patho_fig_df.sort_values(by=['Count'], ascending=False)
-            
-            # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
-            colors_patho = {
-                'Benign': '#1CBE4F',
-                'Likely benign': '#16FF32',
-                'Uncertain significance': '#FBE426',
-                'Likely pathogenic': '#FEAF16',
-                'Pathogenic': '#F6222E'
-            }
-            # Création du graphique Plotly
-            fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
-                        title='Clinical significance by Source',
-                        barmode='stack',
-                        color_discrete_map=colors_patho)
-
-            # Mise à jour de la mise en page
-            fig_patho.update_layout(xaxis_title='Source',
-                                    yaxis_title='Number of Variations',
-                                    legend_title='Clinical Significance',
-                                    font_family="system-ui",
-                                    title_x=0.5)
-            
-            top_genes_df = filtered_df['symbol'].value_counts().head(10).reset_index()
-            top_genes_df.columns = ['Gene', 'Count']
-            
-            genes_frequency_df = pd.DataFrame({'symbol': filtered_df['symbol'].value_counts().index,
-                                       'Number of variations': filtered_df['symbol'].value_counts().values})
-
-            # Créer le graphique à barres
-            fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
-                        title='Top genes',
-                        labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
-            
-            fig_top_genes.update_layout(font_family="system-ui",
-                                        title_x=0.5)
-            
-            
-            exploded_diseases = filtered_df['disease_name'].str.split('; ').explode()
-            disease_counts = exploded_diseases.value_counts().head(10)
-
-            # Créer un DataFrame pour le graphique
-            top_diseases_df = disease_counts.reset_index()
-            top_diseases_df.columns = ['Disease', 'Count']
-            
-            disease_frequency_df = pd.DataFrame({'disease_name': exploded_diseases.value_counts().index,
-                                       'Number of variations': exploded_diseases.value_counts().values})
-
-            # Créer le graphique à barres
-            fig_top_diseases = px.bar(top_diseases_df, x='Disease', y='Count', color_discrete_sequence=['#FBE426'],
-                        title='Top diseases',
-                        labels={'Disease': 'Disease', 'Count': 'Number of variations'})
-            
-            fig_top_diseases.update_layout(font_family="system-ui",
-                                        title_x=0.5,
-                                        xaxis_tickangle=-15,
-                                        xaxis_tickfont_size=12)
-            
-            exploded_phenotypes = filtered_df['phenotype_name'].str.split('; ').explode()
-            phenotype_counts = exploded_phenotypes.value_counts().head(10)
-
-            # Créer un DataFrame pour le graphique
-            top_phenotypes_df = phenotype_counts.reset_index()
-            top_phenotypes_df.columns = ['Phenotype', 'Count']
-            
-            phenotype_frequency_df = pd.DataFrame({'phenotype_name': exploded_phenotypes.value_counts().index,
-                                       'Number of variations': exploded_phenotypes.value_counts().values})
-
-            # Créer le graphique à barres
-            fig_top_phenotypes = px.bar(top_phenotypes_df, x='Phenotype', y='Count', color_discrete_sequence=['#FA0087'],
-                        title='Top phenotypes',
-                        labels={'Phenotype': 'Phenotype', 'Count': 'Number of variations'})
-            
-            fig_top_phenotypes.update_layout(font_family="system-ui",
-                                        title_x=0.5,
-                                        xaxis_tickangle=-15,
-                                        xaxis_tickfont_size=12)
-            
-            tab_variations = f"{filtered_df['HGVSG'].nunique()} variations"
-            
-            tab_genes = f"{filtered_df['symbol'].nunique()} genes"
-            
-            tab_diseases = f"{exploded_diseases.nunique()} diseases"
-            
-            tab_phenotypes = f"{exploded_phenotypes.nunique()} phenotypes"
-            
-            return filtered_preview_df.to_dict("records"), fig_patho, fig_nmd, fig_top_genes, fig_top_diseases, fig_top_phenotypes, dash.no_update, dash.no_update, tab_variations, tab_genes, tab_diseases, tab_phenotypes, genes_frequency_df.to_dict("records"), disease_frequency_df.to_dict("records"), phenotype_frequency_df.to_dict("records")
-        
-        elif category == "gene":
-            gene_df = pd.read_json(data, orient='split')
-            
-            # Apply filtering based on Source
-            filtered_df = gene_df[gene_df["Source"].apply(lambda x: any(source in x.split(';') for source in source_values))]
-            
-            # Apply filtering based on ClinicalSignificance
-            filtered_df = filtered_df[filtered_df["ClinicalSignificance"].isin(clinical_significance_values)]
-
-            # Apply filtering based on absolute position of the stop codon in the protein
-            if start_pos_stop_prot_value is not None and end_pos_stop_prot_value is not None:
-                filtered_df = filtered_df[filtered_df["pos_stop_prot"].between(start_pos_stop_prot_value, end_pos_stop_prot_value)]
-            
-            # Apply filtering based on relative position of the stop codon in the protein
-            if start_pos_relative_value is not None and end_pos_relative_value is not None:
-                filtered_df = filtered_df[filtered_df["pos_relative_prot"].between(start_pos_relative_value, end_pos_relative_value)]
-
-            # Apply filtering based on stop codon
-            filtered_df = filtered_df[filtered_df["codon_stop"].isin(stop_codon_values)]
-            
-            # Apply filtering based on NMD sensitivity
-            filtered_df = filtered_df[filtered_df["NMD_sensitivity"].isin(nmd_sensitivity_values)]
-            
-            # Apply filtering based on worldwide allele frequency
-            if start_af_worldwide_value is not None and end_af_worldwide_value is not None:
-                filtered_df = filtered_df[filtered_df["AF"].between(start_af_worldwide_value, end_af_worldwide_value)]
-                
-            # Apply filtering based on overlapping_domain   
-            if 'overlapping' in overlapping_domain_values and 'non-overlapping' in overlapping_domain_values:
-                # No filtering if the two options are selected
-                pass
-            elif 'overlapping' in overlapping_domain_values:
-                filtered_df = filtered_df[filtered_df['overlapping_domain'].notna()]
-            elif 'non-overlapping' in overlapping_domain_values:
-                filtered_df = filtered_df[filtered_df['overlapping_domain'].isna()]
-                
-            unique_StopKB_df = StopKB_df.drop_duplicates(subset='symbol')
-                
-            fig_df = pd.merge(filtered_df, unique_StopKB_df[['symbol', 'disease_name', 'phenotype_name']], how='left', on='symbol')
-                
-            # nmd_fig_df = filtered_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
-            # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
-
-            # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
-            #     title="NMD Sensitivity by Source",
-            #     labels={'Count':'Count', 'Source':'Source'},
-            #     color_discrete_sequence=px.colors.sequential.Plasma_r)
-            # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
-                        
-            nmd_fig_df = fig_df['NMD_sensitivity'].value_counts().reset_index()
-            nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
-            
-            pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
-
-            # Créer le graphique Pie Chart pour 'NMD_sensitivity'
-            fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity',
-                values='Count', 
-                title='Distribution of NMD sensitivity',
-                color_discrete_sequence=pie_colors)
-
-            # Mise à jour de la mise en page
-            fig_nmd.update_layout(legend_title='NMD Sensitivity',
-                font_family="system-ui",
-                title_x=0.5)
-            
-            
-            patho_fig_expanded_sources_df = fig_df['Source'].str.get_dummies(sep=';')
-
-            # Fusion des sources étendues avec le dataframe original
-            patho_fig_with_sources_df = pd.concat([fig_df, patho_fig_expanded_sources_df], axis=1)
-
-            # Transformation du dataframe en format long pour Plotly
-            patho_fig_melted_df = patho_fig_with_sources_df.melt(id_vars='ClinicalSignificance', 
-                                            value_vars=patho_fig_expanded_sources_df.columns, 
-                                            var_name='Source', value_name='Count')
-
-            # Filtrage des lignes avec un comptage zéro
-            patho_fig_melted_df = patho_fig_melted_df[patho_fig_melted_df['Count'] > 0]
-
-            # Regroupement par Source et ClinicalSignificance et somme des comptages
-            patho_fig_df = patho_fig_melted_df.groupby(['Source', 'ClinicalSignificance']).sum().reset_index()
-            patho_fig_df = patho_fig_df.sort_values(by=['Count'], ascending=False)
-            
-            # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
-            colors_patho = {
-                'Benign': '#1CBE4F',
-                'Likely benign': '#16FF32',
-                'Uncertain significance': '#FBE426',
-                'Likely pathogenic': '#FEAF16',
-                'Pathogenic': '#F6222E'
-            }
-            # Création du graphique Plotly
-            fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
-                        title='Clinical significance by Source',
-                        barmode='stack',
-                        color_discrete_map=colors_patho)
-
-            # Mise à jour de la mise en page
-            fig_patho.update_layout(xaxis_title='Source',
-                                    yaxis_title='Number of Variations',
-                                    legend_title='Clinical Significance',
-                                    font_family="system-ui",
-                                    title_x=0.5)
-            
-            
-            exploded_diseases = fig_df['disease_name'].str.split('; ').explode()
-            disease_counts = exploded_diseases.value_counts().head(10)
-            
-            disease_frequency_df = pd.DataFrame({'disease_name': exploded_diseases.value_counts().index,
-                                       'Number of variations': exploded_diseases.value_counts().values})
-
-            # Créer un DataFrame pour le graphique
-            top_diseases_df = disease_counts.reset_index()
-            top_diseases_df.columns = ['Disease', 'Count']
-
-            # Créer le graphique à barres
-            fig_top_diseases = px.bar(top_diseases_df, x='Disease', y='Count', color_discrete_sequence=['#FBE426'],
-                        title='Top diseases',
-                        labels={'Disease': 'Disease', 'Count': 'Number of variations'})
-            
-            fig_top_diseases.update_layout(font_family="system-ui",
-                                        title_x=0.5,
-                                        xaxis_tickangle=-15,
-                                        xaxis_tickfont_size=12)
-            
-            exploded_phenotypes = fig_df['phenotype_name'].str.split('; ').explode()
-            phenotype_counts = exploded_phenotypes.value_counts().head(10)
-            
-            phenotype_frequency_df = pd.DataFrame({'phenotype_name': exploded_phenotypes.value_counts().index,
-                                       'Number of variations': exploded_phenotypes.value_counts().values})
-
-            # Créer un DataFrame pour le graphique
-            # top_phenotypes_df = phenotype_counts.reset_index()
-            # top_phenotypes_df.columns = ['Phenotype', 'Count']
-
-            # # Créer le graphique à barres
-            # fig_top_phenotypes = px.bar(top_phenotypes_df, x='Phenotype', y='Count', color_discrete_sequence=['#FA0087'],
-            #             title='Top phenotypes',
-            #             labels={'Phenotype': 'Phenotype', 'Count': 'Number of variations'})
-            
-            # fig_top_phenotypes.update_layout(font_family="system-ui",
-            #                             title_x=0.5,
-            #                             xaxis_tickangle=-15,
-            #                             xaxis_tickfont_size=12)
-            
-            filtered_needle_df = pd.merge(filtered_df.drop_duplicates(subset=['symbol']), gene_domains, how='left', on='symbol')
-            
-            domain_data = []
+        return filter_outputs([data, source_values, clinical_significance_values, start_pos_stop_prot_value, end_pos_stop_prot_value, start_pos_relative_value, end_pos_relative_value, stop_codon_values, nmd_sensitivity_values, start_af_worldwide_value, end_af_worldwide_value, overlapping_domain_values, category, search_value], previous_query)
+
+def filter_key(args):
+    # The same filters on the same search give the same charts and tables, whoever asks for them
+    # The StopKB results only depend on the filters, the stored data of the other searches is part of the key
+    data, *filters, category, search_value = args
+    return make_key('filter_data', store.version, category, search_value, data if category != "StopKB" else None, *FilterSpec.key_values(filters))
+
+def filter_outputs(args, previous_query=None):
+    # args are those of aggregate_filter, without previous_query
+    return cached(aggregate_cache, filter_key(args), lambda: [output.to_dict() if isinstance(output, go.Figure) else output for output in aggregate_filter(*args, previous_query)])
+
+def filtered_table(data, filters, category, previous_query=None, search_value=None):
+    # The variant table reads its pages from the server with the rows kept by the filters
+    # The table query of the previous filtering (previous_query) is the state of the incremental filtering
+    table_query = {'category': category, 'data': data if category != "StopKB" else None, 'version': store.version, 'filters': filters}
+    if category != "StopKB" and category not in ROW_SET_CATEGORIES:
+        # Value of the search, to run it again if its result leaves the cache. The search dropdown may have been
+        # changed since the search, the value saved in the table query comes first.
+        table_query['value'] = (previous_query or {}).get('value', search_value)
+    df = search_frame(table_query)
+    filtered_rows = filter_rows(table_query, df, previous_query)
+    # The table pages and the downloads reuse the rows found here
+    rows = table_rows(table_query, df, filtered_rows)
+    table_query['rows'] = put_rows(rows)
+    if len(rows) < len(filtered_rows):
+        # The table has one line per variation, the next incremental filtering starts from all the filtered rows
+        table_query['filtered'] = put_rows(filtered_rows)
+    return table_query, df, filtered_rows
+
+def live_request_is_stale(trigger):
+    # Each page numbers its live filterings by time, a request older than the last one of its page is not needed anymore
+    latest = job_cache.get(('live-filter', trigger['session']))
+    return latest is not None and latest > trigger['time']
+
+app.clientside_callback(
+    ClientsideFunction(namespace="stopkb", function_name="debounce_filters"),
+    Output("live-filter-trigger", "data"),
+    [Input(*control) for control in FILTER_CONTROLS] + [Input("live-filter", "value")],
+    prevent_initial_call=True
+)
 
-            # Itération sur chaque colonne de domaine dans gene_df
-            for col in filtered_needle_df.filter(like='domain_'):
-                for domain_str in filtered_needle_df[col].dropna():
-                    # Séparation de la chaîne en prenant en compte le dernier ';' comme séparateur
-                    *name_parts, start, end = domain_str.rsplit(';', 2)
-                    name = ';'.join(name_parts)  # Reconstruction du nom si nécessaire
-                    if len(name) > 20:
-                        name = name[:20] + '...'
-                    coord = f"{start}-{end}"
-                    domain_data.append({'name': name, 'coord': coord})
-                    
-            mutation_data = {
-                'x': filtered_df.astype({'pos_stop_prot':'string'})['pos_stop_prot'].tolist(),
-                'y': ["1"] * len(filtered_df),  
-                'mutationGroups': filtered_df['ClinicalSignificance'].tolist(),
-                'domains': domain_data, 
-            }
-            
-            colors_map = {
-                'Benign': '#1CBE4F',
-                'Likely benign': '#16FF32',
-                'Uncertain significance': '#FBE426',
-                'Likely pathogenic': '#FEAF16',
-                'Pathogenic': '#F6222E'
-            }
-                        
-            unique_categories = list(dict.fromkeys(mutation_data['mutationGroups']))
+@app.callback(
+    [Output(*output, allow_duplicate=True) for output in FILTER_OUTPUTS] + [Output("deferred-filter", "data")],
+    [Input("live-filter-trigger", "data")],
+    [State("stored-df", "data")] + [State(*control) for control in FILTER_CONTROLS] +
+    [State("category-dropdown", "value"), State("search-dropdown", "value"), State("table-query", "data"), State("live-filter", "value")],
+    prevent_initial_call=True
+)
+def live_filter_data(trigger, data, source_values, clinical_significance_values, start_pos_stop_prot_value, end_pos_stop_prot_value, start_pos_relative_value, end_pos_relative_value, stop_codon_values, nmd_sensitivity_values, start_af_worldwide_value, end_af_worldwide_value, overlapping_domain_values, category, search_value, previous_query, live):
+    # Filters applied as they are set, once the controls have been left unchanged for a moment (assets/live_filter.js).
+    # The page only keeps the response of the last request, the server skips the requests overtaken by a newer one.
+    if not live or not trigger or live_request_is_stale(trigger):
+        raise dash.exceptions.PreventUpdate
+    job_cache.set(('live-filter', trigger['session']), trigger['time'], expire=CACHE_TTL)
+    args = [data, source_values, clinical_significance_values, start_pos_stop_prot_value, end_pos_stop_prot_value, start_pos_relative_value, end_pos_relative_value, stop_codon_values, nmd_sensitivity_values, start_af_worldwide_value, end_af_worldwide_value, overlapping_domain_values, category, search_value]
+    if filter_key(args) in aggregate_cache:
+        return filter_outputs(args) + [dash.no_update]
+    started = time.perf_counter()
+    filters = FilterSpec(*args[1:-2]).values
+    table_query, _, _ = filtered_table(data, filters, category, previous_query, search_value)
+    if (time.perf_counter() - started) * 1000 > LIVE_FILTER_BUDGET_MS / 2:
+        # Over budget: the variant table is updated now, the charts, tabs and frequency tables by render_deferred_filter
+        return [table_query] + [dash.no_update] * (len(FILTER_OUTPUTS) - 2) + [0, {'trigger': trigger, 'args': args}]
+    # The rows found for the table are reused by the charts
+    return filter_outputs(args, table_query) + [dash.no_update]
 
-            unique_colors = [colors_map.get(category, "default_color") for category in unique_categories]
-            
-            needle_style = {
-                'headSize': 10,
-                'headColor': unique_colors
-            }
-            
-            tab_variations = f"{fig_df['HGVSG'].nunique()} variations"
-            
-            tab_diseases = f"{exploded_diseases.nunique()} diseases"
-            
-            tab_phenotypes = f"{exploded_phenotypes.nunique()} phenotypes"
-            
-            return filtered_df.to_dict("records"), fig_patho, fig_nmd, dash.no_update, fig_top_diseases, dash.no_update, mutation_data, needle_style, tab_variations, dash.no_update, tab_diseases, tab_phenotypes, dash.no_update, disease_frequency_df.to_dict("records"), phenotype_frequency_df.to_dict("records")
-        
-        elif category == "disease":
-            disease_df = pd.read_json(data, orient='split')
-            # Apply filtering based on Source
-            filtered_df = disease_df[disease_df["Source"].apply(lambda x: any(source in x.split(';') for source in source_values))]
-            
-            # Apply filtering based on ClinicalSignificance
-            filtered_df = filtered_df[filtered_df["ClinicalSignificance"].isin(clinical_significance_values)]
+@app.callback(
+    [Output(*output, allow_duplicate=True) for output in FILTER_OUTPUTS],
+    [Input("deferred-filter", "data")],
+    [State("table-query", "data")],
+    prevent_initial_call=True
+)
+def render_deferred_filter(deferred, table_query):
+    # Second half of a live filtering over budget, dropped if the filters have changed since
+    if not deferred or live_request_is_stale(deferred['trigger']):
+        raise dash.exceptions.PreventUpdate
+    outputs = filter_outputs(deferred['args'], table_query)
+    # The variant table already shows these rows, the page the user may have turned to is kept
+    return [dash.no_update] + outputs[1:-1] + [dash.no_update]
 
-            # Apply filtering based on absolute position of the stop codon in the protein
-            if start_pos_stop_prot_value is not None and end_pos_stop_prot_value is not None:
-                filtered_df = filtered_df[filtered_df["pos_stop_prot"].between(start_pos_stop_prot_value, end_pos_stop_prot_value)]
-            
-            # Apply filtering based on relative position of the stop codon in the protein
-            if start_pos_relative_value is not None and end_pos_relative_value is not None:
-                filtered_df = filtered_df[filtered_df["pos_relative_prot"].between(start_pos_relative_value, end_pos_relative_value)]
+def aggregate_filter(data, source_values, clinical_significance_values, start_pos_stop_prot_value, end_pos_stop_prot_value, start_pos_relative_value, end_pos_relative_value, stop_codon_values, nmd_sensitivity_values, start_af_worldwide_value, end_af_worldwide_value, overlapping_domain_values, category, search_value, previous_query=None):
+    filters = FilterSpec(source_values, clinical_significance_values, start_pos_stop_prot_value, end_pos_stop_prot_value, start_pos_relative_value, end_pos_relative_value, stop_codon_values, nmd_sensitivity_values, start_af_worldwide_value, end_af_worldwide_value, overlapping_domain_values).values
+    table_query, df, filtered_rows = filtered_table(data, filters, category, previous_query, search_value)
+    
+    # Choose the query based on the category
+    if category == "StopKB" or category in ROW_SET_CATEGORIES:
+        
 
-            # Apply filtering based on stop codon
-            filtered_df = filtered_df[filtered_df["codon_stop"].isin(stop_codon_values)]
-            
-            # Apply filtering based on NMD sensitivity
-            filtered_df = filtered_df[filtered_df["NMD_sensitivity"].isin(nmd_sensitivity_values)]
-            
-            # Apply filtering based on worldwide allele frequency
-            if start_af_worldwide_value is not None and end_af_worldwide_value is not None:
-                filtered_df = filtered_df[filtered_df["AF"].between(start_af_worldwide_value, end_af_worldwide_value)]
-                
-            # Apply filtering based on overlapping_domain   
-            if 'overlapping' in overlapping_domain_values and 'non-overlapping' in overlapping_domain_values:
-                # No filtering if the two options are selected
-                pass
-            elif 'overlapping' in overlapping_domain_values:
-                filtered_df = filtered_df[filtered_df['overlapping_domain'].notna()]
-            elif 'non-overlapping' in overlapping_domain_values:
-                filtered_df = filtered_df[filtered_df['overlapping_domain'].isna()]
-                
-                
-            # nmd_fig_df = filtered_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
-            # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
+        # nmd_fig_df = filtered_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
+        # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
 
-            # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
-            #     title="NMD Sensitivity by Source",
-            #     labels={'Count':'Count', 'Source':'Source'},
-            #     color_discrete_sequence=px.colors.sequential.Plasma_r)
-            # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
-                        
-            nmd_fig_df = filtered_df.drop_duplicates(subset=['HGVSG'])['NMD_sensitivity'].value_counts().reset_index()
-            nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
-            
-            pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
+        # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
+        #     title="NMD Sensitivity by Source",
+        #     labels={'Count':'Count', 'Source':'Source'},
+        #     color_discrete_sequence=px.colors.sequential.Plasma_r)
+        # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
+        
+        nmd_fig_df = store.value_counts('NMD_sensitivity', filtered_rows).reset_index()
+        nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
+        
+        pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
 
-            # Créer le graphique Pie Chart pour 'NMD_sensitivity'
-            fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity',
-                values='Count', 
-                title='Distribution of NMD sensitivity',
-                color_discrete_sequence=pie_colors)
+        # Créer le graphique Pie Chart pour 'NMD_sensitivity'
+        fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity', values='Count', 
+             title='Distribution of NMD sensitivity',
+             color_discrete_sequence=pie_colors)
 
-            # Mise à jour de la mise en page
-            fig_nmd.update_layout(legend_title='NMD Sensitivity',
-                font_family="system-ui",
-                title_x=0.5)
-            
-            
-            patho_fig_expanded_sources_df = filtered_df.drop_duplicates(subset=['HGVSG'])['Source'].str.get_dummies(sep=';')
+        # Mise à jour de la mise en page
+        fig_nmd.update_layout(legend_title='NMD Sensitivity')
+        
+        # Comptage par source à partir du masque binaire des sources
+        patho_fig_df = store.significance_by_source(filtered_rows)
+        
+        # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
+        colors_patho = {
+            'Benign': '#1CBE4F',
+            'Likely benign': '#16FF32',
+            'Uncertain significance': '#FBE426',
+            'Likely pathogenic': '#FEAF16',
+            'Pathogenic': '#F6222E'
+        }
+        # Création du graphique Plotly
+        fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
+                    title='Clinical significance by Source',
+                    barmode='stack',
+                    color_discrete_map=colors_patho)
+
+        # Mise à jour de la mise en page
+        fig_patho.update_layout(xaxis_title='Source',
+                                yaxis_title='Number of Variations',
+                                legend_title='Clinical Significance',
+                                font_family="system-ui",
+                                title_x=0.5)
+        
+        gene_counts = store.value_counts('symbol', filtered_rows)
+        top_genes_df = gene_counts.head(10).reset_index()
+        top_genes_df.columns = ['Gene', 'Count']
+        
+        genes_frequency_df = pd.DataFrame({'symbol': gene_counts.index,
+                                   'Number of variations': gene_counts.values})
 
-            # Fusion des sources étendues avec le dataframe original
-            patho_fig_with_sources_df = pd.concat([filtered_df.drop_duplicates(subset=['HGVSG']), patho_fig_expanded_sources_df], axis=1)
+        # Créer le graphique à barres
+        fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
+                    title='Top genes',
+                    labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
+        
+        fig_top_genes.update_layout(font_family="system-ui",
+                                    title_x=0.5)
+        
+        
+        all_disease_counts = store.diseases.value_counts(filtered_rows)
+        disease_counts = all_disease_counts.head(10)
 
-            # Transformation du dataframe en format long pour Plotly
-            patho_fig_melted_df = patho_fig_with_sources_df.melt(id_vars='ClinicalSignificance', 
-                                            value_vars=patho_fig_expanded_sources_df.columns, 
-                                            var_name='Source', value_name='Count')
+        # Créer un DataFrame pour le graphique
+        top_diseases_df = disease_counts.reset_index()
+        top_diseases_df.columns = ['Disease', 'Count']
+        
+        disease_frequency_df = pd.DataFrame({'disease_name': all_disease_counts.index,
+                                   'Number of variations': all_disease_counts.values})
 
-            # Filtrage des lignes avec un comptage zéro
-            patho_fig_melted_df = patho_fig_melted_df[patho_fig_melted_df['Count'] > 0]
+        # Créer le graphique à barres
+        fig_top_diseases = px.bar(top_diseases_df, x='Disease', y='Count', color_discrete_sequence=['#FBE426'],
+                    title='Top diseases',
+                    labels={'Disease': 'Disease', 'Count': 'Number of variations'})
+        
+        fig_top_diseases.update_layout(font_family="system-ui",
+                                    title_x=0.5,
+                                    xaxis_tickangle=-15,
+                                    xaxis_tickfont_size=12)
+        
+        all_phenotype_counts = store.phenotypes.value_counts(filtered_rows)
+        phenotype_counts = all_phenotype_counts.head(10)
 
-            # Regroupement par Source et ClinicalSignificance et somme des comptages
-            patho_fig_df = patho_fig_melted_df.groupby(['Source', 'ClinicalSignificance']).sum().reset_index()
-            patho_fig_df = patho_fig_df.sort_values(by=['Count'], ascending=False)
-            
-            # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
-            colors_patho = {
-                'Benign': '#1CBE4F',
-                'Likely benign': '#16FF32',
-                'Uncertain significance': '#FBE426',
-                'Likely pathogenic': '#FEAF16',
-                'Pathogenic': '#F6222E'
-            }
-            # Création du graphique Plotly
-            fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
-                        title='Clinical significance by Source',
-                        barmode='stack',
-                        color_discrete_map=colors_patho)
+        # Créer un DataFrame pour le graphique
+        top_phenotypes_df = phenotype_counts.reset_index()
+        top_phenotypes_df.columns = ['Phenotype', 'Count']
+        
+        phenotype_frequency_df = pd.DataFrame({'phenotype_name': all_phenotype_counts.index,
+                                   'Number of variations': all_phenotype_counts.values})
 
-            # Mise à jour de la mise en page
-            fig_patho.update_layout(xaxis_title='Source',
-                                    yaxis_title='Number of Variations',
-                                    legend_title='Clinical Significance',
-                                    font_family="system-ui",
-                                    title_x=0.5)
+        # Créer le graphique à barres
+        fig_top_phenotypes = px.bar(top_phenotypes_df, x='Phenotype', y='Count', color_discrete_sequence=['#FA0087'],
+                    title='Top phenotypes',
+                    labels={'Phenotype': 'Phenotype', 'Count': 'Number of variations'})
+        
+        fig_top_phenotypes.update_layout(font_family="system-ui",
+                                    title_x=0.5,
+                                    xaxis_tickangle=-15,
+                                    xaxis_tickfont_size=12)
+        
+        tab_variations = f"{store.nunique('HGVSG', filtered_rows)} variations"
+        
+        tab_genes = f"{len(gene_counts)} genes"
+        
+        tab_diseases = f"{len(all_disease_counts)} diseases"
+        
+        tab_phenotypes = f"{len(all_phenotype_counts)} phenotypes"
+        
+        return table_query, fig_patho, fig_nmd, fig_top_genes, fig_top_diseases, fig_top_phenotypes, dash.no_update, dash.no_update, tab_variations, tab_genes, tab_diseases, tab_phenotypes, genes_frequency_df.to_dict("records"), disease_frequency_df.to_dict("records"), phenotype_frequency_df.to_dict("records"), 0
+    
+    elif category == "gene":
+        gene_df = df
+        filtered_df = gene_df.iloc[filtered_rows]
             
-            top_genes_df = filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().head(10).reset_index()
-            top_genes_df.columns = ['Gene', 'Count']
+        # Diseases and phenotypes of the variations are looked up once per gene in the store
+        gene_representatives = store.gene_representatives(filtered_df['symbol'])
             
-            genes_frequency_df = pd.DataFrame({'symbol': filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().index,
-                                       'Number of variations': filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().values})
+        # nmd_fig_df = filtered_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
+        # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
 
-            # Créer le graphique à barres
-            fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
-                        title='Top genes',
-                        labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
-            
-            fig_top_genes.update_layout(font_family="system-ui",
-                                        title_x=0.5)
-            
-            phenotype_counts = filtered_df['hpo_name'].value_counts().head(10)
-            
-            phenotype_frequency_df = pd.DataFrame({'phenotype_name': filtered_df['hpo_name'].value_counts().index,
-                                       'Number of variations': filtered_df['hpo_name'].value_counts().values})
+        # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
+        #     title="NMD Sensitivity by Source",
+        #     labels={'Count':'Count', 'Source':'Source'},
+        #     color_discrete_sequence=px.colors.sequential.Plasma_r)
+        # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
+                    
+        nmd_fig_df = filtered_df['NMD_sensitivity'].value_counts().reset_index()
+        nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
+        
+        pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
+
+        # Créer le graphique Pie Chart pour 'NMD_sensitivity'
+        fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity',
+            values='Count', 
+            title='Distribution of NMD sensitivity',
+            color_discrete_sequence=pie_colors)
+
+        # Mise à jour de la mise en page
+        fig_nmd.update_layout(legend_title='NMD Sensitivity',
+            font_family="system-ui",
+            title_x=0.5)
+        
+        
+        # Comptage par source à partir du masque binaire des sources
+        patho_fig_df = frame_significance_by_source(filtered_df)
+        
+        # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
+        colors_patho = {
+            'Benign': '#1CBE4F',
+            'Likely benign': '#16FF32',
+            'Uncertain significance': '#FBE426',
+            'Likely pathogenic': '#FEAF16',
+            'Pathogenic': '#F6222E'
+        }
+        # Création du graphique Plotly
+        fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
+                    title='Clinical significance by Source',
+                    barmode='stack',
+                    color_discrete_map=colors_patho)
+
+        # Mise à jour de la mise en page
+        fig_patho.update_layout(xaxis_title='Source',
+                                yaxis_title='Number of Variations',
+                                legend_title='Clinical Significance',
+                                font_family="system-ui",
+                                title_x=0.5)
+        
+        
+        all_disease_counts = store.diseases.value_counts(*gene_representatives)
+        disease_counts = all_disease_counts.head(10)
+        
+        disease_frequency_df = pd.DataFrame({'disease_name': all_disease_counts.index,
+                                   'Number of variations': all_disease_counts.values})
 
-            # Créer un DataFrame pour le graphique
-            # top_phenotypes_df = phenotype_counts.reset_index()
-            # top_phenotypes_df.columns = ['Phenotype', 'Count']
+        # Créer un DataFrame pour le graphique
+        top_diseases_df = disease_counts.reset_index()
+        top_diseases_df.columns = ['Disease', 'Count']
 
-            # # Créer le graphique à barres
-            # fig_top_phenotypes = px.bar(top_phenotypes_df, x='Phenotype', y='Count', color_discrete_sequence=['#FA0087'],
-            #             title='Top phenotypes',
-            #             labels={'Phenotype': 'Phenotype', 'Count': 'Number of variations'})
-            
-            # fig_top_phenotypes.update_layout(font_family="system-ui",
-            #                             title_x=0.5,
-            #                             xaxis_tickangle=-15,
-            #                             xaxis_tickfont_size=12)
-            
-            tab_variations = f"{filtered_df['HGVSG'].nunique()} variations"
-            
-            tab_genes = f"{filtered_df['symbol'].nunique()} genes"
-            
-            tab_phenotypes = f"{filtered_df['hpo_name'].nunique()} phenotypes"
-            
-            return filtered_df.drop_duplicates(subset=['HGVSG']).to_dict("records"), fig_patho, fig_nmd, fig_top_genes, dash.no_update, dash.no_update, dash.no_update, dash.no_update, tab_variations, tab_genes, dash.no_update, tab_phenotypes, genes_frequency_df.to_dict("records"), dash.no_update, phenotype_frequency_df.to_dict("records")
+        # Créer le graphique à barres
+        fig_top_diseases = px.bar(top_diseases_df, x='Disease', y='Count', color_discrete_sequence=['#FBE426'],
+                    title='Top diseases',
+                    labels={'Disease': 'Disease', 'Count': 'Number of variations'})
         
-        elif category == "phenotype":
-            phenotype_df = pd.read_json(data, orient='split')
-            # Apply filtering based on Source
-            filtered_df = phenotype_df[phenotype_df["Source"].apply(lambda x: any(source in x.split(';') for source in source_values))]
-            
-            # Apply filtering based on ClinicalSignificance
-            filtered_df = filtered_df[filtered_df["ClinicalSignificance"].isin(clinical_significance_values)]
+        fig_top_diseases.update_layout(font_family="system-ui",
+                                    title_x=0.5,
+                                    xaxis_tickangle=-15,
+                                    xaxis_tickfont_size=12)
+        
+        all_phenotype_counts = store.phenotypes.value_counts(*gene_representatives)
+        phenotype_counts = all_phenotype_counts.head(10)
+        
+        phenotype_frequency_df = pd.DataFrame({'phenotype_name': all_phenotype_counts.index,
+                                   'Number of variations': all_phenotype_counts.values})
 
-            # Apply filtering based on absolute position of the stop codon in the protein
-            if start_pos_stop_prot_value is not None and end_pos_stop_prot_value is not None:
-                filtered_df = filtered_df[filtered_df["pos_stop_prot"].between(start_pos_stop_prot_value, end_pos_stop_prot_value)]
-            
-            # Apply filtering based on relative position of the stop codon in the protein
-            if start_pos_relative_value is not None and end_pos_relative_value is not None:
-                filtered_df = filtered_df[filtered_df["pos_relative_prot"].between(start_pos_relative_value, end_pos_relative_value)]
+        # Créer un DataFrame pour le graphique
+        # top_phenotypes_df = phenotype_counts.reset_index()
+        # top_phenotypes_df.columns = ['Phenotype', 'Count']
 
-            # Apply filtering based on stop codon
-            filtered_df = filtered_df[filtered_df["codon_stop"].isin(stop_codon_values)]
-            
-            # Apply filtering based on NMD sensitivity
-            filtered_df = filtered_df[filtered_df["NMD_sensitivity"].isin(nmd_sensitivity_values)]
-            
-            # Apply filtering based on worldwide allele frequency
-            if start_af_worldwide_value is not None and end_af_worldwide_value is not None:
-                filtered_df = filtered_df[filtered_df["AF"].between(start_af_worldwide_value, end_af_worldwide_value)]
-                
-            # Apply filtering based on overlapping_domain   
-            if 'overlapping' in overlapping_domain_values and 'non-overlapping' in overlapping_domain_values:
-                # No filtering if the two options are selected
-                pass
-            elif 'overlapping' in overlapping_domain_values:
-                filtered_df = filtered_df[filtered_df['overlapping_domain'].notna()]
-            elif 'non-overlapping' in overlapping_domain_values:
-                filtered_df = filtered_df[filtered_df['overlapping_domain'].isna()]
-                
+        # # Créer le graphique à barres
+        # fig_top_phenotypes = px.bar(top_phenotypes_df, x='Phenotype', y='Count', color_discrete_sequence=['#FA0087'],
+        #             title='Top phenotypes',
+        #             labels={'Phenotype': 'Phenotype', 'Count': 'Number of variations'})
+        
+        # fig_top_phenotypes.update_layout(font_family="system-ui",
+        #                             title_x=0.5,
+        #                             xaxis_tickangle=-15,
+        #                             xaxis_tickfont_size=12)
+        
+        filtered_needle_df = pd.merge(filtered_df.drop_duplicates(subset=['symbol']), gene_domains, how='left', on='symbol')
+        
+        domain_data = []
+
+        # Itération sur chaque colonne de domaine dans gene_df
+        for col in filtered_needle_df.filter(like='domain_'):
+            for domain_str in filtered_needle_df[col].dropna():
+                # Séparation de la chaîne en prenant en compte le dernier ';' comme séparateur
+                *name_parts, start, end = domain_str.rsplit(';', 2)
+                name = ';'.join(name_parts)  # Reconstruction du nom si nécessaire
+                if len(name) > 20:
+                    name = name[:20] + '...'
+                coord = f"{start}-{end}"
+                domain_data.append({'name': name, 'coord': coord})
                 
-            # nmd_fig_df = filtered_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
-            # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
-
-            # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
-            #     title="NMD Sensitivity by Source",
-            #     labels={'Count':'Count', 'Source':'Source'},
-            #     color_discrete_sequence=px.colors.sequential.Plasma_r)
-            # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
-                        
-            nmd_fig_df = filtered_df.drop_duplicates(subset=['HGVSG'])['NMD_sensitivity'].value_counts().reset_index()
-            nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
-            
-            pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
-
-            # Créer le graphique Pie Chart pour 'NMD_sensitivity'
-            fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity',
-                values='Count', 
-                title='Distribution of NMD sensitivity',
-                color_discrete_sequence=pie_colors)
+        mutation_data = {
+            'x': filtered_df.astype({'pos_stop_prot':'string'})['pos_stop_prot'].tolist(),
+            'y': ["1"] * len(filtered_df),  
+            'mutationGroups': filtered_df['ClinicalSignificance'].tolist(),
+            'domains': domain_data, 
+        }
+        
+        colors_map = {
+            'Benign': '#1CBE4F',
+            'Likely benign': '#16FF32',
+            'Uncertain significance': '#FBE426',
+            'Likely pathogenic': '#FEAF16',
+            'Pathogenic': '#F6222E'
+        }
+                    
+        unique_categories = list(dict.fromkeys(mutation_data['mutationGroups']))
 
-            # Mise à jour de la mise en page
-            fig_nmd.update_layout(legend_title='NMD Sensitivity',
-                font_family="system-ui",
-                title_x=0.5)
+        unique_colors = [colors_map.get(category, "default_color") for category in unique_categories]
+        
+        needle_style = {
+            'headSize': 10,
+            'headColor': unique_colors
+        }
+        
+        tab_variations = f"{filtered_df['HGVSG'].nunique()} variations"
+        
+        tab_diseases = f"{len(all_disease_counts)} diseases"
+        
+        tab_phenotypes = f"{len(all_phenotype_counts)} phenotypes"
+        
+        return table_query, fig_patho, fig_nmd, dash.no_update, fig_top_diseases, dash.no_update, mutation_data, needle_style, tab_variations, dash.no_update, tab_diseases, tab_phenotypes, dash.no_update, disease_frequency_df.to_dict("records"), phenotype_frequency_df.to_dict("records"), 0
+    
+    elif category == "disease":
+        disease_df = df
+        filtered_df = disease_df.iloc[filtered_rows]
             
             
-            patho_fig_expanded_sources_df = filtered_df.drop_duplicates(subset=['HGVSG'])['Source'].str.get_dummies(sep=';')
-
-            # Fusion des sources étendues avec le dataframe original
-            patho_fig_with_sources_df = pd.concat([filtered_df.drop_duplicates(subset=['HGVSG']), patho_fig_expanded_sources_df], axis=1)
+        # nmd_fig_df = filtered_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
+        # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
 
-            # Transformation du dataframe en format long pour Plotly
-            patho_fig_melted_df = patho_fig_with_sources_df.melt(id_vars='ClinicalSignificance', 
-                                            value_vars=patho_fig_expanded_sources_df.columns, 
-                                            var_name='Source', value_name='Count')
+        # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
+        #     title="NMD Sensitivity by Source",
+        #     labels={'Count':'Count', 'Source':'Source'},
+        #     color_discrete_sequence=px.colors.sequential.Plasma_r)
+        # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
+                    
+        nmd_fig_df = filtered_df.drop_duplicates(subset=['HGVSG'])['NMD_sensitivity'].value_counts().reset_index()
+        nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
+        
+        pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
+
+        # Créer le graphique Pie Chart pour 'NMD_sensitivity'
+        fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity',
+            values='Count', 
+            title='Distribution of NMD sensitivity',
+            color_discrete_sequence=pie_colors)
+
+        # Mise à jour de la mise en page
+        fig_nmd.update_layout(legend_title='NMD Sensitivity',
+            font_family="system-ui",
+            title_x=0.5)
+        
+        
+        # Comptage par source à partir du masque binaire des sources
+        patho_fig_df = frame_significance_by_source(filtered_df.drop_duplicates(subset=['HGVSG']))
+        
+        # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
+        colors_patho = {
+            'Benign': '#1CBE4F',
+            'Likely benign': '#16FF32',
+            'Uncertain significance': '#FBE426',
+            'Likely pathogenic': '#FEAF16',
+            'Pathogenic': '#F6222E'
+        }
+        # Création du graphique Plotly
+        fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
+                    title='Clinical significance by Source',
+                    barmode='stack',
+                    color_discrete_map=colors_patho)
+
+        # Mise à jour de la mise en page
+        fig_patho.update_layout(xaxis_title='Source',
+                                yaxis_title='Number of Variations',
+                                legend_title='Clinical Significance',
+                                font_family="system-ui",
+                                title_x=0.5)
+        
+        top_genes_df = filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().head(10).reset_index()
+        top_genes_df.columns = ['Gene', 'Count']
+        
+        genes_frequency_df = pd.DataFrame({'symbol': filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().index,
+                                   'Number of variations': filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().values})
 
-            # Filtrage des lignes avec un comptage zéro
-            patho_fig_melted_df = patho_fig_melted_df[patho_fig_melted_df['Count'] > 0]
+        # Créer le graphique à barres
+        fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
+                    title='Top genes',
+                    labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
+        
+        fig_top_genes.update_layout(font_family="system-ui",
+                                    title_x=0.5)
+        
+        phenotype_counts = filtered_df['hpo_name'].value_counts().head(10)
+        
+        phenotype_frequency_df = pd.DataFrame({'phenotype_name': filtered_df['hpo_name'].value_counts().index,
+                                   'Number of variations': filtered_df['hpo_name'].value_counts().values})
 
-            # Regroupement par Source et ClinicalSignificance et somme des comptages
-            patho_fig_df = patho_fig_melted_df.groupby(['Source', 'ClinicalSignificance']).sum().reset_index()
-            patho_fig_df = patho_fig_df.sort_values(by=['Count'], ascending=False)
-            
-            # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
-            colors_patho = {
-                'Benign': '#1CBE4F',
-                'Likely benign': '#16FF32',
-                'Uncertain significance': '#FBE426',
-                'Likely pathogenic': '#FEAF16',
-                'Pathogenic': '#F6222E'
-            }
-            # Création du graphique Plotly
-            fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
-                        title='Clinical significance by Source',
-                        barmode='stack',
-                        color_discrete_map=colors_patho)
+        # Créer un DataFrame pour le graphique
+        # top_phenotypes_df = phenotype_counts.reset_index()
+        # top_phenotypes_df.columns = ['Phenotype', 'Count']
 
-            # Mise à jour de la mise en page
-            fig_patho.update_layout(xaxis_title='Source',
-                                    yaxis_title='Number of Variations',
-                                    legend_title='Clinical Significance',
-                                    font_family="system-ui",
-                                    title_x=0.5)
+        # # Créer le graphique à barres
+        # fig_top_phenotypes = px.bar(top_phenotypes_df, x='Phenotype', y='Count', color_discrete_sequence=['#FA0087'],
+        #             title='Top phenotypes',
+        #             labels={'Phenotype': 'Phenotype', 'Count': 'Number of variations'})
+        
+        # fig_top_phenotypes.update_layout(font_family="system-ui",
+        #                             title_x=0.5,
+        #                             xaxis_tickangle=-15,
+        #                             xaxis_tickfont_size=12)
+        
+        tab_variations = f"{filtered_df['HGVSG'].nunique()} variations"
+        
+        tab_genes = f"{filtered_df['symbol'].nunique()} genes"
+        
+        tab_phenotypes = f"{filtered_df['hpo_name'].nunique()} phenotypes"
+        
+        return table_query, fig_patho, fig_nmd, fig_top_genes, dash.no_update, dash.no_update, dash.no_update, dash.no_update, tab_variations, tab_genes, dash.no_update, tab_phenotypes, genes_frequency_df.to_dict("records"), dash.no_update, phenotype_frequency_df.to_dict("records"), 0
+    
+    elif category == "phenotype":
+        phenotype_df = df
+        filtered_df = phenotype_df.iloc[filtered_rows]
             
-            top_genes_df = filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().head(10).reset_index()
-            top_genes_df.columns = ['Gene', 'Count']
             
-            genes_frequency_df = pd.DataFrame({'symbol': filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().index,
-                                       'Number of variations': filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().values})
+        # nmd_fig_df = filtered_df.groupby(['Source', 'NMD_sensitivity']).size().reset_index(name='counts')
+        # nmd_fig_df = nmd_fig_df.sort_values(by=['counts'], ascending=False)
 
-            # Créer le graphique à barres
-            fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
-                        title='Top genes',
-                        labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
-            
-            fig_top_genes.update_layout(font_family="system-ui",
-                                        title_x=0.5)
-            
-            disease_counts = filtered_df['disease'].value_counts().head(10)
+        # fig_nmd = px.bar(nmd_fig_df, x="Source", y="counts", color="NMD_sensitivity",              
+        #     title="NMD Sensitivity by Source",
+        #     labels={'Count':'Count', 'Source':'Source'},
+        #     color_discrete_sequence=px.colors.sequential.Plasma_r)
+        # fig_nmd.update_layout(font_family="system-ui", title_x=0.5)
+                    
+        nmd_fig_df = filtered_df.drop_duplicates(subset=['HGVSG'])['NMD_sensitivity'].value_counts().reset_index()
+        nmd_fig_df.columns = ['NMD_sensitivity', 'Count']
+        
+        pie_colors = ['#F6222E' if sensitivity == 'sensitive' else '#1CBE4F' for sensitivity in nmd_fig_df['NMD_sensitivity']]
+
+        # Créer le graphique Pie Chart pour 'NMD_sensitivity'
+        fig_nmd = px.pie(nmd_fig_df, names='NMD_sensitivity',
+            values='Count', 
+            title='Distribution of NMD sensitivity',
+            color_discrete_sequence=pie_colors)
+
+        # Mise à jour de la mise en page
+        fig_nmd.update_layout(legend_title='NMD Sensitivity',
+            font_family="system-ui",
+            title_x=0.5)
+        
+        
+        # Comptage par source à partir du masque binaire des sources
+        patho_fig_df = frame_significance_by_source(filtered_df.drop_duplicates(subset=['HGVSG']))
+        
+        # Définition des couleurs spécifiques pour chaque catégorie de Clinical Significance
+        colors_patho = {
+            'Benign': '#1CBE4F',
+            'Likely benign': '#16FF32',
+            'Uncertain significance': '#FBE426',
+            'Likely pathogenic': '#FEAF16',
+            'Pathogenic': '#F6222E'
+        }
+        # Création du graphique Plotly
+        fig_patho = px.bar(patho_fig_df, x='Source', y='Count', color='ClinicalSignificance', 
+                    title='Clinical significance by Source',
+                    barmode='stack',
+                    color_discrete_map=colors_patho)
+
+        # Mise à jour de la mise en page
+        fig_patho.update_layout(xaxis_title='Source',
+                                yaxis_title='Number of Variations',
+                                legend_title='Clinical Significance',
+                                font_family="system-ui",
+                                title_x=0.5)
+        
+        top_genes_df = filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().head(10).reset_index()
+        top_genes_df.columns = ['Gene', 'Count']
+        
+        genes_frequency_df = pd.DataFrame({'symbol': filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().index,
+                                   'Number of variations': filtered_df.drop_duplicates(subset=['HGVSG'])['symbol'].value_counts().values})
 
-            top_diseases_df = disease_counts.reset_index()
-            top_diseases_df.columns = ['Disease', 'Count']
-            
-            disease_frequency_df = pd.DataFrame({'disease_name': filtered_df['disease'].value_counts().index,
-                                       'Number of variations': filtered_df['disease'].value_counts().values})
+        # Créer le graphique à barres
+        fig_top_genes = px.bar(top_genes_df, x='Gene', y='Count', color_discrete_sequence=['#F6222E'],
+                    title='Top genes',
+                    labels={'Gene': 'Gene', 'Count': 'Number of Variations'})
+        
+        fig_top_genes.update_layout(font_family="system-ui",
+                                    title_x=0.5)
+        
+        disease_counts = filtered_df['disease'].value_counts().head(10)
 
-            # Créer le graphique à barres
-            fig_top_diseases = px.bar(top_diseases_df, x='Disease', y='Count', color_discrete_sequence=['#FBE426'],
-                        title='Top diseases',
-                        labels={'Disease': 'Disease', 'Count': 'Number of variations'})
-            
-            fig_top_diseases.update_layout(font_family="system-ui",
-                                        title_x=0.5,
-                                        xaxis_tickangle=-15,
-                                        xaxis_tickfont_size=12)
-            
-            tab_variations = f"{filtered_df['HGVSG'].nunique()} variations"
-            
-            tab_genes = f"{filtered_df['symbol'].nunique()} genes"
-            
-            tab_diseases = f"{filtered_df['disease'].nunique()} diseases"
+        top_diseases_df = disease_counts.reset_index()
+        top_diseases_df.columns = ['Disease', 'Count']
+        
+        disease_frequency_df = pd.DataFrame({'disease_name': filtered_df['disease'].value_counts().index,
+                                   'Number of variations': filtered_df['disease'].value_counts().values})
 
-            
-            return filtered_df.drop_duplicates(subset=['HGVSG']).to_dict("records"), fig_patho, fig_nmd, fig_top_genes, fig_top_diseases, dash.no_update, dash.no_update, dash.no_update, tab_variations, tab_genes, tab_diseases, dash.no_update, genes_frequency_df.to_dict("records"), disease_frequency_df.to_dict("records"), dash.no_update
+        # Créer le graphique à barres
+        fig_top_diseases = px.bar(top_diseases_df, x='Disease', y='Count', color_discrete_sequence=['#FBE426'],
+                    title='Top diseases',
+                    labels={'Disease': 'Disease', 'Count': 'Number of variations'})
+        
+        fig_top_diseases.update_layout(font_family="system-ui",
+                                    title_x=0.5,
+                                    xaxis_tickangle=-15,
+                                    xaxis_tickfont_size=12)
         
+        tab_variations = f"{filtered_df['HGVSG'].nunique()} variations"
+        
+        tab_genes = f"{filtered_df['symbol'].nunique()} genes"
+        
+        tab_diseases = f"{filtered_df['disease'].nunique()} diseases"
+
+        
+        return table_query, fig_patho, fig_nmd, fig_top_genes, fig_top_diseases, dash.no_update, dash.no_update, dash.no_update, tab_variations, tab_genes, tab_diseases, dash.no_update, genes_frequency_df.to_dict("records"), disease_frequency_df.to_dict("records"), dash.no_update, 0
+    
 @app.callback(
-    Output("download-dataframe-csv", "data"),
-    Input("btn_csv", "n_clicks"),
-    [State("category-dropdown", "value"),
-    State("table-prefiltered", "data"),
-    State("source-checklist", "value"),
-    State("clinical-significance-checklist", "value"),
-    State("start-pos-stop-prot", "value"),
-    State("end-pos-stop-prot", "value"),
-    State("start-pos-relative-prot", "value"),
-    State("end-pos-relative-prot", "value"),
-    State("stop-codon-checklist", "value"),
-    State("nmd-sensitivity-checklist", "value"),
-    State("start-af-worldwide", "value"),
-    State("end-af-worldwide", "value"),
-    State("overlapping-domain-checklist", "value")],
+    [Output("table-prefiltered", "data"),
+     Output("table-prefiltered", "page_count")],
+    [Input("table-prefiltered", "page_current"),
+     Input("table-prefiltered", "page_size"),
+     Input("table-prefiltered", "sort_by"),
+     Input("table-query", "data")],
+    prevent_initial_call=True
 )
-def download_table(n_clicks,category,data, source_values, clinical_significance_values, start_pos_stop_prot_value, end_pos_stop_prot_value, start_pos_relative_value, end_pos_relative_value, stop_codon_values, nmd_sensitivity_values, start_af_worldwide_value, end_af_worldwide_value, overlapping_domain_values):
-    if n_clicks > 0:
-        if category == "StopKB":
-            filtered_df = StopKB_df[StopKB_df["Source"].apply(lambda x: any(source in x.split(';') for source in source_values))]
-            
-            # Apply filtering based on ClinicalSignificance
-            filtered_df = filtered_df[filtered_df["ClinicalSignificance"].isin(clinical_significance_values)]
-
-            # Apply filtering based on absolute position of the stop codon in the protein
-            if start_pos_stop_prot_value is not None and end_pos_stop_prot_value is not None:
-                filtered_df = filtered_df[filtered_df["pos_stop_prot"].between(start_pos_stop_prot_value, end_pos_stop_prot_value)]
-            
-            # Apply filtering based on relative position of the stop codon in the protein
-            if start_pos_relative_value is not None and end_pos_relative_value is not None:
-                filtered_df = filtered_df[filtered_df["pos_relative_prot"].between(start_pos_relative_value, end_pos_relative_value)]
+def update_table_page(page_current, page_size, sort_by, table_query):
+    return table_page(*search_table(table_query), page_current or 0, page_size, sort_by)
 
-            # Apply filtering based on stop codon
-            filtered_df = filtered_df[filtered_df["codon_stop"].isin(stop_codon_values)]
-            
-            # Apply filtering based on NMD sensitivity
-            filtered_df = filtered_df[filtered_df["NMD_sensitivity"].isin(nmd_sensitivity_values)]
-            
-            # Apply filtering based on worldwide allele frequency
-            if start_af_worldwide_value is not None and end_af_worldwide_value is not None:
-                filtered_df = filtered_df[filtered_df["AF"].between(start_af_worldwide_value, end_af_worldwide_value)]
-            
-            # Apply filtering based on overlapping_domain   
-            if 'overlapping' in overlapping_domain_values and 'non-overlapping' in overlapping_domain_values:
-                # No filtering if the two options are selected
-                pass
-            elif 'overlapping' in overlapping_domain_values:
-                filtered_df = filtered_df[filtered_df['overlapping_domain'].notna()]
-            elif 'non-overlapping' in overlapping_domain_values:
-                filtered_df = filtered_df[filtered_df['overlapping_domain'].isna()]
-                
-            return dcc.send_data_frame(filtered_df.drop(columns=['Cytogenetic','RefSeq_nuc','Ensembl_nuc','RefSeq_prot','Ensembl_prot','uniprot_id','prot_length','exon_counts','disorder_id','name','orpha_code','definition','prevalence_geo','hpo_id','hpo_name','comment','definition_x','disease_name','phenotype_name']).to_csv, "data.csv")
-        elif category == "gene":
-            gene_df = pd.DataFrame(data)
-            return dcc.send_data_frame(gene_df.to_csv, "data.csv")
-        elif category == "disease":
-            disease_df = pd.DataFrame(data)
-            return dcc.send_data_frame(disease_df.to_csv, "data.csv")
-        elif category == "phenotype":
-            phenotype_df = pd.DataFrame(data)
-            return dcc.send_data_frame(phenotype_df.to_csv, "data.csv")
+@app.callback(
+    [Output("download-link", "href"),
+     Output("download-link", "download")],
+    [Input("table-query", "data"),
+     Input("export-format", "value")],
+    prevent_initial_call=True
+)
+def update_download_link(table_query, export_format):
+    return export_url(table_query, export_format), EXPORT_FORMATS[export_format][0]
+
+def valid_table_query(table_query):
+    # Table queries read back from a URL are checked before any search or filter reads them
+    # The StopKB table is the whole store, the other searches need the handle of their result or rows
+    if not isinstance(table_query, dict) or table_query.get('category') not in HIDDEN_TABLE_COLUMNS:
+        return False
+    if table_query['category'] != "StopKB" and not isinstance(table_query.get('data'), str):
+        return False
+    return (isinstance(table_query.get('rows'), (str, type(None))) and isinstance(table_query.get('value'), (str, type(None)))
+            and FilterSpec.valid_values(table_query.get('filters')))
+
+def stream_table(table_query, export_format):
+    # The filtered table is streamed in chunks instead of being built as one file in memory
+    if not valid_table_query(table_query) or export_format not in EXPORT_FORMATS:
+        flask.abort(400)
+    try:
+        df, rows, columns = search_table(table_query)
+    except dash.exceptions.PreventUpdate:
+        # The search result has expired from the cache
+        flask.abort(404)
+    filename, mimetype, write = EXPORT_FORMATS[export_format]
+    # The first chunk is built before the response starts, an error there is still answered with its status
+    # instead of a truncated download
+    chunks = write(df, rows, columns)
+    first = next(chunks)
+    return flask.Response(flask.stream_with_context(itertools.chain([first], chunks)), mimetype=mimetype,
+                          headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+@app.server.route(app.config.routes_pathname_prefix + "export/variants")
+def export_variants():
+    return stream_table(decode_token(flask.request.args.get("token", "")), flask.request.args.get("format", "csv"))
+
+@app.server.route(app.config.routes_pathname_prefix + "export/batch", methods=["POST"])
+def export_batch():
+    # The variations of a list of genes and HGVSG posted as text, e.g. curl --data-binary @panel.txt
+    identifiers = parse_identifiers(flask.request.get_data(as_text=True))
+    export_format = flask.request.args.get("format", "csv")
+    if not identifiers or export_format not in EXPORT_FORMATS:
+        flask.abort(400)
+    rows, missing = store.batch_rows(identifiers)
+    return stream_table({'category': "batch", 'data': put_rows(rows)}, export_format)
         
+# VCF records are joined on the HGVSG of the variations
+vcf_annotator = VcfAnnotator(store)
+
+@app.server.route(app.config.routes_pathname_prefix + "annotate/vcf", methods=["POST"])
+def annotate_vcf():
+    # The VCF is sent as the raw request body (curl --data-binary @sample.vcf.gz) so that it can be read while the response is streamed.
+    # The first piece of the input is read before the response starts, a body that is not (b)gzip or VCF text is answered with 400;
+    # a file corrupted further on can only cut the download short.
+    chunks = stream_vcf_gz(vcf_annotator.annotate(decompressed(flask.request.stream)))
+    try:
+        first = next(chunks)
+    except zlib.error:
+        flask.abort(400, "The VCF is not a valid gzip file")
+    return flask.Response(flask.stream_with_context(itertools.chain([first], chunks)), mimetype="application/gzip",
+                          headers={"Content-Disposition": "attachment; filename=annotated.vcf.gz"})
+
+# JSON API for scripts and pipelines, answered from the variant store and the search caches without any Dash layout
+API_PREFIX = app.config.routes_pathname_prefix + "api/v1/"
+
+@app.server.errorhandler(HTTPException)
+def handle_http_error(error):
+    # The API answers its errors in JSON, the other routes keep the HTML error pages
+    if flask.request.path.startswith(API_PREFIX):
+        return json_error(error)
+    return error
+
+@app.server.route(API_PREFIX + "<path:path>")
+def api_not_found(path):
+    # Without it the Dash pages would answer the unknown API paths with the HTML of the app
+    flask.abort(404, f"Unknown API path: {path}")
+
+@app.server.route(API_PREFIX + "genes/<symbol>")
+def api_gene(symbol):
+    if symbol not in store.categories('symbol'):
+        flask.abort(404, f"Unknown gene: {symbol}")
+    rows = np.arange(len(store))[store.gene_slice(symbol)]
+    columns = [col for col in store.df.columns if col not in HIDDEN_TABLE_COLUMNS["StopKB"]]
+    return json_page(store.df, rows, columns, flask.request.args)
+
+@app.server.route(API_PREFIX + "diseases/<disorder_id>")
+def api_disease(disorder_id):
+    if disorder_id not in disease_names.index:
+        flask.abort(404, f"Unknown disease: {disorder_id}")
+    result_key, _ = search_result("disease", disease_names[disorder_id])
+    return json_page(*search_table({'category': "disease", 'data': result_key}), flask.request.args)
+
+@app.server.route(API_PREFIX + "phenotypes/<hpo_id>")
+def api_phenotype(hpo_id):
+    if hpo_id not in phenotype_names.index:
+        flask.abort(404, f"Unknown phenotype: {hpo_id}")
+    result_key, _ = search_result("phenotype", phenotype_names[hpo_id])
+    return json_page(*search_table({'category': "phenotype", 'data': result_key}), flask.request.args)
+
+@app.server.route(API_PREFIX + "variants")
+def api_variants():
+    # Same filters as the StopKB page, a parameter that is not given leaves its column unfiltered
+    args = flask.request.args
+    spec = FilterSpec(list_arg(args, "source"),
+                      list_arg(args, "clinical_significance"),
+                      *range_arg(args, "pos_stop_prot"),
+                      *range_arg(args, "pos_relative_prot"),
+                      list_arg(args, "codon_stop"),
+                      list_arg(args, "nmd_sensitivity"),
+                      *range_arg(args, "af"),
+                      list_arg(args, "overlapping_domain"))
+    rows = None
+    ids = list_arg(args, "ids")
+    if ids:
+        # Restricted to a list of genes and HGVSG, as the batch search; an empty ids= is the same as no ids
+        rows = store.batch_rows(ids)[0]
+    if "region" in args:
+        # region=17:7660000-7690000, repeated for several regions
+        regions = [parse_region(region) for region in args.getlist("region")]
+        if None in regions:
+            flask.abort(400, "Invalid region")
+        region_rows = store.region_rows(regions)
+        rows = region_rows if rows is None else np.intersect1d(rows, region_rows, assume_unique=True)
+    # The filters only read the values of the listed rows
+    rows = spec.rows(store, rows)
+    columns = [col for col in store.df.columns if col not in HIDDEN_TABLE_COLUMNS["StopKB"]]
+    return json_page(store.df, rows, columns, args)
+
 @app.callback(
     Output("download-dataframe-csv-genes", "data"),
     Input("btn_csv_genes", "n_clicks"),
     [State("category-dropdown", "value"),
-    State("table-genes", "data"),]
+    State("table-genes", "data"),
+    State("export-format", "value"),]
     )
-def download_table_genes(n_clicks,category,data):
+def download_table_genes(n_clicks,category,data,export_format):
     if n_clicks > 0:
             gene_df = pd.DataFrame(data)
-            return dcc.send_data_frame(gene_df.to_csv, "data.csv")
+            return send_table(gene_df, export_format)
         
 @app.callback(
     Output("download-dataframe-csv-diseases", "data"),
     Input("btn_csv_diseases", "n_clicks"),
     [State("category-dropdown", "value"),
-    State("table-diseases", "data"),]
+    State("table-diseases", "data"),
+    State("export-format", "value"),]
     )
-def download_table_diseases(n_clicks,category,data):
+def download_table_diseases(n_clicks,category,data,export_format):
     if n_clicks > 0:
             disease_df = pd.DataFrame(data)
-            return dcc.send_data_frame(disease_df.to_csv, "data.csv")
+            return send_table(disease_df, export_format)
         
 @app.callback(
     Output("download-dataframe-csv-phenotypes", "data"),
     Input("btn_csv_phenotypes", "n_clicks"),
     [State("category-dropdown", "value"),
-    State("table-phenotypes", "data"),]
+    State("table-phenotypes", "data"),
+    State("export-format", "value"),]
     )
-def download_table_phenotypes(n_clicks,category,data):
+def download_table_phenotypes(n_clicks,category,data,export_format):
     if n_clicks > 0:
             phenotype_df = pd.DataFrame(data)
-            return dcc.send_data_frame(phenotype_df.to_csv, "data.csv")
+            return send_table(phenotype_df, export_format)
         
 
 if __name__ == '__main__':
@@ -0,0 +1,24 @@
+// Live filtering: the filter controls trigger the filtering once they have not changed for LIVE_FILTER_DELAY ms
+const LIVE_FILTER_DELAY = 400;
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    stopkb: {
+        debounce_filters: function () {
+            const live = arguments[arguments.length - 1];
+            if (!live) {
+                return window.dash_clientside.no_update;
+            }
+            // Every change restarts the delay, only the last change of a burst is sent to the server.
+            // The time of the request tells the server which request of the page is the latest.
+            const time = Date.now();
+            window.stopkbLiveFilter = window.stopkbLiveFilter || {session: Math.random().toString(36).slice(2)};
+            window.stopkbLiveFilter.time = time;
+            return new Promise(function (resolve) {
+                setTimeout(function () {
+                    const state = window.stopkbLiveFilter;
+                    resolve(state.time === time ? {session: state.session, time: time} : window.dash_clientside.no_update);
+                }, LIVE_FILTER_DELAY);
+            });
+        }
+    }
+});
@@ -0,0 +1,88 @@
+import functools
+import hashlib
+import io
+import json
+import os
+
+import diskcache
+import pandas as pd
+
+# File-backed caches shared by every worker of the server
+CACHE_DIR = os.getenv('STOPKB_CACHE_DIR', 'cache')
+CACHE_SIZE = int(os.getenv('STOPKB_CACHE_SIZE', 512 * 2**20))
+CACHE_TTL = int(os.getenv('STOPKB_CACHE_TTL', 3600))
+# Number of decoded search results kept in the memory of each worker
+RESULT_MEMORY_SIZE = int(os.getenv('STOPKB_RESULT_MEMORY_SIZE', 16))
+
+aggregate_cache = diskcache.Cache(os.path.join(CACHE_DIR, 'aggregates'), size_limit=CACHE_SIZE, eviction_policy='least-recently-used')
+# State and results of the background callbacks
+job_cache = diskcache.Cache(os.path.join(CACHE_DIR, 'jobs'))
+# Search results stay on the server as Parquet blobs, the browser only keeps their key
+result_cache = diskcache.Cache(os.path.join(CACHE_DIR, 'results'), size_limit=CACHE_SIZE, eviction_policy='least-recently-used')
+
+
+def normalize(value):
+    # Lists keep their order, sets (e.g. checklist values) are sorted; numeric inputs may come back as int or float
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((normalize(item) for item in value), key=repr)
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    return str(value)
+
+
+def make_key(*parts):
+    payload = json.dumps([normalize(part) for part in parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cached(cache, key, compute):
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, expire=CACHE_TTL)
+    return value
+
+
+def put_result(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    blob = buffer.getvalue()
+    # The key depends on the content only, identical results share one blob
+    key = hashlib.sha256(blob).hexdigest()[:32]
+    result_cache.set(key, blob, expire=CACHE_TTL)
+    return key
+
+
+@functools.lru_cache(maxsize=RESULT_MEMORY_SIZE)
+def read_result(key):
+    # A key always names the same content, the decoded frame can be reused until it leaves the LRU.
+    # Missing results raise instead of returning None so that they are not remembered.
+    blob = result_cache.get(key)
+    if blob is None:
+        raise KeyError(key)
+    return pd.read_parquet(io.BytesIO(blob))
+
+
+def get_result(key):
+    # The frame is shared by the requests of the worker, callers must not modify it
+    if not key:
+        return None
+    try:
+        return read_result(key)
+    except KeyError:
+        return None
+
+
+def put_rows(rows):
+    # Row positions of a filtered table, stored under a hash of their content
+    key = hashlib.sha256(rows.tobytes()).hexdigest()[:32]
+    result_cache.set('rows-' + key, rows, expire=CACHE_TTL)
+    return key
+
+
+def get_rows(key):
+    return result_cache.get('rows-' + key) if key else None
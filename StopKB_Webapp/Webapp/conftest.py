@@ -0,0 +1,29 @@
+import pandas as pd
+
+from local_queries import GENE_COLUMNS, VARIANT_COLUMNS
+from variant_store import ANNOTATION_COLUMNS, FLOAT_COLUMNS, INTEGER_COLUMNS
+
+
+def write_database(root):
+    # Smallest tree the app can start on with STOPKB_ENGINE=local: two variations of WT1, whose links to
+    # its disease and to one of the phenotypes are listed twice, as some are in the flat database files
+    assets = root / "Webapp" / "assets"
+    flat_database = assets / "flat_database"
+    flat_database.mkdir(parents=True)
+    (root / "database").mkdir()
+    variants = pd.DataFrame({column: [1, 1] if column in INTEGER_COLUMNS + FLOAT_COLUMNS else ['-', '-'] for column in GENE_COLUMNS + VARIANT_COLUMNS + ANNOTATION_COLUMNS})
+    variants['HGVSG'] = ['11:g.32392000C>T', '11:g.32392100G>A']
+    variants['symbol'] = 'WT1'
+    variants['Merged_Source'] = ['ClinVar', 'gnomAD']
+    variants.drop(columns='Source').to_csv(assets / "StopKB.csv", sep="\t", index=False)
+    variants[['HGVSG', 'Merged_Source']].to_csv(flat_database / "variant.csv", sep="\t", index=False)
+    pd.DataFrame({'symbol': ['WT1'], 'domain_1': ['Zinc finger;10;200']}).to_csv(flat_database / "gene.csv", sep="\t", index=False)
+    pd.DataFrame({'disorder_id': ['852'], 'name': ['Wilms tumor'], 'orpha_code': ['654'], 'definition': ['d'], 'prevalence_geo': ['p']}).to_csv(flat_database / "disease.csv", index=False)
+    pd.DataFrame({'disorder_id': ['852', '852'], 'symbol': ['WT1', 'WT1']}).to_csv(flat_database / "disease_gene.csv", sep="\t", index=False)
+    pd.DataFrame({'disorder_id': ['852', '852', '852'], 'hpo_id': ['HP:1', 'HP:2', 'HP:2']}).to_csv(flat_database / "disease_phenotype.csv", sep="\t", index=False)
+    pd.DataFrame({'hpo_id': ['HP:1', 'HP:2'], 'hpo_name': ['Tumor', 'Nephropathy'], 'comment': ['c', 'c'], 'definition_x': ['d', 'd']}).to_csv(flat_database / "phenotype.csv", sep="\t", index=False)
+    for name, values in [('gene_names', ['WT1']), ('disease_names', ['Wilms tumor']), ('phenotype_names', ['Tumor', 'Nephropathy']), ('variant_names', variants['HGVSG'])]:
+        (root / "database" / f"{name}.txt").write_text("".join(value + "\n" for value in values))
+    for name, number in [('variations_number', 2), ('genes_number', 1), ('diseases_number', 1), ('phenotypes_number', 2)]:
+        (root / "database" / f"{name}.txt").write_text(str(number))
+    return root / "Webapp"
@@ -0,0 +1,104 @@
+import base64
+import io
+import json
+import os
+import zlib
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Number of table rows converted at once, the memory used by an export does not depend on its size
+EXPORT_CHUNK_ROWS = int(os.getenv('STOPKB_EXPORT_CHUNK_ROWS', 50000))
+# Largest decompressed token, a table query takes a few hundred bytes
+MAX_TOKEN_BYTES = int(os.getenv('STOPKB_MAX_TOKEN_BYTES', 64 * 2**10))
+
+
+def encode_token(table_query):
+    # The filters of a table in a form that fits in a URL
+    return base64.urlsafe_b64encode(zlib.compress(json.dumps(table_query, separators=(',', ':')).encode())).decode()
+
+
+def decode_token(token):
+    # None for a token that is not a complete zlib stream of JSON, or that decompresses past MAX_TOKEN_BYTES
+    try:
+        decompressor = zlib.decompressobj()
+        data = decompressor.decompress(base64.urlsafe_b64decode(token.encode()), MAX_TOKEN_BYTES)
+        if decompressor.unconsumed_tail or not decompressor.eof:
+            return None
+        return json.loads(data)
+    except (ValueError, RecursionError, zlib.error):
+        return None
+
+
+def chunks(df, rows, columns):
+    for start in range(0, max(len(rows), 1), EXPORT_CHUNK_ROWS):
+        yield start, df.iloc[rows[start:start + EXPORT_CHUNK_ROWS]][columns]
+
+
+def stream_csv_gz(df, rows, columns):
+    # Each CSV chunk is compressed as soon as it is built, into a single gzip stream (wbits=31)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for start, chunk in chunks(df, rows, columns):
+        data = compressor.compress(chunk.to_csv(header=start == 0).encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class ChunkSink(io.RawIOBase):
+    # Write-only file handing over the bytes written since the last take(), the writers still see the full file offsets
+    def __init__(self):
+        self.buffers = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffers.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        data = b"".join(self.buffers)
+        self.buffers = []
+        return data
+
+
+def arrow_schema(df):
+    # Categorical columns become dictionary arrays, columns that are empty in the first chunk are typed as text
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    return pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in schema], metadata=schema.metadata)
+
+
+def stream_arrow(df, rows, columns, open_writer):
+    sink = ChunkSink()
+    writer = None
+    for start, chunk in chunks(df, rows, columns):
+        if writer is None:
+            schema = arrow_schema(chunk)
+            writer = open_writer(sink, schema)
+        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+def stream_parquet(df, rows, columns):
+    # One row group per chunk, zstd-compressed and dictionary-encoded
+    return stream_arrow(df, rows, columns, lambda sink, schema: pq.ParquetWriter(sink, schema, compression='zstd', use_dictionary=True))
+
+
+def stream_arrow_ipc(df, rows, columns):
+    return stream_arrow(df, rows, columns, lambda sink, schema: pa.ipc.new_file(sink, schema, options=pa.ipc.IpcWriteOptions(compression='zstd')))
+
+
+# Download name, MIME type and writer of each format
+EXPORT_FORMATS = {
+    'csv': ("data.csv.gz", "application/gzip", stream_csv_gz),
+    'parquet': ("data.parquet", "application/vnd.apache.parquet", stream_parquet),
+    'arrow': ("data.arrow", "application/vnd.apache.arrow.file", stream_arrow_ipc),
+}
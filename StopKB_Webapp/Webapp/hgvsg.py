@@ -0,0 +1,124 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+# Chromosomes of the packed keys, code 0 is kept for the HGVSG that are not on one of them
+CHROMOSOMES = [str(i) for i in range(1, 23)] + ['X', 'Y', 'MT']
+CHROMOSOME_CODES = {name: code for code, name in enumerate(CHROMOSOMES, start=1)}
+
+# RefSeq accessions of the GRCh38 chromosomes, in case the HGVSG are written with them
+CHROMOSOME_ACCESSIONS = {f'NC_{number:06d}': name for number, name in enumerate(CHROMOSOMES[:24], start=1)}
+CHROMOSOME_ACCESSIONS['NC_012920'] = 'MT'
+
+NUCLEOTIDES = 'ACGT'
+
+# Layout of a packed key, from the high bits: chromosome (8 bits), position (32 bits), allele (24 bits).
+# An SNV allele is ref * 4 + alt, any other change (del, ins, delins...) sets OTHER_ALLELE and gives
+# the index of its text in the codec. Keys therefore sort by chromosome then position.
+CHROM_SHIFT = np.uint64(56)
+POSITION_SHIFT = np.uint64(24)
+POSITION_MASK = np.uint64(0xFFFFFFFF)
+ALLELE_MASK = np.uint64(0xFFFFFF)
+OTHER_ALLELE = 1 << 23
+# Allele of the changes that are not in the codec, no stored key has it
+UNKNOWN_ALLELE = (1 << 24) - 1
+
+
+@functools.lru_cache(maxsize=None)
+def chromosome_name(name):
+    # 'chr17', '17' and 'NC_000017.11' are the same chromosome
+    name = str(name)
+    name = CHROMOSOME_ACCESSIONS.get(name.split('.')[0], name)
+    name = name[3:] if name.lower().startswith('chr') else name
+    name = name.upper()
+    return 'MT' if name == 'M' else name
+
+
+def pack(chrom, pos, allele):
+    return (np.asarray(chrom, dtype=np.uint64) << CHROM_SHIFT) | (np.asarray(pos, dtype=np.uint64) << POSITION_SHIFT) | np.asarray(allele, dtype=np.uint64)
+
+
+def unpack(keys):
+    keys = np.asarray(keys, dtype=np.uint64)
+    return (keys >> CHROM_SHIFT).astype(np.int64), ((keys >> POSITION_SHIFT) & POSITION_MASK).astype(np.int64), (keys & ALLELE_MASK).astype(np.int64)
+
+
+class HgvsgCodec:
+    # HGVSG strings <-> uint64 keys. SNVs are packed entirely, the text of the other changes is interned.
+    def __init__(self):
+        self.others = []
+        self.other_codes = {}
+        # Chromosome code -> name as first written in the encoded HGVSG (e.g. NC_000017.11), used by decode
+        self.written_names = {}
+
+    def allele_code(self, change, grow):
+        if len(change) == 3 and change[1] == '>' and change[0] in NUCLEOTIDES and change[2] in NUCLEOTIDES:
+            return NUCLEOTIDES.index(change[0]) * 4 + NUCLEOTIDES.index(change[2])
+        if change not in self.other_codes:
+            if not grow or len(self.others) >= OTHER_ALLELE - 1:
+                return UNKNOWN_ALLELE
+            self.other_codes[change] = OTHER_ALLELE | len(self.others)
+            self.others.append(change)
+        return self.other_codes[change]
+
+    def allele_text(self, allele):
+        if allele == UNKNOWN_ALLELE:
+            return '?'
+        if allele & OTHER_ALLELE:
+            return self.others[allele & (OTHER_ALLELE - 1)]
+        return f"{NUCLEOTIDES[allele >> 2]}>{NUCLEOTIDES[allele & 3]}"
+
+    def allele_end(self, allele):
+        # Last position of the changes written as a range (1001_1003del), -1 for the others
+        text = self.allele_text(allele)
+        if allele & OTHER_ALLELE and text.startswith('_'):
+            digits = text[1:len(text) - len(text[1:].lstrip('0123456789'))]
+            return int(digits) if digits else -1
+        return -1
+
+    def encode(self, hgvsg, grow=True):
+        # Every distinct chromosome and change is converted once, then gathered for all the variations.
+        # HGVSG outside the known chromosomes are interned whole, with chromosome 0 and position 0.
+        hgvsg = pd.Series(hgvsg, dtype=object)
+        parts = hgvsg.str.extract(r'^([^:]+):g\.(\d+)(.*)$')
+        codes, names = pd.factorize(parts[0])
+        name_codes = [CHROMOSOME_CODES.get(chromosome_name(name), 0) for name in names]
+        if grow:
+            for name, code in zip(names, name_codes):
+                if code:
+                    self.written_names.setdefault(code, name)
+        chrom = np.array(name_codes + [0], dtype=np.uint64)[codes]
+        known = chrom > 0
+        pos = np.where(known, pd.to_numeric(parts[1]).fillna(0).to_numpy(), 0)
+        changes = parts[2].where(known, hgvsg).fillna('')
+        codes, values = pd.factorize(changes)
+        allele = np.array([self.allele_code(value, grow) for value in values] + [UNKNOWN_ALLELE], dtype=np.uint64)[codes]
+        return pack(chrom, pos, allele)
+
+    def decode(self, keys):
+        # HGVSG of the keys, with each chromosome written as in the encoded HGVSG (the short name if it was
+        # never encoded). The HGVSG of the store are decoded to the same strings as long as each chromosome
+        # is written one way in the file, as in StopKB.csv (short names, e.g. 11:g.126275389C>T).
+        chrom, pos, allele = unpack(keys)
+        alleles, inverse = np.unique(allele, return_inverse=True)
+        text = np.array([self.allele_text(value) for value in alleles], dtype=object)[inverse.ravel()]
+        names = [self.written_names.get(code, name) for code, name in enumerate(CHROMOSOMES, start=1)]
+        prefix = np.array([''] + [name + ':g.' for name in names], dtype=object)[chrom] + pos.astype(str).astype(object)
+        return np.where(chrom > 0, prefix + text, text)
+
+    def ends(self, keys):
+        # Last position covered by each variation, the position itself except for ranges
+        _, pos, allele = unpack(keys)
+        alleles, inverse = np.unique(allele, return_inverse=True)
+        end = np.array([self.allele_end(value) for value in alleles], dtype=np.int64)[inverse.ravel()]
+        return np.where(end >= 0, end, pos)
+
+    def key(self, chrom, pos, change):
+        # Key of one variation, None if it cannot be in the store
+        code = CHROMOSOME_CODES.get(chromosome_name(chrom), 0)
+        allele = self.allele_code(change, False)
+        if code == 0 or allele == UNKNOWN_ALLELE or not 0 <= pos <= int(POSITION_MASK):
+            return None
+        # Plain integers, this is called for every record of a VCF
+        return (code << 56) | (pos << 24) | allele
@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Same columns, in the same order, as the Neo4j queries
+VARIANT_COLUMNS = ['HGVSG', 'Source', 'ClinicalSignificance', 'pos_stop_prot', 'pos_relative_prot', 'pos_var_cds', 'nuc_upstream', 'codon_stop', 'nuc_downstream', 'exon_localization', 'NMD_sensitivity', 'AF', 'AF_afr', 'AF_amr', 'AF_asj', 'AF_eas', 'AF_fin', 'AF_mid', 'AF_nfe', 'AF_sas', 'AF_remaining', 'overlapping_domain', 'Origin', 'ReviewStatus']
+GENE_COLUMNS = ['symbol', 'RefSeq_nuc', 'Ensembl_nuc', 'RefSeq_prot', 'Ensembl_prot', 'prot_length', 'exon_counts']
+
+
+class LocalQueries:
+    # Answers the gene, disease and phenotype searches from the variant store and the flat database files, without Neo4j
+    def __init__(self, store, path="assets/flat_database"):
+        self.store = store
+
+        # Identifiers are kept as strings, as they are imported in Neo4j
+        diseases = pd.read_csv(os.path.join(path, "disease.csv"), dtype=str)
+        self.diseases = diseases.rename(columns={'name': 'disorder_name'})
+        # Links are merged once in Neo4j, the files repeat some of them
+        self.disease_genes = pd.read_csv(os.path.join(path, "disease_gene.csv"), sep="\t", dtype=str).drop_duplicates(ignore_index=True)
+        phenotypes = pd.read_csv(os.path.join(path, "phenotype.csv"), sep="\t", dtype=str)
+        self.phenotypes = phenotypes.rename(columns={'definition_x': 'definition'})
+        disease_phenotypes = pd.read_csv(os.path.join(path, "disease_phenotype.csv"), sep="\t", dtype=str).drop_duplicates()
+        self.disease_phenotypes = disease_phenotypes.merge(self.phenotypes[['hpo_id', 'hpo_name']], on='hpo_id')
+
+        # Inverted indexes from a name or an identifier to the positions of its rows
+        self.diseases_by_name = self.diseases.groupby('disorder_name').indices
+        self.phenotypes_by_name = self.phenotypes.groupby('hpo_name').indices
+        self.genes_by_disease = self.disease_genes.groupby('disorder_id').indices
+        self.phenotypes_by_disease = self.disease_phenotypes.groupby('disorder_id').indices
+        self.diseases_by_phenotype = self.disease_phenotypes.groupby('hpo_id').indices
+
+    @staticmethod
+    def lookup(df, index, keys):
+        positions = [index[key] for key in pd.unique(pd.Series(keys, dtype=object)) if key in index]
+        return df.iloc[np.concatenate(positions)] if positions else df.iloc[:0]
+
+    @staticmethod
+    def plain(df):
+        # Plain columns, as returned by Neo4j, so that value_counts() only lists the values found
+        return df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+    def variants(self, symbols, columns):
+        return self.plain(self.store.frame(self.store.gene_rows(symbols))[columns])
+
+    def gene(self, value):
+        return self.store.frame(self.store.gene_slice(value))[GENE_COLUMNS + VARIANT_COLUMNS].pipe(self.plain).reset_index(drop=True)
+
+    def disease(self, value):
+        diseases = self.lookup(self.diseases, self.diseases_by_name, [value])[['disorder_id', 'orpha_code', 'definition', 'prevalence_geo']]
+        disease_genes = diseases.merge(self.lookup(self.disease_genes, self.genes_by_disease, diseases['disorder_id']), on='disorder_id')
+        disease_df = disease_genes.merge(self.variants(disease_genes['symbol'], ['symbol'] + VARIANT_COLUMNS), on='symbol')
+        # OPTIONAL MATCH: a disease without phenotype keeps one row with an empty hpo_name
+        disease_phenotypes = self.lookup(self.disease_phenotypes, self.phenotypes_by_disease, diseases['disorder_id'])
+        return disease_df.merge(disease_phenotypes[['disorder_id', 'hpo_name']], on='disorder_id', how='left')
+
+    def phenotype(self, value):
+        phenotypes = self.lookup(self.phenotypes, self.phenotypes_by_name, [value])[['hpo_id', 'comment', 'definition']]
+        phenotype_diseases = phenotypes.merge(self.lookup(self.disease_phenotypes, self.diseases_by_phenotype, phenotypes['hpo_id'])[['disorder_id', 'hpo_id']], on='hpo_id')
+        phenotype_diseases = phenotype_diseases.merge(self.diseases[['disorder_id', 'disorder_name']], on='disorder_id').rename(columns={'disorder_name': 'disease'})
+        phenotype_genes = phenotype_diseases.merge(self.lookup(self.disease_genes, self.genes_by_disease, phenotype_diseases['disorder_id']), on='disorder_id')[['hpo_id', 'comment', 'definition', 'disease', 'symbol']]
+        return phenotype_genes.merge(self.variants(phenotype_genes['symbol'], ['symbol'] + VARIANT_COLUMNS), on='symbol')
+
+    def search(self, category, value):
+        return getattr(self, category)(value)
+
+    def warm_up(self):
+        pass
@@ -29,6 +29,8 @@ layout = dbc.Container(
                                 {"label": "Gene", "value": "gene"},
                                 {"label": "Disease", "value": "disease"},
                                 {"label": "Phenotype", "value": "phenotype"},
+                                {"label": "Gene / variation list", "value": "batch"},
+                                {"label": "Genomic region", "value": "region"},
                                 #{"label": "Variation", "value": "variation"},
                             ],
                             value="StopKB",  # valeur par défaut
@@ -58,12 +60,49 @@ layout = dbc.Container(
             style={"margin-top": "2%"},
             className="g-0",  # Retire l'espace entre les colonnes
         ),
+        # Liste de gènes, de variations (HGVSG) ou de régions, saisie ou chargée depuis un fichier
+        dbc.Row(
+            [
+                dbc.Col(
+                    dcc.Textarea(
+                        id="batch-input",
+                        placeholder="One gene symbol or HGVSG per line",
+                        style={"width": "100%", "height": "150px"},
+                    ),
+                    md=8,
+                ),
+                dbc.Col(
+                    dcc.Upload(
+                        id="batch-upload",
+                        children=html.Div(["Drag and drop or ", html.A("select a file")]),
+                        style={"width": "100%", "height": "150px", "lineHeight": "150px", "borderWidth": "1px", "borderStyle": "dashed", "borderRadius": "5px", "textAlign": "center"},
+                    ),
+                    md=4,
+                ),
+            ],
+            id="batch-row",
+            justify="center",
+            style={"display": "none"},
+        ),
         dbc.Row(
             dbc.Button("Search", id="search-button", color="primary", className="mr-1", n_clicks=0, style={"width": "200px", "margin": "auto"}),
             justify="center",
             style={"margin-top": "2%"},
         ),
+        # Progression des recherches lancées en tâche de fond
+        dbc.Row(
+            [
+                dbc.Col(dbc.Progress(id="search-progress", value=0, max=4, striped=True, animated=True), width=4),
+                dbc.Col(dbc.Button("Cancel", id="cancel-button", color="secondary", n_clicks=0), width="auto"),
+            ],
+            id="search-job",
+            justify="center",
+            align="center",
+            style={"display": "none"},
+        ),
         dcc.Store(id='stored-df'),
+        # Phenotype search started by the Search button, run by the background callback
+        dcc.Store(id='phenotype-search'),
         dcc.Loading(
             id="loading",
             type="circle",
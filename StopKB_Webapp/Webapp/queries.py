@@ -0,0 +1,49 @@
+import atexit
+import os
+
+import neo4j
+from neo4j import GraphDatabase
+
+URI = os.getenv('NEO4J_URI', "neo4j://localhost:7687")
+AUTH = ("neo4j", os.getenv('NEO4J_PASSWORD'))
+DATABASE = "neo4j"
+
+# Connections are pooled by the driver and shared by every callback of the worker
+POOL_SIZE = int(os.getenv('NEO4J_POOL_SIZE', 50))
+ACQUISITION_TIMEOUT = float(os.getenv('NEO4J_ACQUISITION_TIMEOUT', 60))
+
+VARIANT_FIELDS = "v.HGVSG as HGVSG, v.Merged_Source as Source, v.ClinicalSignificance as ClinicalSignificance, v.pos_stop_prot as pos_stop_prot, v.pos_relative_prot as pos_relative_prot, v.pos_var_cds as pos_var_cds, v.nuc_upstream as nuc_upstream, v.codon_stop as codon_stop, v.nuc_downstream as nuc_downstream, v.exon_localization as exon_localization, v.NMD_sensitivity as NMD_sensitivity, v.AF_ww as AF,v.AF_afr as AF_afr, v.AF_amr as AF_amr, v.AF_asj as AF_asj, v.AF_eas as AF_eas, v.AF_fin as AF_fin, v.AF_mid as AF_mid, v.AF_nfe as AF_nfe, v.AF_sas as AF_sas, v.AF_remaining as AF_remaining, v.overlapping_domain as overlapping_domain, v.Origin as Origin, v.ReviewStatus as ReviewStatus"
+
+# The searched value is always passed as the $value parameter, so each query text is planned only once by Neo4j
+GENE_QUERY = "MATCH (v:Variant)-[LOCATED_ON]-(g:Gene) WHERE g.Symbol = $value RETURN g.Symbol as symbol, g.RefSeq_nuc as RefSeq_nuc, g.Ensembl_nuc as Ensembl_nuc, g.RefSeq_prot as RefSeq_prot, g.Ensembl_prot as Ensembl_prot, g.prot_length as prot_length, g.exon_counts as exon_counts, " + VARIANT_FIELDS
+
+DISEASE_QUERY = "MATCH (v:Variant)-[LOCATED_ON]-(g:Gene)-[CAUSED_BY]-(d:Disease) WHERE d.disorder_name = $value OPTIONAL MATCH (d)-[RECOGNIZABLE_BY]-(p:Phenotype)  RETURN d.disorder_id as disorder_id, d.orpha_code as orpha_code, d.definition as definition, d.prevalence_geo as prevalence_geo, g.Symbol as symbol, " + VARIANT_FIELDS + ", p.hpo_name as hpo_name"
+
+PHENOTYPE_QUERY = "MATCH (v:Variant)-[LOCATED_ON]-(g:Gene)-[CAUSED_BY]-(d:Disease)-[RECOGNIZABLE_BY]-(p:Phenotype) WHERE p.hpo_name = $value RETURN p.hpo_id as hpo_id, p.comment as comment, p.definition as definition, d.disorder_name as disease, g.Symbol as symbol, " + VARIANT_FIELDS
+
+QUERIES = {
+    'gene': GENE_QUERY,
+    'disease': DISEASE_QUERY,
+    'phenotype': PHENOTYPE_QUERY,
+}
+
+def connect():
+    global driver
+    driver = GraphDatabase.driver(URI, auth=AUTH, max_connection_pool_size=POOL_SIZE, connection_acquisition_timeout=ACQUISITION_TIMEOUT)
+
+
+connect()
+driver.verify_connectivity()
+atexit.register(lambda: driver.close())
+# Background jobs run in forked processes, they open their own connections instead of sharing the parent's sockets
+os.register_at_fork(after_in_child=connect)
+
+
+def search(category, value):
+    return driver.execute_query(QUERIES[category], parameters_={'value': value}, database_=DATABASE, result_transformer_=neo4j.Result.to_df)
+
+
+def warm_up():
+    # Run every query once with a value that matches nothing, so that its plan is cached before the first user search
+    for category in QUERIES:
+        search(category, "")
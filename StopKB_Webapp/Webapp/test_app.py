@@ -0,0 +1,73 @@
+import gzip
+import importlib
+import os
+
+import pytest
+
+from conftest import write_database
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    # The app reads its files from the working directory when it is imported
+    root = tmp_path_factory.mktemp("stopkb")
+    webapp = write_database(root)
+    environ = {'STOPKB_ENGINE': 'local', 'STOPKB_CACHE_DIR': str(root / "cache")}
+    previous = {name: os.environ.get(name) for name in environ}
+    cwd = os.getcwd()
+    os.environ.update(environ)
+    os.chdir(webapp)
+    try:
+        yield importlib.import_module('app')
+    finally:
+        os.chdir(cwd)
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def evict_results(app):
+    # Same as an expiry or an eviction from the result cache, in every worker
+    app.result_cache.clear()
+    importlib.import_module('cache').read_result.cache_clear()
+
+
+def test_filter_after_result_evicted(app):
+    _, result_key = app.execute_search(1, "disease", "Wilms tumor", None)
+    table_query = {'category': "disease", 'data': result_key, 'value': "Wilms tumor"}
+    evict_results(app)
+    # Apply Filter on a search whose result has left the cache: the search is run again
+    outputs = app.filter_data(1, result_key, ['ClinVar'], None, None, None, None, None, None, None, None, None, None, "disease", "Wilms tumor", table_query)
+    table_query = outputs[0]
+    evict_results(app)
+    data, page_count = app.update_table_page(0, 20, [], table_query)
+    assert [row['HGVSG'] for row in data] == ['11:g.32392000C>T']
+    assert page_count == 1
+
+
+def test_sort_by_unknown_column(app):
+    _, rows_key = app.execute_search(1, "batch", None, "WT1")
+    table_query = {'category': "batch", 'data': rows_key}
+    sort_by = [{'column_id': 'nope', 'direction': 'asc'}, {'column_id': 'HGVSG', 'direction': 'desc'}]
+    data, _ = app.update_table_page(0, 20, sort_by, table_query)
+    assert [row['HGVSG'] for row in data] == ['11:g.32392100G>A', '11:g.32392000C>T']
+
+
+def test_api_empty_ids(app):
+    client = app.app.server.test_client()
+    everything = client.get('/stopkb/api/v1/variants').get_json()['total']
+    assert client.get('/stopkb/api/v1/variants?ids=').get_json()['total'] == everything
+    assert client.get('/stopkb/api/v1/variants?ids=,').get_json()['total'] == everything
+    assert client.get('/stopkb/api/v1/variants?ids=WT1,').get_json()['total'] == 2
+
+
+def test_annotate_vcf(app):
+    client = app.app.server.test_client()
+    vcf = b"##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n11\t32392000\t.\tC\tT\t.\tPASS\t.\n"
+    response = client.post('/stopkb/annotate/vcf', data=gzip.compress(vcf))
+    assert response.status_code == 200
+    assert "STOPKB_HGVSG=11:g.32392000C>T" in gzip.decompress(response.get_data()).decode()
+    # A corrupt gzip file is refused before the download starts
+    assert client.post('/stopkb/annotate/vcf', data=gzip.compress(vcf)[:12] + b"\x00" * 40).status_code == 400
@@ -0,0 +1,21 @@
+import pytest
+
+from conftest import write_database
+from local_queries import LocalQueries
+from variant_store import VariantStore
+
+
+@pytest.fixture
+def local(tmp_path):
+    webapp = write_database(tmp_path)
+    return LocalQueries(VariantStore(webapp / "assets" / "StopKB.csv"), webapp / "assets" / "flat_database")
+
+
+def test_disease_duplicate_links(local):
+    # Neo4j merges the repeated links: one row per variation and phenotype of the disease
+    assert len(local.disease('Wilms tumor')) == 2 * 2
+
+
+def test_phenotype_duplicate_links(local):
+    # One row per variation of the genes of the diseases with the phenotype
+    assert len(local.phenotype('Nephropathy')) == 2
@@ -0,0 +1,57 @@
+import gzip
+import io
+import zlib
+
+import pytest
+
+import vcf
+
+TEXT = b"".join(b"11\t%d\t.\tC\tT\t.\tPASS\t.\n" % position for position in range(126275389, 126275789))
+
+
+@pytest.mark.parametrize('read_size', [7, 100, 4096])
+def test_decompressed_bgzip_members(monkeypatch, read_size):
+    # bgzip files are a series of gzip members, their boundaries fall anywhere in the pieces read
+    members = [TEXT[:1000], TEXT[1000:5000], b"", TEXT[5000:]]
+    monkeypatch.setattr(vcf, 'VCF_READ_SIZE', read_size)
+    data = b"".join(gzip.compress(member) for member in members)
+    assert b"".join(vcf.decompressed(io.BytesIO(data))) == TEXT
+
+
+def test_decompressed_member_boundary_at_read_end(monkeypatch):
+    first = gzip.compress(TEXT[:1000])
+    monkeypatch.setattr(vcf, 'VCF_READ_SIZE', len(first))
+    data = first + gzip.compress(TEXT[1000:])
+    assert b"".join(vcf.decompressed(io.BytesIO(data))) == TEXT
+
+
+def test_decompressed_plain(monkeypatch):
+    monkeypatch.setattr(vcf, 'VCF_READ_SIZE', 100)
+    chunks = list(vcf.decompressed(io.BytesIO(TEXT)))
+    assert b"".join(chunks) == TEXT
+    assert list(vcf.lines(chunks)) == TEXT.decode().splitlines()
+
+
+def test_decompressed_corrupt_gzip():
+    data = gzip.compress(TEXT)
+    with pytest.raises(zlib.error):
+        b"".join(vcf.decompressed(io.BytesIO(data[:20] + b"\x00" * 50 + data[70:])))
+
+
+def test_lines_not_utf8():
+    # A latin-1 INFO value does not stop the other records
+    assert list(vcf.lines([b"11\t1\t.\tC\tT\t.\tPASS\tNOTE=caf\xe9\n11\t2", b"\t.\tC\tT\t.\tPASS\t.\n"])) == [
+        "11\t1\t.\tC\tT\t.\tPASS\tNOTE=caf\ufffd", "11\t2\t.\tC\tT\t.\tPASS\t."]
+
+
+@pytest.mark.parametrize('pos, ref, alt, change', [
+    (100, 'C', 'T', (100, 'C>T')),
+    (100, 'CAT', 'GAT', (100, 'C>G')),
+    (100, 'AT', 'A', (101, 'del')),
+    (100, 'ATTC', 'A', (101, '_103del')),
+    (100, 'A', 'AG', (100, '_101insG')),
+    (100, 'AT', 'GC', (100, '_101delinsGC')),
+    (100, 'ATG', 'ACC', (101, '_102delinsCC')),
+])
+def test_normalize(pos, ref, alt, change):
+    assert vcf.normalize(pos, ref, alt) == change
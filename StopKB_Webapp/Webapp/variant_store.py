@@ -0,0 +1,673 @@
+import collections
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from hgvsg import CHROMOSOME_CODES, POSITION_MASK, HgvsgCodec, chromosome_name, pack, unpack
+
+# Low-cardinality columns stored as categorical codes
+CATEGORICAL_COLUMNS = ['Source', 'ClinicalSignificance', 'codon_stop', 'NMD_sensitivity', 'symbol', 'Origin']
+
+# Numeric columns kept as contiguous arrays for range filtering
+INTEGER_COLUMNS = ['pos_stop_prot', 'pos_var_cds', 'exon_localization', 'prot_length', 'exon_counts']
+FLOAT_COLUMNS = ['pos_relative_prot', 'AF', 'AF_afr', 'AF_amr', 'AF_asj', 'AF_eas', 'AF_fin', 'AF_mid', 'AF_nfe', 'AF_remaining', 'AF_sas']
+# Numeric columns of the filter panel, also indexed by sorting their values
+RANGE_INDEX_COLUMNS = ['pos_stop_prot', 'pos_relative_prot', 'AF']
+# Checklist columns of the filter panel, indexed by one bitmap per value (with Source and overlapping_domain)
+BITMAP_COLUMNS = ['ClinicalSignificance', 'codon_stop', 'NMD_sensitivity']
+FACET_COLUMNS = ['Source'] + BITMAP_COLUMNS + ['overlapping_domain']
+DOMAIN_VALUES = ['overlapping', 'non-overlapping']
+
+# Each source is one bit of the multi-hot Source column
+SOURCES = ['ClinVar', 'gnomAD', 'COSMIC']
+
+# Relative cost per row of the filters, in comparisons of a contiguous array
+FILTER_COSTS = {'mask': 1, 'bits': 2, 'range': 3, 'lookup': 8}
+# Categories compared one by one rather than looked up in a table, up to this number
+MAX_CATEGORY_COMPARISONS = 6
+# Once fewer rows than this fraction are left, the next filters only read the values of these rows
+# (gathering the values of a row costs about as much as comparing the whole column for 50 rows)
+SPARSE_FRACTION = 0.02
+# Number of values of a numeric column used to estimate the fraction of rows kept by a range
+RANGE_SAMPLE_SIZE = 4096
+# Filtering slower than this (in milliseconds) is logged
+FILTER_BUDGET_MS = float(os.getenv('STOPKB_FILTER_BUDGET_MS', 100))
+# Memory used by each worker for the masks of the last applied filters
+FILTER_MASK_CACHE_SIZE = int(os.getenv('STOPKB_FILTER_MASK_CACHE_SIZE', 64 * 2**20))
+
+logger = logging.getLogger(__name__)
+
+# Gene, disease and phenotype annotations that are not shown in the variant table
+ANNOTATION_COLUMNS = ['Cytogenetic','RefSeq_nuc','Ensembl_nuc','RefSeq_prot','Ensembl_prot','uniprot_id','prot_length','exon_counts','disorder_id','name','orpha_code','definition','prevalence_geo','hpo_id','hpo_name','comment','definition_x','disease_name','phenotype_name']
+
+
+def source_bit_mask(source_values):
+    return sum(1 << SOURCES.index(source) for source in set(source_values or []) if source in SOURCES)
+
+
+def encode_sources(source_series):
+    # Decode each distinct 'ClinVar;gnomAD'-like string once, then gather the bits for every row
+    codes, uniques = pd.factorize(source_series)
+    table = np.zeros(len(uniques) + 1, dtype=np.uint8)
+    table[:-1] = [source_bit_mask(str(value).split(';')) for value in uniques]
+    return table[codes]
+
+
+def pack_bits(mask):
+    # Boolean mask -> bitmap of uint64 words, row r being the bit r % 64 of the word r // 64
+    packed = np.packbits(mask, bitorder='little')
+    return np.pad(packed, (0, -len(packed) % 8)).view(np.uint64)
+
+
+def unpack_bits(bitmap, length):
+    return np.unpackbits(bitmap.view(np.uint8), count=length, bitorder='little').view(bool)
+
+
+def test_bits(bitmap, rows):
+    # Bits of the given rows
+    return ((bitmap[rows >> 6] >> (rows & 63).astype(np.uint64)) & np.uint64(1)).astype(bool)
+
+
+def popcount(bitmap):
+    # Number of bits set in a bitmap, or in each row of a 2D array of bitmaps
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bitmap).sum(axis=-1, dtype=np.int64)
+    # numpy < 2: number of bits of each byte
+    return BYTE_POPCOUNTS[bitmap.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+BYTE_POPCOUNTS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def sorted_range(values, start, end):
+    # Positions [first, last) of the values between start and end in sorted values. The bounds are converted to
+    # the type of the values, numpy would otherwise convert the whole array for every search.
+    if np.issubdtype(values.dtype, np.integer):
+        info = np.iinfo(values.dtype)
+        start, end = np.ceil(start), np.floor(end)
+        if start > info.max or end < info.min or start > end:
+            return 0, 0
+        start, end = max(start, info.min), min(end, info.max)
+    first = np.searchsorted(values, np.asarray(start, dtype=values.dtype), side='left')
+    last = np.searchsorted(values, np.asarray(end, dtype=values.dtype), side='right')
+    return int(first), max(int(last), int(first))
+
+
+class FilterColumns:
+    # Arrays read by FilterSpec, with the statistics used to order the filters computed once per column.
+    # Subclasses give __len__, category_codes(column), numeric_values(column), source_bits and has_domain.
+    def memoized(self, name, compute):
+        values = self.__dict__.setdefault('_memoized', {})
+        if name not in values:
+            values[name] = compute()
+        return values[name]
+
+    def category_fractions(self, column):
+        # Fraction of the rows in each category, missing values (code -1) last
+        codes, categories = self.category_codes(column)
+        return self.memoized(('category', column), lambda: np.roll(np.bincount(codes + 1, minlength=len(categories) + 1), -1) / max(len(self), 1))
+
+    def source_fractions(self):
+        return self.memoized('source', lambda: np.bincount(self.source_bits, minlength=1 << len(SOURCES)) / max(len(self), 1))
+
+    def domain_fraction(self):
+        return self.memoized('domain', lambda: np.count_nonzero(self.has_domain) / max(len(self), 1))
+
+    def range_index(self, column):
+        # (row positions sorted by value, sorted values) of an indexed column, None if it is not indexed
+        return None
+
+    def bitmap(self, column, value):
+        # Bitmap of the rows kept by the filter value of a column, None if the column has no bitmap index
+        return None
+
+    def facet_values(self, column):
+        if column == 'Source':
+            return SOURCES
+        if column == 'overlapping_domain':
+            return DOMAIN_VALUES
+        return list(self.category_codes(column)[1])
+
+    def facet_counts(self, column, selected, rows=None):
+        # Number of selected rows with each value of a checklist column; selected is a mask over rows (all the rows for None)
+        if column == 'Source':
+            bits = (self.source_bits if rows is None else self.source_bits[rows])[selected]
+            counts = [np.count_nonzero(bits & (1 << bit)) for bit in range(len(SOURCES))]
+        elif column == 'overlapping_domain':
+            has_domain = (self.has_domain if rows is None else self.has_domain[rows])[selected]
+            counts = [np.count_nonzero(has_domain), len(has_domain) - np.count_nonzero(has_domain)]
+        else:
+            codes, categories = self.category_codes(column)
+            codes = (codes if rows is None else codes[rows])[selected]
+            counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        return dict(zip(self.facet_values(column), (int(count) for count in counts)))
+
+    def range_fraction(self, column, start, end):
+        # Exact with a range index, otherwise estimated on a sorted sample of the column.
+        # Missing values sort last and are never in the range.
+        index = self.range_index(column)
+        sample = index[1] if index is not None else self.memoized(('range', column), lambda: np.sort(self.numeric_values(column)[::max(len(self) // RANGE_SAMPLE_SIZE, 1)]))
+        first, last = sorted_range(sample, start, end)
+        return (last - first) / max(len(sample), 1)
+
+
+class FrameColumns(FilterColumns):
+    # Columns of a search result, read as the arrays of the variant store
+    def __init__(self, df):
+        self.df = df
+
+    def __len__(self):
+        return len(self.df)
+
+    def category_codes(self, column):
+        return self.memoized(('codes', column), lambda: pd.factorize(self.df[column]))
+
+    def numeric_values(self, column):
+        return self.memoized(('numeric', column), lambda: pd.to_numeric(self.df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan))
+
+    @functools.cached_property
+    def source_bits(self):
+        return encode_sources(self.df['Source'])
+
+    @functools.cached_property
+    def has_domain(self):
+        return self.df['overlapping_domain'].notna().to_numpy()
+
+
+def column_test(values, test):
+    # test(rows) evaluates the predicate on the values of the given rows, on the whole column for None
+    return lambda rows: test(values if rows is None else values[rows])
+
+
+def equal_any(codes, values):
+    mask = np.zeros(len(codes), dtype=bool)
+    for value in values:
+        mask |= codes == value
+    return mask
+
+
+def category_test(codes, table):
+    # (cost, test) of the rows whose category is kept by table, its last entry being for the missing values (code -1).
+    # A few kept (or removed) categories are compared directly, a gather from the table is slower.
+    kept = np.flatnonzero(table[:-1]).tolist()
+    removed = [code if code < len(table) - 1 else -1 for code in np.flatnonzero(~table).tolist()]
+    if len(kept) <= MAX_CATEGORY_COMPARISONS and len(kept) <= len(removed):
+        return max(len(kept), 1) * FILTER_COSTS['mask'], column_test(codes, lambda codes: equal_any(codes, kept))
+    if len(removed) <= MAX_CATEGORY_COMPARISONS:
+        return len(removed) * FILTER_COSTS['mask'], column_test(codes, lambda codes: ~equal_any(codes, removed))
+    return FILTER_COSTS['lookup'], column_test(codes, lambda codes: table[codes])
+
+
+class FilterSpec:
+    # Filters of the Apply Filter button, in the order of the callback States. A filter given as None is
+    # not applied, an empty list keeps no variation. The same spec filters the variant store and the
+    # search results (FrameColumns), whatever the page or the route.
+
+    # Positions of the range bounds in the values, the other filters are checklists
+    BOUND_POSITIONS = (2, 3, 4, 5, 8, 9)
+
+    def __init__(self, source_values=None, clinical_significance_values=None, start_pos_stop_prot_value=None, end_pos_stop_prot_value=None, start_pos_relative_value=None, end_pos_relative_value=None, stop_codon_values=None, nmd_sensitivity_values=None, start_af_worldwide_value=None, end_af_worldwide_value=None, overlapping_domain_values=None):
+        self.values = [source_values, clinical_significance_values, start_pos_stop_prot_value, end_pos_stop_prot_value, start_pos_relative_value, end_pos_relative_value, stop_codon_values, nmd_sensitivity_values, start_af_worldwide_value, end_af_worldwide_value, overlapping_domain_values]
+        # Applied filters by column, with a hashable value: a set of kept values, the bounds of a range or
+        # whether the variation has to overlap a domain
+        self.filters = {}
+        if source_values is not None:
+            self.filters['Source'] = frozenset(source_values)
+        for column, values in [('ClinicalSignificance', clinical_significance_values), ('codon_stop', stop_codon_values), ('NMD_sensitivity', nmd_sensitivity_values)]:
+            if values is not None:
+                self.filters[column] = frozenset(values)
+        for column, start, end in [('pos_stop_prot', start_pos_stop_prot_value, end_pos_stop_prot_value), ('pos_relative_prot', start_pos_relative_value, end_pos_relative_value), ('AF', start_af_worldwide_value, end_af_worldwide_value)]:
+            if start is not None and end is not None:
+                self.filters[column] = (float(start), float(end))
+        # No filtering if both or none of the overlapping_domain options are selected
+        domain = overlapping_domain_values or []
+        if ('overlapping' in domain) != ('non-overlapping' in domain):
+            self.filters['overlapping_domain'] = 'overlapping' in domain
+
+    @classmethod
+    def from_values(cls, values):
+        # Filters saved in a table query, None when they have not been applied
+        return cls(*(values or []))
+
+    @classmethod
+    def key_values(cls, values):
+        # The values as parts of a cache key: the checklists are sets, the order of the checked options does not matter
+        return [value if value is None or position in cls.BOUND_POSITIONS else frozenset(value) for position, value in enumerate(values)]
+
+    @classmethod
+    def valid_values(cls, values):
+        # Filters read back from a URL: None, or the 11 values with lists of text for the checklists and
+        # finite numbers for the range bounds
+        if values is None:
+            return True
+        if not isinstance(values, list) or len(values) != 11:
+            return False
+        for position, value in enumerate(values):
+            if value is None:
+                continue
+            if position in cls.BOUND_POSITIONS:
+                # Large integers, NaN and infinities are all out of the float range
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or not abs(value) <= sys.float_info.max:
+                    return False
+            elif not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                return False
+        return True
+
+    def seek(self, columns, only=None):
+        # (column, rows) of the most selective range filter with an index, read from the sorted values when it keeps
+        # few enough rows for the other filters to be evaluated on these rows only; None otherwise
+        best = None
+        for column, value in self.filters.items():
+            index = columns.range_index(column) if isinstance(value, tuple) and (only is None or column in only) else None
+            if index is not None:
+                order, values = index
+                start, stop = sorted_range(values, *value)
+                if stop - start < SPARSE_FRACTION * len(columns) and (best is None or stop - start < len(best[1])):
+                    best = column, order[start:stop]
+        return best
+
+    def bitmap(self, columns, predicates):
+        # AND of the bitmaps of the filters that have a bitmap index (None if none has), and the other predicates
+        bitmap, others = None, []
+        for predicate in predicates:
+            column_bitmap = columns.bitmap(predicate[1], self.filters[predicate[1]])
+            if column_bitmap is None:
+                others.append(predicate)
+            else:
+                bitmap = column_bitmap if bitmap is None else bitmap & column_bitmap
+        return bitmap, others
+
+    def facet_counts(self, columns, rows=None):
+        # {column: {value: count}} of the checklist columns, each value being counted among the rows kept by the
+        # other filters: the number of rows the option would keep if it were the only one checked in its column.
+        # Every filter is evaluated once, the rows kept by all the filters but one are ANDs of prefixes and suffixes.
+        predicates = self.predicates(columns)
+        filtered = [column for _, column, _ in predicates]
+        masks = [test(rows) for _, _, test in predicates]
+        prefixes = [np.ones(len(columns) if rows is None else len(rows), dtype=bool)]
+        for mask in masks:
+            prefixes.append(prefixes[-1] & mask)
+        suffixes = [prefixes[0]]
+        for mask in reversed(masks):
+            suffixes.append(suffixes[-1] & mask)
+        suffixes.reverse()
+        counts = {}
+        for column in FACET_COLUMNS:
+            index = filtered.index(column) if column in filtered else None
+            selected = prefixes[-1] if index is None else prefixes[index] & suffixes[index + 1]
+            counts[column] = columns.facet_counts(column, selected, rows)
+        return counts
+
+    def changed(self, other):
+        # Columns whose filter is not the same as in the other spec
+        return [column for column, value in self.filters.items() if other.filters.get(column) != value]
+
+    def refines(self, other):
+        # True if every row removed by the other spec is also removed by this one
+        for column, value in other.filters.items():
+            if column not in self.filters:
+                return False
+            new = self.filters[column]
+            if isinstance(value, frozenset) and not new <= value:
+                return False
+            if isinstance(value, tuple) and not value[0] <= new[0] <= new[1] <= value[1]:
+                return False
+            if isinstance(value, bool) and new != value:
+                return False
+        return True
+
+    def predicates(self, columns, only=None):
+        # (rank, column, test) of every applied filter, or of the listed ones. The rank is the cost of a row over
+        # the estimated fraction of rows removed, so that cheap filters removing many rows are evaluated first.
+        predicates = []
+        for column, value in self.filters.items():
+            if only is not None and column not in only:
+                continue
+            if column == 'Source':
+                wanted = source_bit_mask(value)
+                kept = columns.source_fractions()[(np.arange(1 << len(SOURCES)) & wanted) != 0].sum()
+                predicates.append((FILTER_COSTS['bits'], column_test(columns.source_bits, lambda bits, wanted=wanted: (bits & wanted) != 0), kept, column))
+            elif column == 'overlapping_domain':
+                kept = columns.domain_fraction() if value else 1 - columns.domain_fraction()
+                predicates.append((FILTER_COSTS['mask'], column_test(columns.has_domain, np.asarray if value else np.logical_not), kept, column))
+            elif isinstance(value, frozenset):
+                # The values are looked up once per category, the rows are then tested on their codes
+                codes, categories = columns.category_codes(column)
+                table = np.append(pd.Index(categories).isin(list(value)), False)
+                predicates.append((*category_test(codes, table), columns.category_fractions(column)[table].sum(), column))
+            else:
+                start, end = value
+                test = lambda values, start=start, end=end: (values >= start) & (values <= end)
+                predicates.append((FILTER_COSTS['range'], column_test(columns.numeric_values(column), test), columns.range_fraction(column, start, end), column))
+        return sorted(((cost / max(1 - kept, 1e-6), column, test) for cost, test, kept, column in predicates), key=lambda predicate: predicate[0])
+
+    def rows(self, columns, rows=None, only=None):
+        # Positions of the kept rows, among the given positions (in increasing order) or among all the rows
+        started = time.perf_counter()
+        predicates = self.predicates(columns, only)
+        names = [column for _, column, _ in predicates]
+        mask = None
+        if rows is None:
+            # Checklist filters are unions and intersections of precomputed bitmaps
+            bitmap, predicates = self.bitmap(columns, predicates)
+            seek = self.seek(columns, only)
+            if seek is not None:
+                # A narrow range is a slice of its index, the cost then depends on the number of rows in the range
+                rows = np.sort(seek[1])
+                predicates = [predicate for predicate in predicates if predicate[1] != seek[0]]
+                if bitmap is not None:
+                    rows = rows[test_bits(bitmap, rows)]
+            elif bitmap is not None:
+                mask = unpack_bits(bitmap, len(columns))
+                if popcount(bitmap) < SPARSE_FRACTION * len(columns):
+                    rows, mask = np.flatnonzero(mask), None
+        for _, _, test in predicates:
+            if rows is not None:
+                rows = rows[test(rows)]
+            else:
+                mask = test(None) if mask is None else mask & test(None)
+                if np.count_nonzero(mask) < SPARSE_FRACTION * len(columns):
+                    rows, mask = np.flatnonzero(mask), None
+        if rows is None:
+            rows = np.arange(len(columns)) if mask is None else np.flatnonzero(mask)
+        log_latency(started, len(columns), names)
+        return rows
+
+
+class FilterMasks:
+    # Mask of each single filter over the rows of a search, kept by the worker for the next filtering:
+    # when one control changes, only the mask of its filter is computed again. Least recently used first.
+    def __init__(self, size_limit=FILTER_MASK_CACHE_SIZE):
+        self.size_limit = size_limit
+        self.masks = collections.OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            mask = self.masks.get(key)
+            if mask is not None:
+                self.masks.move_to_end(key)
+            return mask
+
+    def put(self, key, mask):
+        with self.lock:
+            if key not in self.masks:
+                self.masks[key] = mask
+                self.size += mask.nbytes
+            while self.size > self.size_limit and self.masks:
+                self.size -= self.masks.popitem(last=False)[1].nbytes
+
+    def rows(self, spec, columns, dataset, rows=None):
+        # Same result as spec.rows(columns, rows); dataset identifies the columns and the rows
+        started = time.perf_counter()
+        predicates = spec.predicates(columns)
+        names = [column for _, column, _ in predicates]
+        mask = None
+        if rows is None:
+            # The checklist filters are read from their bitmaps, only the masks of the other filters are kept
+            bitmap, predicates = spec.bitmap(columns, predicates)
+            mask = None if bitmap is None else unpack_bits(bitmap, len(columns))
+        for _, column, test in predicates:
+            key = (dataset, column, spec.filters[column])
+            column_mask = self.get(key)
+            if column_mask is None:
+                column_mask = test(rows)
+                self.put(key, column_mask)
+            mask = column_mask if mask is None else mask & column_mask
+        log_latency(started, len(columns), names)
+        if mask is None:
+            return np.arange(len(columns)) if rows is None else rows
+        return np.flatnonzero(mask) if rows is None else rows[mask]
+
+
+def log_latency(started, length, columns):
+    elapsed = (time.perf_counter() - started) * 1000
+    if elapsed > FILTER_BUDGET_MS:
+        logger.warning("Filtering %d rows took %.0f ms (%s)", length, elapsed, ", ".join(columns))
+
+
+def significance_by_source(source_bits, significance_codes, significance_names):
+    # Number of variations per (Source, ClinicalSignificance), a variation being counted once for each of its sources
+    rows = []
+    known = significance_codes >= 0
+    for bit, source in enumerate(SOURCES):
+        counts = np.bincount(significance_codes[known & ((source_bits >> bit) & 1).astype(bool)], minlength=len(significance_names))
+        rows += [(source, significance_names[i], counts[i]) for i in np.flatnonzero(counts)]
+    patho_fig_df = pd.DataFrame(rows, columns=['Source', 'ClinicalSignificance', 'Count'])
+    return patho_fig_df.sort_values(by=['Count'], ascending=False)
+
+
+def frame_significance_by_source(df):
+    codes, names = pd.factorize(df['ClinicalSignificance'])
+    return significance_by_source(encode_sources(df['Source']), codes, np.asarray(names))
+
+
+def parse_region(text):
+    # 'chr17:7,660,000-7,690,000' or a single position '17:7675088', None if the text is not a region
+    match = re.fullmatch(r'\s*([^:\s]+):([\d,]+)(?:-([\d,]+))?\s*', text or '')
+    if match is None:
+        return None
+    start = int(match[2].replace(',', ''))
+    end = int(match[3].replace(',', '')) if match[3] else start
+    return chromosome_name(match[1]), min(start, end), max(start, end)
+
+
+class MultiValueIndex:
+    # CSR index from each variant row to the ids of the names listed in a '; '-separated column
+    def __init__(self, series, sep='; '):
+        codes = series.cat.codes.to_numpy()
+        split = [value.split(sep) for value in series.cat.categories]
+        category_lengths = np.array([len(names) for names in split], dtype=np.int64)
+        self.names, category_ids = np.unique(np.concatenate(split) if split else np.array([], dtype=object), return_inverse=True)
+        category_starts = np.concatenate([[0], np.cumsum(category_lengths)[:-1]])
+
+        # Every row points to the id list of its category, missing values have no id
+        row_lengths = np.where(codes >= 0, category_lengths[codes], 0)
+        self.indptr = np.concatenate([[0], np.cumsum(row_lengths)])
+        self.indices = category_ids[self._gather(np.where(codes >= 0, category_starts[codes], 0), row_lengths)].astype(np.int32)
+
+    @staticmethod
+    def _gather(starts, lengths):
+        # Flat positions of the [start, start + length) segments, concatenated
+        offsets = np.cumsum(lengths) - lengths
+        return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+    def counts(self, rows=None, weights=None):
+        # Number of selected variations per name; rows is a boolean mask, an array of row positions or a slice
+        if rows is None:
+            return np.bincount(self.indices, minlength=len(self.names))
+        if isinstance(rows, slice):
+            # Contiguous rows have contiguous ids
+            start, stop, _ = rows.indices(len(self.indptr) - 1)
+            return np.bincount(self.indices[self.indptr[start]:self.indptr[max(start, stop)]], minlength=len(self.names))
+        rows = np.flatnonzero(rows) if rows.dtype == bool else rows
+        lengths = self.indptr[rows + 1] - self.indptr[rows]
+        ids = self.indices[self._gather(self.indptr[rows], lengths)]
+        if weights is None:
+            return np.bincount(ids, minlength=len(self.names))
+        return np.bincount(ids, weights=np.repeat(weights, lengths), minlength=len(self.names)).astype(np.int64)
+
+    def value_counts(self, rows=None, weights=None):
+        # Same result as str.split(sep).explode().value_counts()
+        counts = self.counts(rows, weights)
+        order = np.argsort(-counts, kind='stable')
+        order = order[counts[order] > 0]
+        return pd.Series(counts[order], index=self.names[order], name='count')
+
+
+class VariantStore(FilterColumns):
+    def __init__(self, path):
+        df = pd.read_csv(path, sep="\t", low_memory=False)
+        # Changes whenever the file is replaced, so that results computed on an older file are not reused
+        self.version = os.path.getmtime(path)
+        df.rename(columns={'Merged_Source': 'Source'}, inplace=True)
+
+        for col in df.columns:
+            if col in INTEGER_COLUMNS and df[col].notna().all():
+                df[col] = pd.to_numeric(df[col], downcast='integer')
+            elif col in INTEGER_COLUMNS or col in FLOAT_COLUMNS:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+            elif col in CATEGORICAL_COLUMNS or (col != 'HGVSG' and not pd.api.types.is_numeric_dtype(df[col])):
+                # Every other text column is repeated per gene (names, identifiers, diseases...)
+                df[col] = df[col].astype('category')
+
+        # Variations of a gene are contiguous, genes in alphabetical order and missing symbols last
+        df = df.sort_values('symbol', kind='stable', ignore_index=True)
+
+        self.df = df
+        self.codes = {col: df[col].cat.codes.to_numpy() for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)}
+        self.numeric = {col: df[col].to_numpy() for col in INTEGER_COLUMNS + FLOAT_COLUMNS if col in df.columns}
+        self.has_domain = df['overlapping_domain'].notna().to_numpy()
+        self.source_bits = encode_sources(df['Source'])
+        # Sorted values of the range filters, with the row of each value; missing values are last
+        self.range_indexes = {}
+        for col in RANGE_INDEX_COLUMNS:
+            if col in self.numeric:
+                order = np.argsort(self.numeric[col], kind='stable').astype(np.int32 if len(df) < 2**31 else np.int64)
+                self.range_indexes[col] = order, self.numeric[col][order]
+        # One bitmap per value of the checklist columns, per source and for the presence or absence of a domain
+        self.bitmaps = {col: np.stack([pack_bits(self.codes[col] == code) for code in range(len(self.categories(col)))] or [pack_bits(np.zeros(len(df), dtype=bool))])
+                        for col in BITMAP_COLUMNS if col in self.codes}
+        self.bitmaps['Source'] = np.stack([pack_bits((self.source_bits >> bit) & 1) for bit in range(len(SOURCES))])
+        self.bitmaps['overlapping_domain'] = np.stack([pack_bits(self.has_domain), pack_bits(~self.has_domain)])
+
+        # Diseases and phenotypes of every variation, exploded once
+        self.diseases = MultiValueIndex(df['disease_name'])
+        self.phenotypes = MultiValueIndex(df['phenotype_name'])
+
+        # Rows of the gene with code i are gene_offsets[i]:gene_offsets[i + 1]
+        symbol_codes = self.codes['symbol']
+        self.gene_offsets = np.searchsorted(symbol_codes[:np.count_nonzero(symbol_codes >= 0)], np.arange(len(self.categories('symbol')) + 1))
+
+        # The diseases and phenotypes of a variation are those of its gene, one row per gene is enough to look them up
+        self.gene_first_row = pd.Series(self.gene_offsets[:-1], index=self.categories('symbol').astype(object))
+
+        # Variations are identified by packed uint64 keys (see hgvsg.py), the text is only kept for display
+        self.codec = HgvsgCodec()
+        self.keys = self.codec.encode(df['HGVSG'])
+        df['HGVSG'] = df['HGVSG'].astype('string[pyarrow]')
+
+        # Sorted keys: the rows of a variation located on several genes are adjacent, and the variations
+        # of a chromosome are sorted by position, which is the interval index of the region searches
+        self.key_order = np.argsort(self.keys, kind='stable')
+        self.sorted_keys = self.keys[self.key_order]
+        self.sorted_ends = self.codec.ends(self.sorted_keys)
+        # A variation overlapping a region starts at most max_span bases before it
+        self.max_span = int((self.sorted_ends - unpack(self.sorted_keys)[1]).max()) if len(df) else 0
+
+    def __len__(self):
+        return len(self.df)
+
+    def categories(self, column):
+        return self.df[column].cat.categories
+
+    def category_codes(self, column):
+        return self.codes[column], self.categories(column)
+
+    def numeric_values(self, column):
+        return self.numeric[column]
+
+    def range_index(self, column):
+        return self.range_indexes.get(column)
+
+    def bitmap(self, column, value):
+        if column not in self.bitmaps:
+            return None
+        if column == 'Source':
+            selected = [SOURCES.index(source) for source in value if source in SOURCES]
+        elif column == 'overlapping_domain':
+            selected = [0 if value else 1]
+        else:
+            selected = self.categories(column).get_indexer(list(value))
+            selected = selected[selected >= 0]
+        # Union of the bitmaps of the selected values
+        return np.bitwise_or.reduce(self.bitmaps[column][selected], axis=0)
+
+    def facet_counts(self, column, selected, rows=None):
+        if rows is not None or column not in self.bitmaps:
+            return super().facet_counts(column, selected, rows)
+        # Popcounts of the bitmap of every value AND the selected rows
+        counts = popcount(self.bitmaps[column] & pack_bits(selected))
+        return dict(zip(self.facet_values(column), counts.tolist()))
+
+    def gene_representatives(self, symbols):
+        # First row of each gene in symbols, weighted by its number of occurrences
+        symbol_counts = pd.Series(symbols).value_counts()
+        rows = self.gene_first_row.reindex(symbol_counts.index)
+        known = rows.notna().to_numpy()
+        return rows.to_numpy()[known].astype(np.int64), symbol_counts.to_numpy()[known]
+
+    def gene_slice(self, symbol):
+        if symbol not in self.categories('symbol'):
+            return slice(0, 0)
+        code = self.categories('symbol').get_loc(symbol)
+        return slice(self.gene_offsets[code], self.gene_offsets[code + 1])
+
+    def gene_rows(self, symbols):
+        # Row positions of all the variations of the given genes
+        codes = self.categories('symbol').get_indexer(pd.unique(pd.Series(symbols, dtype=object)))
+        codes = codes[codes >= 0]
+        starts = self.gene_offsets[codes]
+        return MultiValueIndex._gather(starts, self.gene_offsets[codes + 1] - starts)
+
+    def key_rows(self, keys):
+        # Rows of each key, from a binary search in the sorted keys: rows of keys[i] are key_order[first[i]:last[i]]
+        first = np.searchsorted(self.sorted_keys, keys, side='left')
+        last = np.searchsorted(self.sorted_keys, keys, side='right')
+        return first, last
+
+    def batch_rows(self, identifiers):
+        # Rows of the listed genes and variations in a single pass, and the identifiers that match neither
+        identifiers = pd.Index(pd.unique(pd.Series(identifiers, dtype=object)))
+        first, last = self.key_rows(self.codec.encode(identifiers, grow=False))
+        variation_rows = self.key_order[MultiValueIndex._gather(first, last - first)]
+        rows = np.union1d(self.gene_rows(identifiers), variation_rows)
+        missing = (last == first) & (self.categories('symbol').get_indexer(identifiers) < 0)
+        return rows, list(identifiers[missing])
+
+    def region_rows(self, regions):
+        # Rows of the variations overlapping any of the (chrom, start, end) regions, in store order
+        rows = [np.array([], dtype=np.int64)]
+        for chrom, start, end in regions:
+            if chrom not in CHROMOSOME_CODES:
+                continue
+            code = CHROMOSOME_CODES[chrom]
+            first = np.searchsorted(self.sorted_keys, pack(code, max(start - self.max_span, 0), 0))
+            last = np.searchsorted(self.sorted_keys, pack(code, min(end + 1, int(POSITION_MASK)), 0))
+            overlapping = self.sorted_ends[first:last] >= start
+            rows.append(self.key_order[first:last][overlapping])
+        return np.unique(np.concatenate(rows))
+
+    def significance_by_source(self, mask=None):
+        source_bits = self.source_bits if mask is None else self.source_bits[mask]
+        significance_codes = self.codes['ClinicalSignificance'] if mask is None else self.codes['ClinicalSignificance'][mask]
+        return significance_by_source(source_bits, significance_codes, np.asarray(self.categories('ClinicalSignificance')))
+
+    def value_counts(self, column, mask=None):
+        # Same result as Series.value_counts() but counted on the categorical codes
+        codes = self.codes[column] if mask is None else self.codes[column][mask]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.categories(column)))
+        order = np.argsort(-counts, kind='stable')
+        order = order[counts[order] > 0]
+        return pd.Series(counts[order], index=pd.Index(self.categories(column)[order], name=column), name='count')
+
+    def nunique(self, column, mask=None):
+        if column == 'HGVSG':
+            return len(np.unique(self.keys if mask is None else self.keys[mask]))
+        if column not in self.codes:
+            return self.df[column].nunique() if mask is None else self.df[column].iloc[mask].nunique()
+        return len(self.value_counts(column, mask))
+
+    def frame(self, rows=None, drop_annotations=False):
+        df = self.df if rows is None else self.df.iloc[rows]
+        if drop_annotations:
+            df = df.drop(columns=[col for col in ANNOTATION_COLUMNS if col in df.columns])
+        return df
@@ -0,0 +1,160 @@
+import argparse
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from variant_store import VariantStore
+
+# Size of the pieces read from the input and of the record batches looked up at once
+VCF_READ_SIZE = 1 << 20
+VCF_BATCH_RECORDS = int(os.getenv('STOPKB_VCF_BATCH_RECORDS', 20000))
+
+# StopKB columns added to the INFO column, with one value per matched allele and gene after STOPKB_ALLELE
+INFO_FIELDS = [
+    ('STOPKB_HGVSG', 'HGVSG', "HGVSG of the variation in StopKB"),
+    ('STOPKB_GENE', 'symbol', "Gene symbol"),
+    ('STOPKB_CLNSIG', 'ClinicalSignificance', "Clinical significance"),
+    ('STOPKB_NMD', 'NMD_sensitivity', "NMD sensitivity"),
+    ('STOPKB_UPSTREAM', 'nuc_upstream', "Nucleotide upstream of the stop codon"),
+    ('STOPKB_STOP_CODON', 'codon_stop', "Stop codon"),
+    ('STOPKB_DOWNSTREAM', 'nuc_downstream', "Nucleotide downstream of the stop codon"),
+    ('STOPKB_RELPOS', 'pos_relative_prot', "Relative position of the stop codon in the protein"),
+    ('STOPKB_DOMAIN', 'overlapping_domain', "Overlapping protein domain"),
+]
+INFO_HEADER = '##INFO=<ID=STOPKB_ALLELE,Number=.,Type=String,Description="Alternate allele found in StopKB">\n' + "".join(
+    f'##INFO=<ID={name},Number=.,Type=String,Description="{description}">\n' for name, _, description in INFO_FIELDS)
+
+# Characters that cannot appear in an INFO value
+INFO_ESCAPES = str.maketrans({'%': '%25', ';': '%3B', '=': '%3D', ',': '%2C', ' ': '%20', '\t': '%09', '\n': '%0A', '\r': '%0D'})
+
+
+def normalize(pos, ref, alt):
+    # Position and change of the HGVSG form used by the variations, e.g. (126275389, 'C>T') for 11:g.126275389C>T.
+    # Only the bases shared by REF and ALT are trimmed. HGVS shifts indels to the 3' end of a repeat and writes
+    # repeated insertions as dup, which needs the reference sequence around the record: an indel in a repeat is
+    # matched only if the VCF already writes it at the HGVS position, and duplications are never matched.
+    if len(ref) == 1 and len(alt) == 1:
+        return pos, f"{ref}>{alt}"
+    # Shared bases are trimmed, suffix first, then prefix (which moves the position)
+    while len(ref) > 1 and len(alt) > 1 and ref[-1] == alt[-1]:
+        ref, alt = ref[:-1], alt[:-1]
+    while ref and alt and ref[0] == alt[0]:
+        ref, alt, pos = ref[1:], alt[1:], pos + 1
+    end = f"_{pos + len(ref) - 1}" if len(ref) > 1 else ""
+    if not ref:
+        return pos - 1, f"_{pos}ins{alt}"
+    if not alt:
+        return pos, f"{end}del"
+    if len(ref) == 1 and len(alt) == 1:
+        return pos, f"{ref}>{alt}"
+    return pos, f"{end}delins{alt}"
+
+
+def decompressed(stream):
+    # Plain or (b)gzipped input, bgzip files being a series of gzip members
+    chunk = stream.read(VCF_READ_SIZE)
+    if chunk[:2] != b'\x1f\x8b':
+        while chunk:
+            yield chunk
+            chunk = stream.read(VCF_READ_SIZE)
+        return
+    decompressor = zlib.decompressobj(31)
+    while chunk:
+        yield decompressor.decompress(chunk)
+        while decompressor.eof and decompressor.unused_data:
+            rest = decompressor.unused_data
+            decompressor = zlib.decompressobj(31)
+            yield decompressor.decompress(rest)
+        chunk = stream.read(VCF_READ_SIZE)
+
+
+def lines(chunks):
+    # Bytes that are not UTF-8 (e.g. latin-1 text in INFO) are replaced instead of stopping the stream
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        *complete, pending = pending.split(b"\n")
+        for line in complete:
+            yield line.decode(errors="replace")
+    if pending:
+        yield pending.decode(errors="replace")
+
+
+class VcfAnnotator:
+    def __init__(self, store):
+        # Records are looked up by their packed key in the sorted keys of the store
+        self.store = store
+        self.columns = [store.df[column].array for _, column, _ in INFO_FIELDS]
+
+    def info(self, alleles, rows):
+        info = ["STOPKB_ALLELE=" + ",".join(alleles)]
+        info += [f"{name}=" + ",".join(self.value(column[row]) for row in rows) for (name, _, _), column in zip(INFO_FIELDS, self.columns)]
+        return ";".join(info)
+
+    @staticmethod
+    def value(value):
+        return '.' if pd.isna(value) else str(value).translate(INFO_ESCAPES)
+
+    def annotate_batch(self, records):
+        # Every allele of the batch is looked up at once
+        alleles = []
+        for index, fields in enumerate(records):
+            if len(fields) > 7 and fields[1].isdigit():
+                for alt in fields[4].split(','):
+                    key = self.store.codec.key(fields[0], *normalize(int(fields[1]), fields[3].upper(), alt.upper()))
+                    if key is not None:
+                        alleles.append((index, alt, key))
+        first, last = self.store.key_rows(np.array([key for _, _, key in alleles], dtype=np.uint64))
+        matches = {}
+        for (index, alt, _), start, stop in zip(alleles, first, last):
+            if stop > start:
+                rows = self.store.key_order[start:stop]
+                allele_list, row_list = matches.setdefault(index, ([], []))
+                allele_list += [alt] * len(rows)
+                row_list += list(rows)
+        for index, (allele_list, row_list) in matches.items():
+            fields = records[index]
+            info = self.info(allele_list, row_list)
+            fields[7] = info if fields[7] in ('', '.') else fields[7] + ';' + info
+        return "".join("\t".join(fields) + "\n" for fields in records)
+
+    def annotate(self, chunks):
+        # Annotated VCF text, produced batch by batch so that memory does not depend on the input size
+        batch = []
+        for line in lines(chunks):
+            if line.startswith('#'):
+                if line.startswith('#CHROM'):
+                    yield INFO_HEADER
+                yield line + "\n"
+            elif line:
+                batch.append(line.split('\t'))
+                if len(batch) >= VCF_BATCH_RECORDS:
+                    yield self.annotate_batch(batch)
+                    batch = []
+        if batch:
+            yield self.annotate_batch(batch)
+
+
+def stream_vcf_gz(text_chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for text in text_chunks:
+        data = compressor.compress(text.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Annotate a VCF with the StopKB variations")
+    parser.add_argument('input', type=argparse.FileType('rb'), help="VCF file, plain or (b)gzipped, - for the standard input")
+    parser.add_argument('-o', '--output', type=argparse.FileType('wb'), default='-', help="annotated VCF, gzipped if the name ends with .gz")
+    parser.add_argument('--store', default="assets/StopKB.csv", help="StopKB variant file")
+    args = parser.parse_args()
+
+    annotator = VcfAnnotator(VariantStore(args.store))
+    with args.input as source, args.output as output:
+        text = annotator.annotate(decompressed(source))
+        for data in (stream_vcf_gz(text) if output.name.endswith('.gz') else (chunk.encode() for chunk in text)):
+            output.write(data)